@@ -1,11 +1,12 @@
 """
 Django admin configuration for the REdI Trolley Audit System.
 
-Registers all 17 models with appropriate list displays, filters,
+Registers all 24 models with appropriate list displays, filters,
 search fields, and inline editing where relationships warrant it.
 """
 
 from django.contrib import admin
+from django.utils import timezone
 
 from .models import (
     AuditChecks,
@@ -14,7 +15,9 @@ from .models import (
     AuditEquipment,
     AuditPeriod,
     Audit,
+    ComplianceRollup,
     CorrectiveAction,
+    ExportJob,
     Equipment,
     EquipmentCategory,
     Issue,
@@ -22,9 +25,14 @@ from .models import (
     Location,
     LocationChangeLog,
     LocationEquipment,
+    OutboundEmail,
+    PendingNotification,
     RandomAuditSelection,
     RandomAuditSelectionItem,
+    ScoringProfile,
+    SearchDocument,
     ServiceLine,
+    ViewMetric,
 )
 
 
@@ -176,12 +184,12 @@ class AuditPeriodAdmin(admin.ModelAdmin):
 class AuditAdmin(admin.ModelAdmin):
     list_display = (
         'location', 'period', 'audit_type', 'auditor_name',
-        'submission_status', 'overall_compliance',
+        'submission_status', 'overall_compliance', 'scoring_profile',
         'requires_follow_up', 'started_at', 'completed_at',
     )
     list_filter = (
         'audit_type', 'submission_status', 'requires_follow_up',
-        'period', 'location__service_line',
+        'period', 'location__service_line', 'scoring_profile',
     )
     search_fields = (
         'location__display_name', 'auditor_name', 'notes',
@@ -296,3 +304,109 @@ class RandomAuditSelectionItemAdmin(admin.ModelAdmin):
     )
     list_filter = ('audit_status',)
     search_fields = ('location__display_name',)
+
+
+@admin.register(ScoringProfile)
+class ScoringProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'version', 'name', 'documentation_weight', 'equipment_weight',
+        'condition_weight', 'check_weight', 'critical_weight',
+        'non_critical_weight', 'is_active', 'created_at',
+    )
+    list_filter = ('is_active',)
+    search_fields = ('name', 'notes')
+    WEIGHT_FIELDS = (
+        'documentation_weight', 'equipment_weight', 'condition_weight',
+        'check_weight', 'critical_weight', 'non_critical_weight',
+    )
+
+    def get_readonly_fields(self, request, obj=None):
+        # Weights are frozen once a profile has scored audits; add a new
+        # version instead so stored scores stay reproducible.
+        if obj is not None and obj.audits.exists():
+            return ('version',) + self.WEIGHT_FIELDS
+        return ('version',)
+
+
+@admin.register(ComplianceRollup)
+class ComplianceRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'month', 'location', 'service_line', 'audit_count',
+        'scored_count', 'compliance_total', 'updated_at',
+    )
+    list_filter = ('service_line', 'month')
+    search_fields = ('location__department_name', 'location__display_name')
+    date_hierarchy = 'month'
+    readonly_fields = (
+        'month', 'service_line', 'location', 'audit_count',
+        'scored_count', 'compliance_total', 'updated_at',
+    )
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'export_type', 'export_format', 'status', 'rows_written',
+        'total_rows', 'requested_by', 'created_at', 'completed_at',
+    )
+    list_filter = ('status', 'export_type', 'export_format')
+    readonly_fields = (
+        'params_hash', 'total_rows', 'rows_written', 'file', 'error',
+        'created_at', 'started_at', 'completed_at',
+    )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject', 'to', 'importance', 'status', 'attempts',
+        'next_attempt_at', 'created_at', 'sent_at',
+    )
+    list_filter = ('status', 'importance')
+    search_fields = ('subject', 'to')
+    date_hierarchy = 'created_at'
+    readonly_fields = (
+        'attempts', 'claimed_at', 'last_error', 'created_at', 'sent_at',
+    )
+    actions = ['retry_emails']
+
+    @admin.action(description='Retry selected emails now')
+    def retry_emails(self, request, queryset):
+        updated = queryset.exclude(status='Sent').update(
+            status='Queued',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            claim_token=None,
+        )
+        self.message_user(request, f'{updated} emails queued for retry.')
+
+
+@admin.register(PendingNotification)
+class PendingNotificationAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'recipient', 'issue', 'created_at', 'digested_at')
+    list_filter = ('kind', 'digested_at')
+    search_fields = ('recipient', 'issue__issue_number', 'issue__title')
+    raw_id_fields = ('issue', 'digest')
+    readonly_fields = ('created_at', 'digested_at')
+
+
+@admin.register(ViewMetric)
+class ViewMetricAdmin(admin.ModelAdmin):
+    list_display = (
+        'url_name', 'requests', 'query_count', 'max_queries',
+        'db_time_ms', 'total_time_ms', 'max_time_ms', 'updated_at',
+    )
+    search_fields = ('url_name',)
+    readonly_fields = (
+        'url_name', 'requests', 'query_count', 'max_queries', 'db_time_ms',
+        'template_time_ms', 'total_time_ms', 'max_time_ms',
+        'response_bytes', 'updated_at',
+    )
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'title', 'object_id', 'updated_at')
+    list_filter = ('kind',)
+    search_fields = ('title',)
+    readonly_fields = ('kind', 'object_id', 'title', 'body', 'updated_at')
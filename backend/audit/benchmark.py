@@ -0,0 +1,400 @@
+"""
+Performance benchmark harness for the REdI Trolley Audit System.
+
+BenchmarkDataset synthesises a dataset at a configurable scale. Reference
+data (roles, service lines, equipment, the benchmark user) comes from the
+test factories in audit/tests/factories.py. Locations, audits, equipment
+checks and issues are bulk-inserted in batches, because the factories'
+row-at-a-time INSERTs would take hours at 1M audits; the compliance rollup
+and search index are then rebuilt, as after any bulk load.
+
+BenchmarkRunner drives the key views through the Django test client and
+records latency (p50/p99) and query counts for each scenario. The
+benchmark management command wraps both in a throwaway database and writes
+the results as JSON that can be compared across commits.
+"""
+import json
+import math
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+SCALES = {
+    'tiny': {'locations': 5, 'audits': 50, 'equipment': 10},
+    'small': {'locations': 100, 'audits': 5_000, 'equipment': 40},
+    'medium': {'locations': 1_000, 'audits': 100_000, 'equipment': 50},
+    'large': {'locations': 5_000, 'audits': 1_000_000, 'equipment': 50},
+}
+
+
+class BenchmarkError(Exception):
+    """Raised when a benchmarked request does not succeed."""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class BenchmarkDataset:
+    """Build a synthetic dataset for benchmarking."""
+
+    BATCH_SIZE = 5_000
+    SERVICE_LINES = 8
+    CATEGORIES = 5
+    HISTORY_DAYS = 730
+    USERNAME = 'benchmark'
+    PASSWORD = 'benchmark-pass'
+
+    def __init__(self, locations, audits, equipment, seed=0, stdout=None):
+        """
+        Args:
+            locations: Number of trolley locations
+            audits: Number of submitted historical audits
+            equipment: Equipment items per trolley (AuditEquipment rows
+                per audit)
+            seed: Random seed, so repeated runs build the same data
+            stdout: Optional callable for progress messages
+        """
+        self.locations = locations
+        self.audits = audits
+        self.equipment = equipment
+        self.random = random.Random(seed)
+        self.stdout = stdout or (lambda message: None)
+
+    def build(self):
+        """Create the dataset. Returns the benchmark user."""
+        from audit.services.rollup import ComplianceRollupService
+        from audit.services.search import SearchService
+        from audit.tests.factories import (
+            create_audit_period,
+            create_equipment,
+            create_equipment_category,
+            create_service_line,
+            create_user,
+            setup_all_roles,
+        )
+
+        setup_all_roles()
+        user = create_user(
+            username=self.USERNAME, password=self.PASSWORD,
+            groups=['System Admin'], is_superuser=True, is_staff=True,
+        )
+        service_lines = [
+            create_service_line(name=f'Service Line {i}', abbreviation=f'SL{i}')
+            for i in range(self.SERVICE_LINES)
+        ]
+        categories = [
+            create_equipment_category(category_name=f'Category {i}', sort_order=i)
+            for i in range(self.CATEGORIES)
+        ]
+        equipment = [
+            create_equipment(
+                category=categories[i % self.CATEGORIES],
+                item_name=f'Item {i}',
+                sort_order=i,
+                critical_item=i % 10 == 0,
+            )
+            for i in range(self.equipment)
+        ]
+        self.period = create_audit_period()
+
+        location_ids = self._create_locations(service_lines)
+        self._create_audits(location_ids, [item.pk for item in equipment], user)
+        self._create_issues(location_ids)
+
+        self.stdout('Rebuilding compliance rollup and search index...')
+        ComplianceRollupService().rebuild()
+        SearchService().rebuild()
+        return user
+
+    def _create_locations(self, service_lines):
+        from audit.models import Location
+
+        rows = [
+            Location(
+                service_line=service_lines[i % len(service_lines)],
+                department_name=f'Department {i:05d}',
+                display_name=f'Department {i:05d}',
+                building=f'Block {i % 12}',
+                level=f'Level {i % 9}',
+                trolley_type='Standard',
+                defibrillator_type='LIFEPAK_1000_AED',
+                operating_hours='24_7',
+                status='Active',
+            )
+            for i in range(self.locations)
+        ]
+        Location.objects.bulk_create(rows, batch_size=self.BATCH_SIZE)
+        self.stdout(f'Created {len(rows)} locations.')
+        return [row.pk for row in rows]
+
+    def _create_audits(self, location_ids, equipment_ids, user):
+        from audit.models import Audit, AuditEquipment
+
+        now = timezone.now()
+        created = 0
+        while created < self.audits:
+            batch = []
+            for _ in range(min(self.BATCH_SIZE, self.audits - created)):
+                score = Decimal(self.random.randint(5000, 10000)) / 100
+                batch.append(Audit(
+                    location_id=self.random.choice(location_ids),
+                    period=self.period,
+                    auditor_name='Benchmark Auditor',
+                    auditor_user=user,
+                    submission_status='Submitted',
+                    completed_at=now - timedelta(
+                        minutes=self.random.randint(0, self.HISTORY_DAYS * 24 * 60),
+                    ),
+                    overall_compliance=score,
+                    document_score=score,
+                    equipment_score=score,
+                    condition_score=score,
+                    check_score=score,
+                ))
+            Audit.objects.bulk_create(batch)
+            AuditEquipment.objects.bulk_create(
+                [
+                    AuditEquipment(
+                        audit=audit,
+                        equipment_id=equipment_id,
+                        is_present=self.random.random() > 0.05,
+                        quantity_found=1,
+                        quantity_expected=1,
+                    )
+                    for audit in batch
+                    for equipment_id in equipment_ids
+                ],
+                batch_size=self.BATCH_SIZE,
+            )
+            created += len(batch)
+            self.stdout(f'Created {created}/{self.audits} audits.')
+
+    def _create_issues(self, location_ids):
+        from audit.models import Issue
+
+        severities = ['Critical', 'High', 'Medium', 'Low']
+        statuses = ['Open', 'Assigned', 'InProgress', 'Resolved', 'Closed']
+        count = max(self.audits // 20, 1)
+        for start in range(0, count, self.BATCH_SIZE):
+            Issue.objects.bulk_create([
+                Issue(
+                    issue_number=f'BENCH-{n:07d}',
+                    location_id=self.random.choice(location_ids),
+                    issue_category='Equipment',
+                    severity=severities[n % len(severities)],
+                    status=statuses[n % len(statuses)],
+                    title=f'Benchmark issue {n}',
+                    description='Synthetic issue',
+                    reported_by='Benchmark',
+                )
+                for n in range(start, min(start + self.BATCH_SIZE, count))
+            ])
+        self.stdout(f'Created {count} issues.')
+
+
+class BenchmarkRunner:
+    """Measure latency and query counts of the key views."""
+
+    def __init__(self, user, iterations=20, stdout=None):
+        self.user = user
+        self.iterations = iterations
+        self.stdout = stdout or (lambda message: None)
+        self.client = Client()
+        self.client.force_login(user)
+        self.samples = {}
+
+    def _measure(self, name, request, cold_cache=False):
+        if cold_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = request()
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{name} returned HTTP {response.status_code}')
+        self.samples.setdefault(name, []).append((elapsed * 1000, len(queries)))
+        return response
+
+    def run(self):
+        """
+        Run every scenario for the configured number of iterations.
+
+        Returns:
+            Dict of scenario name to summary statistics.
+        """
+        from audit.models import Audit, AuditEquipment, Location
+
+        get = self.client.get
+        read_scenarios = [
+            ('dashboard', lambda: get(reverse('audit:dashboard')), True),
+            ('dashboard_cached', lambda: get(reverse('audit:dashboard')), False),
+            ('trolley_list', lambda: get(reverse('audit:trolley_list')), False),
+            ('api_compliance_trend', lambda: get(reverse('audit:api_compliance_trend')), False),
+            ('api_issues_by_severity', lambda: get(reverse('audit:api_issues_severity')), False),
+            ('api_audit_volume', lambda: get(reverse('audit:api_audit_volume')), False),
+            ('api_search', lambda: get(reverse('audit:api_search'), {'q': 'department 1'}), False),
+            ('trolley_search', lambda: get(reverse('audit:trolley_list'), {'q': 'block 3'}), False),
+        ]
+        for name, request, cold_cache in read_scenarios:
+            self.stdout(f'Running {name}...')
+            for _ in range(self.iterations):
+                self._measure(name, request, cold_cache=cold_cache)
+
+        self.stdout('Running audit wizard...')
+        location_ids = list(
+            Location.objects.exclude(audits__submission_status='InProgress')
+            .values_list('pk', flat=True)[:self.iterations]
+        )
+        for location_id in location_ids:
+            self._measure('audit_start', partial(
+                self.client.post, reverse('audit:audit_start', args=[location_id]),
+            ))
+            audit = Audit.objects.filter(
+                location_id=location_id, submission_status='InProgress',
+            ).latest('started_at')
+
+            prefix = 'equip_{}'.format
+            data = {}
+            for check_id in AuditEquipment.objects.filter(audit=audit).values_list('pk', flat=True):
+                data[f'{prefix(check_id)}_present'] = 'on'
+                data[f'{prefix(check_id)}_qty'] = '1'
+                data[f'{prefix(check_id)}_expiry'] = 'on'
+            self._measure('equipment_save', partial(
+                self.client.post, reverse('audit:audit_equipment', args=[audit.pk]), data,
+            ))
+            self._measure('audit_submit', partial(
+                self.client.post, reverse('audit:audit_submit', args=[audit.pk]),
+            ))
+
+        # The same audits completed offline and uploaded in one request
+        self.stdout('Running offline audit sync...')
+        for location_id in location_ids:
+            self.client.post(reverse('audit:audit_start', args=[location_id]))
+            audit = Audit.objects.filter(
+                location_id=location_id, submission_status='InProgress',
+            ).latest('started_at')
+            payload = json.dumps({
+                'documents': {
+                    'check_record_status': 'Current', 'check_guidelines_status': 'Current',
+                    'bls_poster_present': True, 'equipment_list_status': 'Current',
+                },
+                'condition': {'is_clean': True, 'is_working_order': True},
+                'checks': {'outside_check_count': 28, 'expected_outside': 28},
+                'equipment': [
+                    {'id': str(check_id), 'is_present': True, 'quantity_found': 1, 'expiry_ok': True}
+                    for check_id in AuditEquipment.objects.filter(audit=audit).values_list('pk', flat=True)
+                ],
+                'submit': True,
+            })
+            self._measure('audit_sync', partial(
+                self.client.post, reverse('audit:api_audit_sync', args=[audit.pk]), payload,
+                content_type='application/json',
+            ))
+
+        export_iterations = max(self.iterations // 10, 1)
+        for export_type in ('audits', 'issues'):
+            name = f'export_{export_type}_csv'
+            self.stdout(f'Running {name}...')
+            for _ in range(export_iterations):
+                self._measure(name, partial(
+                    get, reverse('audit:export'), {'type': export_type, 'format': 'csv'},
+                ))
+
+        return self.summary()
+
+    def summary(self):
+        results = {}
+        for name, samples in self.samples.items():
+            latencies = [latency for latency, _ in samples]
+            queries = [count for _, count in samples]
+            results[name] = {
+                'n': len(samples),
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(statistics.fmean(latencies), 2),
+                'queries_p50': percentile(queries, 50),
+                'queries_max': max(queries),
+            }
+        return results
+
+
+def hot_querysets():
+    """
+    The dashboard, list, export and SLA queries whose plans are recorded.
+
+    Returns:
+        Dict of name to queryset.
+    """
+    from audit.models import Audit, Issue, Location
+    from audit.services.exports import ExportService
+    from audit.services.issue_workflow import IssueWorkflow
+
+    location = Location.objects.order_by().first()
+    workflow = IssueWorkflow()
+    return {
+        'dashboard_active_locations': Location.objects.filter(status='Active'),
+        'dashboard_open_issues': Issue.objects.exclude(status__in=workflow.CLOSED_STATUSES),
+        'dashboard_recent_audits': (
+            Audit.objects.filter(submission_status='Submitted').order_by('-completed_at')[:10]
+        ),
+        'dashboard_recent_issues': Issue.objects.order_by('-reported_date')[:10],
+        'trolley_list': Location.objects.filter(status='Active').order_by('department_name')[:25],
+        'trolley_recent_audits': (
+            Audit.objects.filter(location=location, submission_status='Submitted')
+            .order_by('-completed_at')[:10]
+        ),
+        'audit_in_progress': Audit.objects.filter(location=location, submission_status='InProgress'),
+        'audit_list': Audit.objects.order_by('-started_at')[:25],
+        'issue_list_by_status': Issue.objects.filter(status='Open').order_by('-reported_date')[:25],
+        'export_audits': ExportService().get_queryset('audits'),
+        'sla_breached': workflow.get_breached_issues(),
+    }
+
+
+def query_plans():
+    """EXPLAIN output for each of hot_querysets(), keyed by name."""
+    return {name: qs.explain() for name, qs in hot_querysets().items()}
+
+
+def compare(baseline, current, threshold=20.0):
+    """
+    Compare two result sets.
+
+    Args:
+        baseline, current: "results" dicts as produced by BenchmarkRunner
+        threshold: Percentage p50 slowdown treated as a regression
+
+    Returns:
+        List of (scenario, baseline p50, current p50, change %, query
+        change, regressed) tuples for scenarios present in both.
+    """
+    rows = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = (
+            (now['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100
+            if before['p50_ms'] else 0.0
+        )
+        query_change = now['queries_p50'] - before['queries_p50']
+        regressed = change > threshold or query_change > 0
+        rows.append((name, before['p50_ms'], now['p50_ms'], change, query_change, regressed))
+    return rows
@@ -0,0 +1,42 @@
+"""
+Version stamps for invalidating groups of cache entries.
+
+Cached values are stored under keys that embed the current version of
+their group (e.g. 'audit:roles:v<version>:<user id>'), so bumping the
+version invalidates every entry of the group at once without knowing
+their keys; the orphaned entries simply expire.
+
+A bump only reaches the processes that share the cache it is stored in.
+With a process-local backend (the LocMem default when REDIS_URL is unset)
+every gunicorn worker keeps its own stamps, so an invalidation in one
+worker leaves the others serving stale entries. Caches that must follow
+database changes check cache_is_shared() and skip caching otherwise.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """True if the default cache (and its version stamps) is seen by every worker."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def get_version(key):
+    """Return the version stamp stored under key, creating it on first use."""
+    return cache.get_or_set(key, time.time_ns, None)
+
+
+def bump_version(key):
+    """Move key to a new version, invalidating every entry built on it."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Version key was evicted; a fresh stamp cannot collide
+        cache.set(key, time.time_ns(), None)
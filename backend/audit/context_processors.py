@@ -14,6 +14,8 @@ Usage in templates:
     {% endif %}
 """
 
+from .mixins import get_user_roles
+
 
 def user_roles(request):
     """
@@ -43,7 +45,7 @@ def user_roles(request):
             'is_viewer': False
         }
 
-    groups = set(request.user.groups.values_list('name', flat=True))
+    groups = get_user_roles(request.user)
     is_superuser = request.user.is_superuser
 
     return {
@@ -0,0 +1,181 @@
+"""
+Management command that runs the performance benchmark suite.
+
+Builds a synthetic dataset in a separate test database (the configured
+database is never touched), drives the dashboard, trolley list, audit
+wizard, report APIs and CSV exports through the test client, and reports
+p50/p99 latency and query counts per scenario as JSON. Pass --compare with
+an earlier result file to flag regressions between commits.
+
+Building the large preset (5,000 locations, 1M audits, 50M equipment
+checks) takes a long time; use --keepdb to reuse the dataset on later runs.
+
+Usage:
+    python manage.py benchmark --scale small --output bench.json
+    python manage.py benchmark --scale large --keepdb --iterations 50
+    python manage.py benchmark --compare baseline.json --fail-on-regression
+    python manage.py benchmark --scale large --keepdb --explain --output plans.json
+"""
+import json
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from audit.benchmark import (
+    SCALES,
+    BenchmarkDataset,
+    BenchmarkError,
+    BenchmarkRunner,
+    compare,
+    query_plans,
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark key views against a synthetic dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', choices=list(SCALES), default='small',
+            help='Dataset size preset (default: small)',
+        )
+        parser.add_argument('--locations', type=int, help='Override the number of locations')
+        parser.add_argument('--audits', type=int, help='Override the number of audits')
+        parser.add_argument(
+            '--equipment-per-audit', type=int, dest='equipment',
+            help='Override the number of equipment items per audit',
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Requests per scenario (default: 20)',
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Keep the benchmark database and reuse its data on the next run',
+        )
+        parser.add_argument(
+            '--explain', action='store_true',
+            help='Include EXPLAIN plans of the dashboard, list, export and SLA queries',
+        )
+        parser.add_argument('--output', help='Write the JSON results to this file')
+        parser.add_argument('--compare', help='Compare against an earlier JSON result file')
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='p50 slowdown, in percent, reported as a regression (default: 20)',
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error if any scenario regressed',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] <= 0:
+            raise CommandError('--iterations must be positive.')
+
+        baseline = None
+        if options['compare']:
+            try:
+                baseline = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f'Cannot read {options["compare"]}: {exc}') from exc
+
+        scale = dict(SCALES[options['scale']])
+        for key in ('locations', 'audits', 'equipment'):
+            if options[key] is not None:
+                scale[key] = options[key]
+
+        progress = self.stdout.write if options['verbosity'] > 1 else None
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(
+            verbosity=options['verbosity'], autoclobber=True, keepdb=options['keepdb'],
+        )
+        try:
+            user = get_user_model().objects.filter(
+                username=BenchmarkDataset.USERNAME,
+            ).first()
+            if user is None:
+                self.stdout.write(
+                    f"Building dataset: {scale['locations']} locations, "
+                    f"{scale['audits']} audits, {scale['equipment']} equipment items..."
+                )
+                user = BenchmarkDataset(stdout=progress, **scale).build()
+            else:
+                self.stdout.write('Reusing existing benchmark dataset.')
+
+            try:
+                results = BenchmarkRunner(
+                    user, iterations=options['iterations'], stdout=progress,
+                ).run()
+            except BenchmarkError as exc:
+                raise CommandError(str(exc)) from exc
+            plans = query_plans() if options['explain'] else None
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=options['verbosity'], keepdb=options['keepdb'],
+            )
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'commit': self._git_commit(),
+                'timestamp': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'scale': options['scale'],
+                'dataset': scale,
+                'iterations': options['iterations'],
+            },
+            'results': results,
+        }
+        if plans is not None:
+            report['plans'] = plans
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            self._report_comparison(baseline, report, options)
+
+    def _report_comparison(self, baseline, report, options):
+        rows = compare(baseline.get('results', {}), report['results'], options['threshold'])
+        if baseline.get('meta', {}).get('dataset') != report['meta']['dataset']:
+            self.stdout.write(self.style.WARNING(
+                'Baseline was recorded with a different dataset; timings may not be comparable.'
+            ))
+
+        width = max((len(row[0]) for row in rows), default=8)
+        self.stdout.write(
+            f"{'Scenario':<{width}}  {'Base ms':>9}  {'Now ms':>9}  {'Change':>8}  {'Queries':>7}"
+        )
+        regressions = []
+        for name, before, now, change, query_change, regressed in rows:
+            line = (
+                f'{name:<{width}}  {before:>9.2f}  {now:>9.2f}  '
+                f'{change:>+7.1f}%  {query_change:>+7d}'
+            )
+            if regressed:
+                regressions.append(name)
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"Regressions in: {', '.join(regressions)}")
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -2,9 +2,14 @@
 Management command to check issue SLA compliance and auto-escalate breaches.
 
 Intended to be run periodically (e.g., daily via cron or scheduled task).
+Breaches are found and escalated set-wise (see IssueWorkflow.escalate_breached);
+SLA warning notifications are queued after the escalation has committed, and
+are combined into per-recipient digests when NOTIFICATION_DIGEST_WINDOW is set.
 Usage: python manage.py check_sla
 """
 from django.core.management.base import BaseCommand
+from django.utils import timezone
+
 from audit.models import Issue
 from audit.services.issue_workflow import IssueWorkflow
 from audit.services.notifications import NotificationService
@@ -13,39 +18,36 @@ from audit.services.notifications import NotificationService
 class Command(BaseCommand):
     help = 'Check SLA compliance for all open issues and auto-escalate breaches'
 
+    NOTIFY_CHUNK_SIZE = 500
+
     def handle(self, *args, **options):
         workflow = IssueWorkflow()
-        notifications = NotificationService()
+        now = timezone.now()
 
-        # Get all open issues (not resolved or closed)
-        open_issues = Issue.objects.exclude(
-            status__in=['Resolved', 'Closed']
-        ).select_related('location', 'location__service_line')
-
-        escalated_count = 0
-        warned_count = 0
-
-        for issue in open_issues:
-            if workflow.is_sla_breached(issue):
-                # Try to auto-escalate
-                if workflow.check_and_auto_escalate(issue):
-                    escalated_count += 1
-                    notifications.notify_sla_warning(issue)
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Escalated: {issue.issue_number} - {issue.title} '
-                            f'(severity: {issue.severity}, escalation: {issue.escalation_level})'
-                        )
-                    )
-                else:
-                    warned_count += 1
-                    self.stdout.write(
-                        self.style.NOTICE(
-                            f'SLA breached (already escalated): {issue.issue_number}'
-                        )
-                    )
+        checked = Issue.objects.exclude(status__in=workflow.CLOSED_STATUSES).count()
+        escalated_ids, warned_count = workflow.escalate_breached(now=now)
+
+        self._notify(escalated_ids, verbose=options['verbosity'] >= 2)
 
         self.stdout.write(self.style.SUCCESS(
-            f'SLA check complete. Checked: {open_issues.count()}, '
-            f'Escalated: {escalated_count}, Warned: {warned_count}'
+            f'SLA check complete. Checked: {checked}, '
+            f'Escalated: {len(escalated_ids)}, Warned: {warned_count}'
         ))
+
+    def _notify(self, issue_ids, verbose=False):
+        """Send SLA warnings for escalated issues, loading them in chunks."""
+        if not issue_ids:
+            return
+        notifications = NotificationService()
+        for start in range(0, len(issue_ids), self.NOTIFY_CHUNK_SIZE):
+            chunk = issue_ids[start:start + self.NOTIFY_CHUNK_SIZE]
+            issues = list(Issue.objects.filter(pk__in=chunk).select_related(
+                'location', 'location__service_line',
+            ))
+            notifications.notify_sla_warnings(issues)
+            for issue in issues:
+                if verbose:
+                    self.stdout.write(self.style.WARNING(
+                        f'Escalated: {issue.issue_number} - {issue.title} '
+                        f'(severity: {issue.severity}, escalation: {issue.escalation_level})'
+                    ))
@@ -0,0 +1,21 @@
+"""
+Management command to rebuild the monthly compliance rollup table.
+
+The rollup is maintained incrementally as audits are submitted; run this
+after bulk data loads, manual score corrections or moving locations between
+service lines.
+Usage: python manage.py rebuild_compliance_rollup
+"""
+from django.core.management.base import BaseCommand
+
+from audit.services.rollup import ComplianceRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly compliance rollup from submitted audits'
+
+    def handle(self, *args, **options):
+        rows = ComplianceRollupService().rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compliance rollup rebuilt: {rows} rows.'
+        ))
@@ -0,0 +1,32 @@
+"""
+Management command to rebuild the full-text search index.
+
+The index is maintained incrementally by signal receivers; run this after
+bulk data loads or imports that bypass model saves. With --if-empty it only
+builds an index that has never been populated, which the container
+entrypoint uses on start-up.
+Usage: python manage.py rebuild_search_index [--if-empty]
+"""
+from django.core.management.base import BaseCommand
+
+from audit.models import SearchDocument
+from audit.services.search import SearchService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of trolleys, issues and equipment'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--if-empty', action='store_true',
+            help='Only build the index if it has no documents yet',
+        )
+
+    def handle(self, *args, **options):
+        if options['if_empty'] and SearchDocument.objects.exists():
+            self.stdout.write('Search index already populated.')
+            return
+        documents = SearchService().rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Search index rebuilt: {documents} documents.'
+        ))
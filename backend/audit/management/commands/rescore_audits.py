@@ -0,0 +1,184 @@
+"""
+Management command to recompute stored compliance scores for existing audits.
+
+Run after changing the ComplianceScorer weights so historical audits,
+Location.last_audit_compliance and the monthly compliance rollup reflect
+the current formula. Audits are
+streamed in keyset-paginated chunks; progress is checkpointed to a file
+so an interrupted run can be resumed.
+
+Usage:
+    python manage.py rescore_audits
+    python manage.py rescore_audits --chunk-size 5000 --workers 4
+    python manage.py rescore_audits --checkpoint rescore.json --resume
+    python manage.py rescore_audits --dry-run
+    python manage.py rescore_audits --stale-only
+    python manage.py rescore_audits --profile-version 3
+"""
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from audit.models import ScoringProfile
+from audit.services.rescoring import AuditRescorer, init_worker, rescore_chunk
+from audit.services.rollup import ComplianceRollupService
+
+
+class Command(BaseCommand):
+    help = 'Recompute compliance scores for submitted audits in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=AuditRescorer.DEFAULT_CHUNK_SIZE,
+            help=f'Audits per chunk (default: {AuditRescorer.DEFAULT_CHUNK_SIZE})',
+        )
+        parser.add_argument(
+            '--status', action='append', dest='statuses',
+            help='Submission status to rescore; repeatable (default: Submitted, Reviewed)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of worker processes (default: 1, no pool)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File to record progress in after each chunk',
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue after the last audit recorded in --checkpoint',
+        )
+        parser.add_argument(
+            '--profile-version', type=int,
+            help='Score with this ScoringProfile version (default: the active profile)',
+        )
+        parser.add_argument(
+            '--stale-only', action='store_true',
+            help='Only rescore audits scored with a different profile version',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Calculate scores and report changes without saving',
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1.')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1.')
+        if options['resume'] and not options['checkpoint']:
+            raise CommandError('--resume requires --checkpoint.')
+
+        profile = None
+        if options['profile_version'] is not None:
+            try:
+                profile = ScoringProfile.objects.get(version=options['profile_version'])
+            except ScoringProfile.DoesNotExist as e:
+                raise CommandError(
+                    f"Scoring profile version {options['profile_version']} does not exist."
+                ) from e
+
+        self.checkpoint_path = options['checkpoint']
+        self.dry_run = options['dry_run']
+        rescorer = AuditRescorer(
+            statuses=options['statuses'],
+            chunk_size=options['chunk_size'],
+            profile=profile,
+            stale_only=options['stale_only'],
+        )
+        if rescorer.profile is not None:
+            self.stdout.write(f'Scoring profile: {rescorer.profile}')
+
+        start_after = None
+        if options['resume']:
+            start_after = self._read_checkpoint()
+            if start_after:
+                self.stdout.write(f'Resuming after audit {start_after}')
+
+        self.total = rescorer.count(start_after=start_after)
+        self.scored = 0
+        self.changed = 0
+        self.started = time.monotonic()
+
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('Dry run: no scores will be saved.'))
+        self.stdout.write(f'Rescoring {self.total} audits...')
+
+        chunks = rescorer.iter_id_chunks(start_after=start_after)
+        if options['workers'] > 1:
+            self._run_parallel(chunks, rescorer, options['workers'])
+        else:
+            for ids in chunks:
+                self._record(ids, rescorer.rescore_ids(ids, dry_run=self.dry_run))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rescoring complete. Scored: {self.scored}, '
+            f'{"Would change" if self.dry_run else "Changed"}: {self.changed}'
+        ))
+
+        # A resumed run may follow chunks changed before the interruption
+        if not self.dry_run and (self.changed or start_after):
+            rows = ComplianceRollupService().rebuild()
+            self.stdout.write(f'Rebuilt compliance rollup ({rows} rows).')
+
+    def _run_parallel(self, chunks, rescorer, workers):
+        """Score chunks in a process pool, checkpointing in submission order."""
+        context = multiprocessing.get_context('spawn')
+        profile_id = getattr(rescorer.profile, 'pk', None)
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=init_worker,
+        ) as pool:
+            for ids in chunks:
+                pending.append((ids, pool.submit(
+                    rescore_chunk, ids, rescorer.statuses, profile_id, self.dry_run,
+                )))
+                # Bound the number of in-flight chunks
+                while len(pending) >= workers * 2:
+                    done_ids, future = pending.popleft()
+                    self._record(done_ids, future.result())
+            while pending:
+                done_ids, future = pending.popleft()
+                self._record(done_ids, future.result())
+
+    def _record(self, ids, result):
+        """Update counters, print progress and write the checkpoint."""
+        scored, changed = result
+        self.scored += scored
+        self.changed += changed
+
+        elapsed = time.monotonic() - self.started
+        rate = self.scored / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            f'  {self.scored}/{self.total} scored, {self.changed} changed '
+            f'({rate:.0f} audits/s)'
+        )
+        self._write_checkpoint(ids[-1])
+
+    def _read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f).get('last_pk')
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read checkpoint {self.checkpoint_path}: {e}') from e
+
+    def _write_checkpoint(self, last_pk):
+        if not self.checkpoint_path or self.dry_run:
+            return
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'last_pk': str(last_pk),
+                'scored': self.scored,
+                'changed': self.changed,
+                'updated_at': timezone.now().isoformat(),
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
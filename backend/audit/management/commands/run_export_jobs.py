@@ -0,0 +1,82 @@
+"""
+Management command that builds queued export files in the background.
+
+Runs as a long-lived worker alongside the web process (no message broker
+needed): polls the ExportJob table, builds each pending export into media
+storage, re-queues jobs abandoned by a dead worker and purges expired
+artifacts.
+
+Usage:
+    python manage.py run_export_jobs
+    python manage.py run_export_jobs --poll-interval 10
+    python manage.py run_export_jobs --once
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from audit.services.export_jobs import ExportJobService
+
+
+class Command(BaseCommand):
+    help = 'Build queued data exports (runs until interrupted)'
+
+    PURGE_INTERVAL = 60 * 60  # seconds
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=5,
+            help='Seconds to wait when the queue is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the current queue once and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be positive.')
+
+        service = ExportJobService()
+        last_purge = None
+
+        if not options['once']:
+            self.stdout.write('Export worker started.')
+
+        while True:
+            close_old_connections()
+
+            requeued = service.requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(
+                    f'Re-queued {requeued} abandoned export jobs.'
+                ))
+
+            if last_purge is None or time.monotonic() - last_purge >= self.PURGE_INTERVAL:
+                purged = service.purge_expired()
+                if purged:
+                    self.stdout.write(f'Purged {purged} expired exports.')
+                last_purge = time.monotonic()
+
+            processed = 0
+            while True:
+                job = service.claim_next()
+                if job is None:
+                    break
+                job = service.run_job(job)
+                processed += 1
+                if job.status == 'Completed':
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Export {job.pk} completed ({job.rows_written} rows).'
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(
+                        f'Export {job.pk} failed: {job.error}'
+                    ))
+
+            if options['once']:
+                self.stdout.write(f'Processed {processed} export jobs.')
+                return
+            if not processed:
+                time.sleep(options['poll_interval'])
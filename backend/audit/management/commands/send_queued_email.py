@@ -0,0 +1,92 @@
+"""
+Management command that delivers queued notification emails.
+
+Runs as a long-lived worker alongside the web process: queues notification
+digests that are due (see NotificationService.flush_digests), polls the
+OutboundEmail table, sends due emails through Power Automate or SMTP,
+schedules retries with exponential backoff, dead-letters emails that keep
+failing and purges delivered rows after EMAIL_QUEUE_RETENTION_DAYS.
+
+Usage:
+    python manage.py send_queued_email
+    python manage.py send_queued_email --poll-interval 10 --batch-size 20
+    python manage.py send_queued_email --once
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from audit.services.email_queue import EmailQueue
+from audit.services.notifications import NotificationService
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notification emails (runs until interrupted)'
+
+    PURGE_INTERVAL = 60 * 60  # seconds
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=5,
+            help='Seconds to wait when no email is due (default: 5)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=EmailQueue.DEFAULT_BATCH_SIZE,
+            help=f'Emails claimed per batch (default: {EmailQueue.DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Deliver the emails currently due and exit',
+        )
+
+    def handle(self, *args, **options):
+        if options['poll_interval'] <= 0:
+            raise CommandError('--poll-interval must be positive.')
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+
+        queue = EmailQueue()
+        notifications = NotificationService()
+        retention_days = getattr(settings, 'EMAIL_QUEUE_RETENTION_DAYS', 30)
+        last_purge = None
+
+        if not options['once']:
+            self.stdout.write('Mail worker started.')
+
+        while True:
+            close_old_connections()
+
+            requeued = queue.requeue_stale()
+            if requeued:
+                self.stdout.write(self.style.WARNING(
+                    f'Re-queued {requeued} abandoned emails.'
+                ))
+
+            if last_purge is None or time.monotonic() - last_purge >= self.PURGE_INTERVAL:
+                purged = queue.purge_sent(retention_days)
+                if purged:
+                    self.stdout.write(f'Purged {purged} delivered emails.')
+                last_purge = time.monotonic()
+
+            digests = notifications.flush_digests()
+            if digests:
+                self.stdout.write(f'Queued {digests} notification digests.')
+
+            sent = failed = 0
+            while True:
+                batch_sent, batch_failed = queue.process_batch(options['batch_size'])
+                if not batch_sent and not batch_failed:
+                    break
+                sent += batch_sent
+                failed += batch_failed
+
+            if sent or failed or options['once']:
+                style = self.style.WARNING if failed else self.style.SUCCESS
+                self.stdout.write(style(f'Sent: {sent}, Failed: {failed}'))
+
+            if options['once']:
+                return
+            if not sent and not failed:
+                time.sleep(options['poll_interval'])
@@ -0,0 +1,63 @@
+"""
+Management command that prints the per-view request metrics report.
+
+Shows the views with the most queries per request (or the slowest, etc.)
+as recorded by RequestMetricsMiddleware across all worker processes.
+
+Usage:
+    python manage.py view_metrics
+    python manage.py view_metrics --top 10 --sort time
+    python manage.py view_metrics --reset
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.services.request_metrics import RequestMetrics
+
+
+class Command(BaseCommand):
+    help = 'Print the top views by query count or latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=20,
+            help='Number of views to show (default: 20)',
+        )
+        parser.add_argument(
+            '--sort', choices=list(RequestMetrics.SORT_KEYS), default='queries',
+            help='Order by: average queries (default), total DB time, average '
+                 'time, total time, requests or average response size',
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Delete all recorded metrics',
+        )
+
+    def handle(self, *args, **options):
+        metrics = RequestMetrics()
+
+        if options['reset']:
+            deleted = metrics.reset()
+            self.stdout.write(self.style.SUCCESS(f'Deleted metrics for {deleted} views.'))
+            return
+
+        if options['top'] <= 0:
+            raise CommandError('--top must be positive.')
+
+        rows = metrics.report(sort=options['sort'], limit=options['top'])
+        if not rows:
+            self.stdout.write('No request metrics recorded yet.')
+            return
+
+        width = max(len(row['view']) for row in rows)
+        self.stdout.write(
+            f"{'View':<{width}}  {'Reqs':>7}  {'Avg Q':>6}  {'Max Q':>6}  "
+            f"{'DB ms':>8}  {'Tmpl ms':>8}  {'Avg ms':>8}  {'Max ms':>8}  {'Avg KB':>7}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['view']:<{width}}  {row['requests']:>7}  "
+                f"{row['avg_queries']:>6.1f}  {row['max_queries']:>6}  "
+                f"{row['avg_db_time_ms']:>8.1f}  {row['avg_template_time_ms']:>8.1f}  "
+                f"{row['avg_time_ms']:>8.1f}  {row['max_time_ms']:>8.1f}  "
+                f"{row['avg_response_bytes'] / 1024:>7.1f}"
+            )
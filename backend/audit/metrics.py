@@ -0,0 +1,146 @@
+"""
+Prometheus metrics for the REdI Trolley Audit System.
+
+Counters and histograms are updated in-process where events happen:
+
+- redi_request_duration_seconds: request latency by view (middleware)
+- redi_audits_started_total / redi_audits_submitted_total
+- redi_issues_created_total: by severity (Issue post_save signal)
+- redi_issue_transitions_total: by target status (IssueWorkflow)
+- redi_emails_total: delivery attempts by backend and outcome
+
+Gauges describing current state (open issues by status, SLA breaches,
+outbound email queue depth) are read from the database when the endpoint is
+scraped, so every worker reports the same values.
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR so each process writes its
+samples to files the endpoint aggregates; without it the default
+single-process registry is used. In Docker every service that updates a
+metric (web, mailer, cron, exports) writes to its own subdirectory of a
+shared volume, emptied when that service starts (docker/reset-metrics.sh),
+and METRICS_MULTIPROC_ROOT points the endpoint at the volume so it sums all
+of them. Containers have separate PID namespaces, so services must not share
+one directory: their per-PID files would collide.
+"""
+import glob
+import os
+
+from django.conf import settings
+from django.db.models import Count
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY
+
+REQUEST_LATENCY = Histogram(
+    'redi_request_duration_seconds',
+    'Time spent handling a request, by URL name.',
+    ['view', 'method'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+AUDITS_STARTED = Counter(
+    'redi_audits_started_total',
+    'Audits started.',
+)
+AUDITS_SUBMITTED = Counter(
+    'redi_audits_submitted_total',
+    'Audits submitted.',
+)
+ISSUES_CREATED = Counter(
+    'redi_issues_created_total',
+    'Issues created, by severity.',
+    ['severity'],
+)
+ISSUE_TRANSITIONS = Counter(
+    'redi_issue_transitions_total',
+    'Issue status transitions, by target status.',
+    ['to_status'],
+)
+EMAILS = Counter(
+    'redi_emails_total',
+    'Email delivery attempts, by backend and outcome.',
+    ['backend', 'outcome'],
+)
+
+
+class DatabaseStateCollector:
+    """Gauges computed from the database at scrape time."""
+
+    def collect(self):
+        from audit.models import Issue, OutboundEmail
+        from audit.services.issue_workflow import IssueWorkflow
+
+        open_issues = GaugeMetricFamily(
+            'redi_open_issues',
+            'Issues not yet resolved or closed, by status.',
+            labels=['status'],
+        )
+        counts = dict(
+            Issue.objects.exclude(status__in=IssueWorkflow.CLOSED_STATUSES)
+            .values_list('status')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        for status in IssueWorkflow.TRANSITIONS:
+            if status not in IssueWorkflow.CLOSED_STATUSES:
+                open_issues.add_metric([status], counts.get(status, 0))
+        yield open_issues
+
+        yield GaugeMetricFamily(
+            'redi_sla_breached_issues',
+            'Open issues past their SLA target.',
+            value=IssueWorkflow().get_breached_issues().count(),
+        )
+
+        queue = GaugeMetricFamily(
+            'redi_outbound_emails',
+            'Outbound email queue rows, by status.',
+            labels=['status'],
+        )
+        counts = dict(
+            OutboundEmail.objects.values_list('status')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        for status, _ in OutboundEmail.STATUS_CHOICES:
+            queue.add_metric([status], counts.get(status, 0))
+        yield queue
+
+
+class ServiceDirectoriesCollector:
+    """Multiprocess samples from every service subdirectory of root."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def collect(self):
+        files = glob.glob(os.path.join(self.root, '*', '*.db'))
+        return multiprocess.MultiProcessCollector.merge(files, accumulate=True)
+
+
+def render_metrics():
+    """
+    Render every metric in the text exposition format.
+
+    Returns:
+        (body, content_type) tuple.
+    """
+    root = getattr(settings, 'METRICS_MULTIPROC_ROOT', '')
+    if root:
+        registry = CollectorRegistry()
+        registry.register(ServiceDirectoriesCollector(root))
+    elif os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    state = CollectorRegistry()
+    state.register(DatabaseStateCollector())
+    return generate_latest(registry) + generate_latest(state), CONTENT_TYPE_LATEST
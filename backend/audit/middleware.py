@@ -0,0 +1,116 @@
+"""
+Request instrumentation middleware for the REdI Trolley Audit System.
+
+RequestMetricsMiddleware measures every request that resolves to a named
+URL and reports it to RequestMetrics (see services/request_metrics.py):
+
+- number of database queries and time spent in them, counted with a
+  connection execute_wrapper (works with DEBUG off)
+- time spent rendering the TemplateResponse
+- total time in the view stack and response size
+
+Streaming responses (the CSV and XLSX exports) produce their body after the
+view returns, so they are recorded once the body has been sent: queries made
+while streaming are counted, and the size is the number of bytes streamed.
+
+Latency is also observed in the Prometheus request histogram (see
+audit/metrics.py).
+
+Measurements are summed in memory and written out periodically, so the
+per-request cost is a few clock reads. Set REQUEST_METRICS_ENABLED=False
+to remove the middleware entirely.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import REQUEST_LATENCY
+from .services.request_metrics import RequestMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class _QueryTimer:
+    """execute_wrapper that counts queries and their total duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Record query count, DB time, render time and size per URL name."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.metrics = RequestMetrics()
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+        if response.streaming and not response.is_async:
+            # The body is produced after we return; measure it as it is sent
+            response.streaming_content = self._measure_stream(
+                request, response.streaming_content, timer, start,
+            )
+        else:
+            size = 0 if response.streaming else len(response.content)
+            self._record(request, timer, time.perf_counter() - start, size)
+        return response
+
+    def _measure_stream(self, request, content, timer, start):
+        """Pass a streaming body through, recording the request when it ends."""
+        size = 0
+        try:
+            with connection.execute_wrapper(timer):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            # Runs when the body is exhausted or the response is closed
+            self._record(request, timer, time.perf_counter() - start, size)
+
+    def _record(self, request, timer, total, size):
+        view_name = request.resolver_match.view_name
+        self.metrics.record(
+            url_name=view_name,
+            queries=timer.count,
+            db_time_ms=timer.elapsed * 1000,
+            template_time_ms=getattr(request, '_metrics_render_time', 0) * 1000,
+            total_time_ms=total * 1000,
+            response_bytes=size,
+        )
+        REQUEST_LATENCY.labels(view_name, request.method).observe(total)
+        if self.metrics.flush_due():
+            try:
+                self.metrics.flush()
+            except Exception:
+                logger.warning('Failed to flush request metrics', exc_info=True)
+
+    def process_template_response(self, request, response):
+        render_start = time.perf_counter()
+
+        def rendered(response):
+            request._metrics_render_time = time.perf_counter() - render_start
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:11
+
+import uuid
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_default_profile(apps, schema_editor):
+    """Record the weights in use until now as version 1 and attach scored audits."""
+    ScoringProfile = apps.get_model('audit', 'ScoringProfile')
+    Audit = apps.get_model('audit', 'Audit')
+    profile = ScoringProfile.objects.create(
+        version=1,
+        name='Default',
+        documentation_weight=Decimal('0.25'),
+        equipment_weight=Decimal('0.40'),
+        condition_weight=Decimal('0.15'),
+        check_weight=Decimal('0.20'),
+        critical_weight=Decimal('0.60'),
+        non_critical_weight=Decimal('0.40'),
+        is_active=True,
+        created_by='System (migration)',
+    )
+    Audit.objects.filter(overall_compliance__isnull=False).update(
+        scoring_profile=profile,
+    )
+
+
+def remove_default_profile(apps, schema_editor):
+    ScoringProfile = apps.get_model('audit', 'ScoringProfile')
+    Audit = apps.get_model('audit', 'Audit')
+    Audit.objects.filter(scoring_profile__version=1).update(scoring_profile=None)
+    ScoringProfile.objects.filter(version=1).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoringProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('version', models.PositiveIntegerField(editable=False, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('documentation_weight', models.DecimalField(decimal_places=4, default=Decimal('0.25'), max_digits=5)),
+                ('equipment_weight', models.DecimalField(decimal_places=4, default=Decimal('0.40'), max_digits=5)),
+                ('condition_weight', models.DecimalField(decimal_places=4, default=Decimal('0.15'), max_digits=5)),
+                ('check_weight', models.DecimalField(decimal_places=4, default=Decimal('0.20'), max_digits=5)),
+                ('critical_weight', models.DecimalField(decimal_places=4, default=Decimal('0.60'), max_digits=5)),
+                ('non_critical_weight', models.DecimalField(decimal_places=4, default=Decimal('0.40'), max_digits=5)),
+                ('is_active', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True)),
+                ('created_by', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Scoring Profile',
+                'verbose_name_plural': 'Scoring Profiles',
+                'ordering': ['-version'],
+            },
+        ),
+        migrations.AddField(
+            model_name='audit',
+            name='scoring_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='audits', to='audit.scoringprofile'),
+        ),
+        migrations.RunPython(create_default_profile, remove_default_profile),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:15
+
+import uuid
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_rollup(apps, schema_editor):
+    """Build rollup rows for audits submitted before the table existed."""
+    from django.db.models import Count, DateField, Sum
+    from django.db.models.functions import TruncMonth
+
+    Audit = apps.get_model('audit', 'Audit')
+    ComplianceRollup = apps.get_model('audit', 'ComplianceRollup')
+
+    groups = (
+        Audit.objects.filter(
+            submission_status='Submitted',
+            completed_at__isnull=False,
+        )
+        .annotate(month=TruncMonth('completed_at', output_field=DateField()))
+        .values('month', 'location_id', 'location__service_line_id')
+        .annotate(
+            audit_count=Count('id'),
+            scored_count=Count('overall_compliance'),
+            compliance_total=Sum('overall_compliance'),
+        )
+        .order_by()
+    )
+    ComplianceRollup.objects.bulk_create([
+        ComplianceRollup(
+            month=group['month'],
+            location_id=group['location_id'],
+            service_line_id=group['location__service_line_id'],
+            audit_count=group['audit_count'],
+            scored_count=group['scored_count'],
+            compliance_total=group['compliance_total'] or Decimal('0'),
+        )
+        for group in groups
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_scoringprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComplianceRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('month', models.DateField(help_text='First day of the month (local time)')),
+                ('audit_count', models.PositiveIntegerField(default=0)),
+                ('scored_count', models.PositiveIntegerField(default=0)),
+                ('compliance_total', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_rollups', to='audit.location')),
+                ('service_line', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='compliance_rollups', to='audit.serviceline')),
+            ],
+            options={
+                'verbose_name': 'Compliance Rollup',
+                'verbose_name_plural': 'Compliance Rollups',
+                'ordering': ['month', 'location'],
+                'indexes': [models.Index(fields=['month', 'service_line'], name='audit_compl_month_a4ae14_idx')],
+                'unique_together': {('month', 'location')},
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:32
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('SLA Warning', 'SLA Warning'), ('Critical Issue', 'Critical Issue')], max_length=20)),
+                ('recipient', models.EmailField(max_length=254)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('digested_at', models.DateTimeField(blank=True, null=True)),
+                ('digest', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='covered_notifications', to='audit.outboundemail')),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notifications', to='audit.issue')),
+            ],
+            options={
+                'verbose_name': 'Pending Notification',
+                'verbose_name_plural': 'Pending Notifications',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['digested_at', 'recipient'], name='audit_pendi_digeste_d75a8a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0006_pendingnotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ViewMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url_name', models.CharField(max_length=200, unique=True)),
+                ('requests', models.PositiveBigIntegerField(default=0)),
+                ('query_count', models.PositiveBigIntegerField(default=0)),
+                ('max_queries', models.PositiveIntegerField(default=0)),
+                ('db_time_ms', models.FloatField(default=0)),
+                ('template_time_ms', models.FloatField(default=0)),
+                ('total_time_ms', models.FloatField(default=0)),
+                ('max_time_ms', models.FloatField(default=0)),
+                ('response_bytes', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'View Metric',
+                'verbose_name_plural': 'View Metrics',
+                'ordering': ['url_name'],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0007_viewmetric'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(fields=['-started_at'], name='audit_audit_started_fdfc18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(condition=models.Q(('submission_status', 'Submitted')), fields=['-completed_at'], name='audit_submitted_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(condition=models.Q(('submission_status', 'Submitted')), fields=['location', '-completed_at'], name='audit_submitted_loc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='audit',
+            index=models.Index(condition=models.Q(('submission_status', 'InProgress')), fields=['location'], name='audit_in_progress_loc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['-reported_date'], name='audit_issue_reporte_355457_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['status', '-reported_date'], name='audit_issue_status_d17462_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['severity', 'status'], name='audit_issue_severit_4b8d0a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(condition=models.Q(('status__in', ['Resolved', 'Closed']), _negated=True), fields=['severity', 'reported_date'], name='audit_issue_open_sla_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['status', 'department_name'], name='audit_locat_status_9def31_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='randomauditselectionitem',
+            index=models.Index(fields=['location', 'audit_status'], name='audit_rando_locatio_aa37e3_idx'),
+        ),
+    ]
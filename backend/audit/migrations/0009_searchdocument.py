@@ -0,0 +1,96 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:54
+
+from django.db import migrations, models
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE audit_searchdocument ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX audit_searchdocument_vector_idx ON audit_searchdocument USING GIN (search_vector)',
+]
+POSTGRESQL_REVERSE = [
+    'DROP INDEX IF EXISTS audit_searchdocument_vector_idx',
+    'ALTER TABLE audit_searchdocument DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE audit_searchdocument_fts USING fts5(
+        title, body,
+        content='audit_searchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER audit_searchdocument_fts_insert AFTER INSERT ON audit_searchdocument BEGIN
+        INSERT INTO audit_searchdocument_fts (rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER audit_searchdocument_fts_delete AFTER DELETE ON audit_searchdocument BEGIN
+        INSERT INTO audit_searchdocument_fts (audit_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER audit_searchdocument_fts_update AFTER UPDATE ON audit_searchdocument BEGIN
+        INSERT INTO audit_searchdocument_fts (audit_searchdocument_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO audit_searchdocument_fts (rowid, title, body)
+        VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+SQLITE_REVERSE = [
+    'DROP TRIGGER IF EXISTS audit_searchdocument_fts_update',
+    'DROP TRIGGER IF EXISTS audit_searchdocument_fts_delete',
+    'DROP TRIGGER IF EXISTS audit_searchdocument_fts_insert',
+    'DROP TABLE IF EXISTS audit_searchdocument_fts',
+]
+
+
+def create_fulltext_index(apps, schema_editor):
+    """Add the backend's full-text index; other backends search with LIKE."""
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'postgresql': POSTGRESQL_REVERSE, 'sqlite': SQLITE_REVERSE}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0008_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('location', 'Location'), ('issue', 'Issue'), ('equipment', 'Equipment')], max_length=20)),
+                ('object_id', models.UUIDField()),
+                ('title', models.CharField(max_length=400)),
+                ('body', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
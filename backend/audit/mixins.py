@@ -9,9 +9,62 @@ Usage:
         def get(self, request):
             # Only System Admin or MERT Educator can access this
             ...
-"""
 
+A user's roles are resolved by get_user_roles(), which the mixins, the
+user_roles context processor and views all share. The role set is memoised
+on the request's user object, so a page queries the user's groups at most
+once. When the default cache is shared between worker processes (Redis),
+role sets are also cached per user between requests; the signal receivers
+in audit/signals.py invalidate them when group membership changes. With a
+process-local cache that invalidation would only reach one worker, so a
+revoked role could keep granting access elsewhere; roles are then read
+from the database on every request.
+"""
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.cache import cache
+
+from .cache_versions import bump_version, cache_is_shared, get_version
+
+ROLE_CACHE_PREFIX = 'audit:roles'
+ROLE_VERSION_KEY = 'audit:roles:version'
+DEFAULT_ROLE_CACHE_TIMEOUT = 300  # seconds
+
+
+def get_user_roles(user):
+    """
+    Return the set of role (group) names a user belongs to.
+
+    Args:
+        user: A User (or request.user, including AnonymousUser)
+
+    Returns:
+        frozenset of group names; empty for anonymous users
+    """
+    if not user.is_authenticated:
+        return frozenset()
+
+    roles = getattr(user, '_role_names', None)
+    if roles is None:
+        if not cache_is_shared():
+            roles = frozenset(user.groups.values_list('name', flat=True))
+        else:
+            version = get_version(ROLE_VERSION_KEY)
+            key = f'{ROLE_CACHE_PREFIX}:v{version}:{user.pk}'
+            roles = cache.get(key)
+            if roles is None:
+                roles = frozenset(user.groups.values_list('name', flat=True))
+                cache.set(
+                    key, roles,
+                    getattr(settings, 'ROLE_CACHE_TIMEOUT', DEFAULT_ROLE_CACHE_TIMEOUT),
+                )
+        user._role_names = roles
+    return roles
+
+
+def invalidate_user_roles():
+    """Drop every cached role set (group membership changed)."""
+    bump_version(ROLE_VERSION_KEY)
 
 
 class RoleRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -31,8 +84,7 @@ class RoleRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
         """Check if user is superuser or member of required roles."""
         if self.request.user.is_superuser:
             return True
-        user_groups = set(self.request.user.groups.values_list('name', flat=True))
-        return bool(user_groups.intersection(set(self.required_roles)))
+        return bool(get_user_roles(self.request.user).intersection(self.required_roles))
 
 
 class AdminRequiredMixin(RoleRequiredMixin):
@@ -1,15 +1,21 @@
 """
 Models for the REdI (Resuscitation Education Initiative) Trolley Audit System.
 
-Royal Brisbane and Women's Hospital - 17 Django models covering:
+Royal Brisbane and Women's Hospital - 24 Django models covering:
 - Reference data (ServiceLine, EquipmentCategory, Equipment)
 - Location management (Location, LocationEquipment, LocationChangeLog)
 - Audit workflow (AuditPeriod, Audit, AuditDocuments, AuditCondition, AuditChecks, AuditEquipment)
 - Issue tracking (Issue, CorrectiveAction, IssueComment)
 - Random selection (RandomAuditSelection, RandomAuditSelectionItem)
+- Scoring configuration (ScoringProfile)
+- Reporting (ComplianceRollup, ExportJob)
+- Notifications (OutboundEmail, PendingNotification)
+- Monitoring (ViewMetric)
+- Search (SearchDocument)
 """
 
 import uuid
+from decimal import Decimal
 
 from django.conf import settings
 from django.db import models, transaction, IntegrityError
@@ -189,6 +195,9 @@ class Location(models.Model):
 
     class Meta:
         ordering = ['department_name']
+        indexes = [
+            models.Index(fields=['status', 'department_name']),
+        ]
         verbose_name = 'Location'
         verbose_name_plural = 'Locations'
 
@@ -404,6 +413,13 @@ class Audit(models.Model):
     check_score = models.DecimalField(
         max_digits=5, decimal_places=2, null=True, blank=True,
     )
+    scoring_profile = models.ForeignKey(
+        'ScoringProfile',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='audits',
+    )
     requires_follow_up = models.BooleanField(default=False)
     follow_up_due_date = models.DateField(null=True, blank=True)
     notes = models.TextField(blank=True)
@@ -412,6 +428,26 @@ class Audit(models.Model):
 
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['-started_at']),
+            # Recent submitted audits, overall and per trolley
+            models.Index(
+                fields=['-completed_at'],
+                condition=models.Q(submission_status='Submitted'),
+                name='audit_submitted_recent_idx',
+            ),
+            models.Index(
+                fields=['location', '-completed_at'],
+                condition=models.Q(submission_status='Submitted'),
+                name='audit_submitted_loc_idx',
+            ),
+            # Duplicate in-progress check when starting an audit
+            models.Index(
+                fields=['location'],
+                condition=models.Q(submission_status='InProgress'),
+                name='audit_in_progress_loc_idx',
+            ),
+        ]
         verbose_name = 'Audit'
         verbose_name_plural = 'Audits'
 
@@ -676,6 +712,17 @@ class Issue(models.Model):
 
     class Meta:
         ordering = ['-reported_date']
+        indexes = [
+            models.Index(fields=['-reported_date']),
+            models.Index(fields=['status', '-reported_date']),
+            models.Index(fields=['severity', 'status']),
+            # SLA checks: open issues by severity and age
+            models.Index(
+                fields=['severity', 'reported_date'],
+                condition=~models.Q(status__in=['Resolved', 'Closed']),
+                name='audit_issue_open_sla_idx',
+            ),
+        ]
         verbose_name = 'Issue'
         verbose_name_plural = 'Issues'
 
@@ -869,8 +916,424 @@ class RandomAuditSelectionItem(models.Model):
     class Meta:
         ordering = ['selection_rank']
         unique_together = ['selection', 'location']
+        indexes = [
+            models.Index(fields=['location', 'audit_status']),
+        ]
         verbose_name = 'Random Audit Selection Item'
         verbose_name_plural = 'Random Audit Selection Items'
 
     def __str__(self):
         return f"Rank {self.selection_rank}: {self.location}"
+
+
+# ===========================================================================
+# 18. ScoringProfile
+# ===========================================================================
+
+class ScoringProfile(models.Model):
+    """
+    A versioned set of compliance scoring weights.
+
+    Exactly one profile is active at a time; ComplianceScorer uses it and
+    records it on every audit it scores. Weights of a profile that has
+    scored audits should not be edited - create a new version instead.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    version = models.PositiveIntegerField(unique=True, editable=False)
+    name = models.CharField(max_length=200)
+    documentation_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.25'),
+    )
+    equipment_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.40'),
+    )
+    condition_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.15'),
+    )
+    check_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.20'),
+    )
+    critical_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.60'),
+    )
+    non_critical_weight = models.DecimalField(
+        max_digits=5, decimal_places=4, default=Decimal('0.40'),
+    )
+    is_active = models.BooleanField(default=False)
+    notes = models.TextField(blank=True)
+    created_by = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-version']
+        verbose_name = 'Scoring Profile'
+        verbose_name_plural = 'Scoring Profiles'
+
+    def __str__(self):
+        return f"v{self.version} - {self.name}"
+
+    def clean(self):
+        from django.core.exceptions import ValidationError
+
+        errors = {}
+        component_total = (
+            self.documentation_weight + self.equipment_weight
+            + self.condition_weight + self.check_weight
+        )
+        if component_total != Decimal('1'):
+            errors['documentation_weight'] = (
+                f'Component weights must add up to 1 (currently {component_total}).'
+            )
+        equipment_total = self.critical_weight + self.non_critical_weight
+        if equipment_total != Decimal('1'):
+            errors['critical_weight'] = (
+                f'Critical and non-critical weights must add up to 1 (currently {equipment_total}).'
+            )
+        if errors:
+            raise ValidationError(errors)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if not self.version:
+                last = (
+                    ScoringProfile.objects.select_for_update()
+                    .order_by('-version')
+                    .first()
+                )
+                self.version = (last.version + 1) if last else 1
+            if self.is_active:
+                ScoringProfile.objects.filter(is_active=True).exclude(
+                    pk=self.pk,
+                ).update(is_active=False)
+            super().save(*args, **kwargs)
+
+
+# ===========================================================================
+# 19. ComplianceRollup
+# ===========================================================================
+
+class ComplianceRollup(models.Model):
+    """
+    Materialised monthly compliance totals per location.
+
+    One row per (month, location), maintained incrementally as audits are
+    submitted or deleted and rebuilt in full by the rebuild_compliance_rollup
+    command. The service line is denormalised so reports can group without
+    joining through Location; rows follow a location that moves to another
+    service line. Averages are compliance_total / scored_count.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    month = models.DateField(help_text='First day of the month (local time)')
+    service_line = models.ForeignKey(
+        ServiceLine,
+        on_delete=models.CASCADE,
+        related_name='compliance_rollups',
+    )
+    location = models.ForeignKey(
+        Location,
+        on_delete=models.CASCADE,
+        related_name='compliance_rollups',
+    )
+    audit_count = models.PositiveIntegerField(default=0)
+    scored_count = models.PositiveIntegerField(default=0)
+    compliance_total = models.DecimalField(
+        max_digits=14, decimal_places=2, default=Decimal('0'),
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['month', 'location']
+        unique_together = ['month', 'location']
+        indexes = [
+            models.Index(fields=['month', 'service_line']),
+        ]
+        verbose_name = 'Compliance Rollup'
+        verbose_name_plural = 'Compliance Rollups'
+
+    def __str__(self):
+        return f"{self.location} - {self.month:%b %Y}"
+
+    @property
+    def avg_compliance(self):
+        if not self.scored_count:
+            return None
+        return self.compliance_total / self.scored_count
+
+
+# ===========================================================================
+# 20. ExportJob
+# ===========================================================================
+
+class ExportJob(models.Model):
+    """
+    A data export built in the background by the run_export_jobs worker.
+
+    Requests with the same parameters share a params_hash so a pending job
+    or a recent artifact can be reused instead of building the file again.
+    """
+
+    EXPORT_TYPE_CHOICES = [
+        ('audits', 'Audits'),
+        ('issues', 'Issues'),
+        ('locations', 'Locations'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel'),
+    ]
+
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Running', 'Running'),
+        ('Completed', 'Completed'),
+        ('Failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    export_type = models.CharField(max_length=20, choices=EXPORT_TYPE_CHOICES)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    params_hash = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='Pending',
+    )
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+
+    def __str__(self):
+        return f"{self.get_export_type_display()} ({self.export_format}) - {self.status}"
+
+    @property
+    def progress(self):
+        """Percentage of rows written, or None while the total is unknown."""
+        if self.status == 'Completed':
+            return 100
+        if not self.total_rows:
+            return None
+        return min(100, int(self.rows_written * 100 / self.total_rows))
+
+    @property
+    def filename(self):
+        return f"redi_{self.export_type}_{timezone.localdate(self.created_at)}.{self.export_format}"
+
+
+# ===========================================================================
+# 21. OutboundEmail
+# ===========================================================================
+
+class OutboundEmail(models.Model):
+    """
+    A queued notification email.
+
+    NotificationService writes rows in the caller's transaction and the
+    send_queued_email worker delivers them, retrying failures with
+    exponential backoff until the attempt limit moves them to Dead.
+    """
+
+    IMPORTANCE_CHOICES = [
+        ('Low', 'Low'),
+        ('Normal', 'Normal'),
+        ('High', 'High'),
+    ]
+
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to = models.TextField(help_text='Semicolon-separated recipient addresses')
+    subject = models.CharField(max_length=500)
+    body = models.TextField()
+    importance = models.CharField(
+        max_length=10,
+        choices=IMPORTANCE_CHOICES,
+        default='Normal',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default='Queued',
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True, editable=False)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to} ({self.status})"
+
+
+# ===========================================================================
+# 22. PendingNotification
+# ===========================================================================
+
+class PendingNotification(models.Model):
+    """
+    An issue notification waiting to be rolled into a recipient's digest.
+
+    When digest mode is on, SLA warnings (and critical-issue alerts, if
+    opted in) are recorded here per recipient instead of being emailed one
+    by one. Once
+    a recipient's oldest pending row is older than the digest window, all of
+    their rows are sent as one summary email and linked to it.
+    """
+
+    KIND_CHOICES = [
+        ('SLA Warning', 'SLA Warning'),
+        ('Critical Issue', 'Critical Issue'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    recipient = models.EmailField()
+    issue = models.ForeignKey(
+        Issue,
+        on_delete=models.CASCADE,
+        related_name='pending_notifications',
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    digested_at = models.DateTimeField(null=True, blank=True)
+    digest = models.ForeignKey(
+        OutboundEmail,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='covered_notifications',
+    )
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['digested_at', 'recipient']),
+        ]
+        verbose_name = 'Pending Notification'
+        verbose_name_plural = 'Pending Notifications'
+
+    def __str__(self):
+        return f"{self.kind}: {self.issue_id} -> {self.recipient}"
+
+
+# ===========================================================================
+# 23. ViewMetric
+# ===========================================================================
+
+class ViewMetric(models.Model):
+    """
+    Cumulative request instrumentation for one URL name.
+
+    RequestMetricsMiddleware aggregates per-request query counts and timings
+    in memory and periodically adds them here, so the totals cover every
+    worker process. Averages are totals / requests.
+    """
+
+    url_name = models.CharField(max_length=200, unique=True)
+    requests = models.PositiveBigIntegerField(default=0)
+    query_count = models.PositiveBigIntegerField(default=0)
+    max_queries = models.PositiveIntegerField(default=0)
+    db_time_ms = models.FloatField(default=0)
+    template_time_ms = models.FloatField(default=0)
+    total_time_ms = models.FloatField(default=0)
+    max_time_ms = models.FloatField(default=0)
+    response_bytes = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['url_name']
+        verbose_name = 'View Metric'
+        verbose_name_plural = 'View Metrics'
+
+    def __str__(self):
+        return f"{self.url_name} ({self.requests} requests)"
+
+    def _average(self, total):
+        return total / self.requests if self.requests else 0
+
+    @property
+    def avg_queries(self):
+        return self._average(self.query_count)
+
+    @property
+    def avg_db_time_ms(self):
+        return self._average(self.db_time_ms)
+
+    @property
+    def avg_template_time_ms(self):
+        return self._average(self.template_time_ms)
+
+    @property
+    def avg_time_ms(self):
+        return self._average(self.total_time_ms)
+
+    @property
+    def avg_response_bytes(self):
+        return self._average(self.response_bytes)
+
+
+# ===========================================================================
+# 24. SearchDocument
+# ===========================================================================
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of one location, issue or equipment item.
+
+    Maintained by the signal receivers through SearchService. Migration
+    0009 adds the full-text index: a generated tsvector column with a GIN
+    index on PostgreSQL, or an FTS5 table kept in step by triggers on SQLite.
+    """
+
+    KIND_CHOICES = [
+        ('location', 'Location'),
+        ('issue', 'Issue'),
+        ('equipment', 'Equipment'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.UUIDField()
+    title = models.CharField(max_length=400)
+    body = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['kind', 'object_id']
+        verbose_name = 'Search Document'
+        verbose_name_plural = 'Search Documents'
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
@@ -0,0 +1,222 @@
+"""
+Keyset (cursor) pagination for list views.
+
+Offset pagination runs a COUNT(*) over the filtered set and an OFFSET scan
+that grows with the page number. KeysetPaginator instead orders by the
+view's sort key plus the primary key as a tiebreaker, and fetches the page
+after (or before) the last row seen:
+
+    WHERE (started_at, id) < (:started_at, :id)
+    ORDER BY started_at DESC, id DESC LIMIT 26
+
+so every page costs the same as the first. Cursors are opaque URL-safe
+tokens carrying the boundary row's sort values and a direction.
+
+The total is not needed to paginate. Views that show one can use the exact
+count (fine for small tables) or estimated_count/count_display, which
+read the planner estimate on PostgreSQL and count at most COUNT_LIMIT rows
+elsewhere.
+
+Usage:
+    class AuditListView(KeysetPaginationMixin, ListView):
+        paginate_by = 25
+        keyset_ordering = ('-started_at', '-id')
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor cannot be decoded for this paginator."""
+
+
+class KeysetPage:
+    """One page of results, with cursors for the neighbouring pages."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+
+class KeysetPaginator:
+    """Paginate a queryset by its sort key instead of by offset."""
+
+    COUNT_LIMIT = 1000
+
+    def __init__(self, queryset, per_page, ordering):
+        """
+        Args:
+            queryset: Filtered queryset to paginate
+            per_page: Rows per page
+            ordering: Field names, '-' prefixed for descending; the last
+                must be unique (normally the primary key)
+        """
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in self.ordering
+        ]
+
+    def page(self, cursor=None):
+        """
+        The page starting after (or ending before) a cursor.
+
+        Args:
+            cursor: A next_cursor or previous_cursor of an earlier page,
+                or None for the first page
+
+        Raises:
+            InvalidCursor: if the cursor is malformed.
+        """
+        if not cursor:
+            rows = list(self.queryset.order_by(*self.ordering)[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        values, direction = self.decode_cursor(cursor)
+        backwards = direction == 'prev'
+        ordering = self.ordering
+        if backwards:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}' for name in ordering
+            ]
+        qs = self.queryset.filter(self._after(values, backwards)).order_by(*ordering)
+        rows = list(qs[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if backwards:
+            rows.reverse()
+            return KeysetPage(rows, self, True, more)
+        return KeysetPage(rows, self, more, True)
+
+    def _after(self, values, backwards):
+        """Q for rows strictly after the boundary values in sort order."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.fields, values, strict=True):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, obj, direction):
+        # value_to_string keeps full precision (DjangoJSONEncoder would
+        # truncate datetimes to milliseconds and break ties on the boundary)
+        opts = self.queryset.model._meta
+        values = [opts.get_field(name).value_to_string(obj) for name, _ in self.fields]
+        payload = json.dumps([values, direction])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Returns:
+            (values, direction) with values converted to field types.
+
+        Raises:
+            InvalidCursor: if the cursor is malformed.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values, direction = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ('next', 'prev') or len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            opts = self.queryset.model._meta
+            return [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values, strict=True)
+            ], direction
+        except (binascii.Error, TypeError, ValueError, ValidationError) as exc:
+            raise InvalidCursor(cursor) from exc
+
+    @cached_property
+    def count(self):
+        """Exact number of rows; runs a COUNT(*) over the whole set."""
+        return self.queryset.count()
+
+    @cached_property
+    def estimated_count(self):
+        """
+        Approximate number of rows, cheap on any size of table.
+
+        Returns:
+            (rows, exact) tuple. On PostgreSQL rows is the planner's
+            estimate for the filtered query. Elsewhere rows are counted up
+            to COUNT_LIMIT, and exact is False if there are more.
+        """
+        qs = self.queryset.order_by()
+        if connections[qs.db].vendor == 'postgresql':
+            plan = json.loads(qs.explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows']), False
+        rows = qs[:self.COUNT_LIMIT + 1].count()
+        return min(rows, self.COUNT_LIMIT), rows <= self.COUNT_LIMIT
+
+    @cached_property
+    def count_display(self):
+        """estimated_count for templates, e.g. '740', '1,000+' or '~52,000'."""
+        rows, exact = self.estimated_count
+        if exact:
+            return f'{rows:,}'
+        if connections[self.queryset.db].vendor == 'postgresql':
+            return f'~{rows:,}'
+        return f'{rows:,}+'
+
+
+class KeysetPaginationMixin:
+    """
+    ListView mixin that paginates with KeysetPaginator.
+
+    Set keyset_ordering to the view's sort order followed by a unique
+    tiebreaker. The page is read from the ?cursor= parameter; page_obj,
+    paginator and is_paginated are provided as with offset pagination.
+    """
+
+    keyset_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404('Invalid page cursor.') from None
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,155 @@
+"""
+Audit creation service for the REdI Trolley Audit System.
+
+Starts a new audit with all of its section records in a constant number of
+queries:
+- Audit, AuditDocuments, AuditCondition and AuditChecks rows
+- One bulk INSERT of AuditEquipment rows built from a cached
+  "applicable equipment template" per location configuration
+
+A location configuration is the (defibrillator type, paediatric box,
+altered airway) triple that decides which catalogue items apply. When the
+default cache is shared between workers, templates are cached via Django's
+cache framework and invalidated whenever the equipment catalogue changes
+(see audit/signals.py). With a process-local cache that invalidation would
+only reach one worker, so the template is queried for every audit instead.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from audit.cache_versions import bump_version, cache_is_shared, get_version
+
+
+class AuditBuilder:
+    """Create audits and their section records for a location."""
+
+    TEMPLATE_CACHE_PREFIX = 'audit:equipment_template'
+    TEMPLATE_VERSION_KEY = 'audit:equipment_template:version'
+    TEMPLATE_CACHE_TIMEOUT = 300  # seconds
+
+    @staticmethod
+    def get_configuration_key(location):
+        """Return the configuration tuple that selects applicable equipment."""
+        return (
+            location.defibrillator_type,
+            bool(location.has_paediatric_box),
+            bool(location.has_altered_airway),
+        )
+
+    def _template_cache_key(self, configuration):
+        version = get_version(self.TEMPLATE_VERSION_KEY)
+        defib_type, has_paediatric_box, has_altered_airway = configuration
+        return (
+            f'{self.TEMPLATE_CACHE_PREFIX}:v{version}:'
+            f'{defib_type}:{int(has_paediatric_box)}:{int(has_altered_airway)}'
+        )
+
+    def build_equipment_template(self, configuration):
+        """
+        Query the applicable equipment for a location configuration.
+
+        Returns a list of (equipment_id, standard_quantity) tuples in
+        catalogue order. The defibrillator, paediatric and altered-airway
+        filters are applied in SQL so no Equipment instances are built.
+        """
+        from audit.models import Equipment
+
+        defib_type, has_paediatric_box, has_altered_airway = configuration
+
+        qs = Equipment.objects.filter(is_active=True).filter(
+            Q(required_for_defib_type='N/A')
+            | Q(required_for_defib_type=defib_type)
+        )
+        if not has_paediatric_box:
+            qs = qs.filter(is_paediatric_item=False)
+        if not has_altered_airway:
+            qs = qs.filter(is_altered_airway_item=False)
+
+        return list(qs.values_list('id', 'standard_quantity'))
+
+    def get_equipment_template(self, location):
+        """Return the equipment template for a location's configuration, cached when shared."""
+        configuration = self.get_configuration_key(location)
+        if not cache_is_shared():
+            return self.build_equipment_template(configuration)
+        key = self._template_cache_key(configuration)
+        template = cache.get(key)
+        if template is None:
+            template = self.build_equipment_template(configuration)
+            cache.set(key, template, self.TEMPLATE_CACHE_TIMEOUT)
+        return template
+
+    @classmethod
+    def invalidate_templates(cls):
+        """Invalidate every cached equipment template."""
+        bump_version(cls.TEMPLATE_VERSION_KEY)
+
+    def start_audit(self, location, period, user, audit_type='Monthly'):
+        """
+        Create an in-progress audit with all section and equipment records.
+
+        Args:
+            location: Location being audited
+            period: Active AuditPeriod
+            user: User performing the audit
+            audit_type: One of Audit.AUDIT_TYPE_CHOICES
+
+        Returns:
+            The created Audit instance
+        """
+        from audit.models import (
+            Audit,
+            AuditChecks,
+            AuditCondition,
+            AuditDocuments,
+            AuditEquipment,
+            LocationEquipment,
+        )
+
+        template = self.get_equipment_template(location)
+
+        with transaction.atomic():
+            audit = Audit.objects.create(
+                location=location,
+                period=period,
+                audit_type=audit_type,
+                auditor_name=user.get_full_name() or user.username,
+                auditor_user=user,
+                submission_status='InProgress',
+            )
+
+            AuditDocuments.objects.create(audit=audit)
+            AuditCondition.objects.create(audit=audit)
+            AuditChecks.objects.create(
+                audit=audit,
+                expected_outside=(
+                    period.expected_outside_checks_24_7
+                    if location.operating_hours == '24_7'
+                    else 0
+                ),
+                expected_inside=period.expected_inside_checks,
+            )
+
+            # Custom quantity overrides for this location
+            overrides = dict(
+                LocationEquipment.objects.filter(
+                    location=location,
+                    custom_quantity__isnull=False,
+                ).values_list('equipment_id', 'custom_quantity')
+            )
+
+            AuditEquipment.objects.bulk_create(
+                [
+                    AuditEquipment(
+                        audit=audit,
+                        equipment_id=equipment_id,
+                        quantity_expected=(
+                            overrides.get(equipment_id) or standard_quantity
+                        ),
+                    )
+                    for equipment_id, standard_quantity in template
+                ],
+            )
+
+        return audit
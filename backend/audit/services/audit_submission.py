@@ -0,0 +1,112 @@
+"""
+Audit submission service for the REdI Trolley Audit System.
+
+Finalises an in-progress audit: scores it, marks it submitted, updates the
+location and the monthly rollup, completes any pending random selection
+item, raises issues for missing critical equipment and flags low-scoring
+audits for follow-up. Used by the wizard's submit step and by the offline
+sync API.
+"""
+import logging
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .compliance import ComplianceScorer
+from .notifications import NotificationService
+from .rollup import ComplianceRollupService
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSubmissionService:
+    """Submit audits and send the resulting notifications."""
+
+    FOLLOW_UP_THRESHOLD = 80
+    FOLLOW_UP_DAYS = 14
+
+    def submit(self, audit):
+        """
+        Score and submit an audit in one transaction.
+
+        Args:
+            audit: Audit in progress
+
+        Returns:
+            (overall, critical_issues) tuple: the overall compliance score
+            and the Issues created for missing critical items.
+        """
+        from audit.models import Issue, RandomAuditSelectionItem
+
+        scorer = ComplianceScorer(engine='sql')
+        overall = scorer.calculate_overall_score(audit)
+
+        with transaction.atomic():
+            # Update audit status
+            audit.submission_status = 'Submitted'
+            audit.completed_at = timezone.now()
+            audit.save(update_fields=['submission_status', 'completed_at'])
+
+            # Update location's last audit info
+            location = audit.location
+            location.last_audit_date = audit.completed_at
+            location.last_audit_compliance = overall
+            location.save(update_fields=['last_audit_date', 'last_audit_compliance'])
+
+            # Add to the monthly compliance rollup used by reports
+            ComplianceRollupService().record_audit(audit)
+
+            # Mark any related random selection item as completed
+            RandomAuditSelectionItem.objects.filter(
+                location=location,
+                audit_status='Pending',
+                selection__is_active=True,
+            ).update(
+                audit_status='Completed',
+                audit=audit,
+            )
+
+            # Auto-create issues for critical equipment failures
+            critical_issues = []
+            for check in audit.equipment_checks.select_related('equipment'):
+                if check.equipment.critical_item and not check.is_present:
+                    issue = Issue.objects.create(
+                        location=location,
+                        audit=audit,
+                        issue_category='Equipment',
+                        severity='Critical',
+                        title=f'Missing critical item: {check.equipment.item_name}',
+                        description=(
+                            f'Critical equipment item '
+                            f'"{check.equipment.item_name}" was not found '
+                            f'during audit.'
+                        ),
+                        equipment=check.equipment,
+                        reported_by=audit.auditor_name,
+                    )
+                    critical_issues.append(issue)
+
+            # Low compliance triggers follow-up
+            if overall < self.FOLLOW_UP_THRESHOLD:
+                audit.requires_follow_up = True
+                audit.follow_up_due_date = date.today() + timedelta(days=self.FOLLOW_UP_DAYS)
+                audit.save(
+                    update_fields=['requires_follow_up', 'follow_up_due_date'],
+                )
+
+        return overall, critical_issues
+
+    def notify(self, audit, critical_issues):
+        """Send completion and critical-issue emails; never raises."""
+        try:
+            notifications = NotificationService()
+            notifications.notify_audit_completed(audit)
+            for issue in critical_issues:
+                notifications.notify_critical_issue(issue)
+        except Exception:
+            logger.warning(
+                'Failed to send notifications for audit %s',
+                audit.pk,
+                exc_info=True,
+            )
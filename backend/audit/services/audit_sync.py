@@ -0,0 +1,334 @@
+"""
+Offline sync for the audit wizard.
+
+Auditors often work where there is no connectivity. Instead of one round
+trip per wizard step, an offline client downloads a snapshot of an
+in-progress audit, fills it in on the device and uploads it in one request:
+
+    {
+        "documents": {"version": "...", "check_record_status": "Current", ...},
+        "equipment": [{"id": "...", "version": "...", "quantity_found": 2, ...}],
+        "condition": {"version": "...", "is_clean": true, ...},
+        "checks": {"version": "...", "outside_check_count": 28, ...},
+        "submit": true
+    }
+
+Sections and equipment rows may be partial: fields that are left out keep
+their stored values. The whole upload is validated before anything is
+written, then applied in one transaction. Changed equipment rows are written
+with one bulk UPDATE, and each changed section with one UPDATE.
+
+Version stamps are the rows' updated_at values, as given in the snapshot.
+If a stamp no longer matches the database, the row was changed after the
+snapshot was taken (for example, autosaved from another device). In that
+case the whole upload is rejected. The response lists the current values of
+the conflicting rows so the client can merge them and retry. Entries without
+a version are written unconditionally.
+"""
+import uuid
+
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.utils import timezone
+
+from .audit_submission import AuditSubmissionService
+from .equipment_checklist import EquipmentChecklistService
+
+
+class SyncValidationError(Exception):
+    """Raised when an upload contains invalid values; errors maps field paths to messages."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(
+            f'{path}: {message}' for path, messages in errors.items() for message in messages
+        ))
+
+
+class SyncConflictError(Exception):
+    """Raised when an upload was built from an out-of-date snapshot."""
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__(f'{len(conflicts)} conflicting record(s)')
+
+
+class AuditSyncService:
+    """Snapshot and apply whole audits for offline clients."""
+
+    SECTIONS = ('documents', 'condition', 'checks')
+    # JSON type expected for each equipment field
+    EQUIPMENT_FIELDS = {
+        'is_present': bool,
+        'quantity_found': int,
+        'expiry_ok': bool,
+        'item_notes': str,
+    }
+
+    def section_forms(self):
+        """ModelForm validating each section, keyed by section name."""
+        from audit.forms import AuditChecksForm, AuditConditionForm, AuditDocumentsForm
+
+        return {
+            'documents': AuditDocumentsForm,
+            'condition': AuditConditionForm,
+            'checks': AuditChecksForm,
+        }
+
+    @staticmethod
+    def version(obj):
+        """Version stamp of a section or equipment row."""
+        return obj._meta.get_field('updated_at').value_to_string(obj)
+
+    # -- Loading ------------------------------------------------------------
+
+    def _load(self, audit_id, for_update=False):
+        """
+        Load an audit with its sections (created if missing) and equipment rows.
+
+        Returns:
+            (audit, sections, checks) tuple.
+        """
+        from audit.models import Audit, AuditEquipment
+
+        qs = Audit.objects.select_related('location', *self.SECTIONS)
+        if for_update:
+            qs = qs.select_for_update(of=('self',))
+        audit = qs.get(pk=audit_id)
+
+        sections = {}
+        for name in self.SECTIONS:
+            model = Audit._meta.get_field(name).related_model
+            try:
+                sections[name] = getattr(audit, name)
+            except model.DoesNotExist:
+                sections[name] = model.objects.create(audit=audit)
+
+        checks = list(
+            AuditEquipment.objects.filter(audit=audit)
+            .select_related('equipment__category')
+            .order_by('equipment__category__sort_order', 'equipment__sort_order')
+        )
+        return audit, sections, checks
+
+    # -- Snapshot -----------------------------------------------------------
+
+    def _section_data(self, name, section):
+        fields = self.section_forms()[name]._meta.fields
+        return {'version': self.version(section), **model_to_dict(section, fields=fields)}
+
+    def _equipment_data(self, check):
+        data = {
+            'id': check.pk,
+            'version': self.version(check),
+            'equipment_id': check.equipment_id,
+            'item_name': check.equipment.item_name,
+            'category': check.equipment.category.category_name,
+            'critical': check.equipment.critical_item,
+            'requires_expiry_check': check.equipment.requires_expiry_check,
+            'quantity_expected': check.quantity_expected,
+        }
+        data.update({field: getattr(check, field) for field in self.EQUIPMENT_FIELDS})
+        return data
+
+    def _snapshot(self, audit, sections, checks):
+        data = {
+            'id': audit.pk,
+            'location': {'id': audit.location_id, 'display_name': audit.location.display_name},
+            'audit_type': audit.audit_type,
+            'submission_status': audit.submission_status,
+            'started_at': audit.started_at,
+            'overall_compliance': audit.overall_compliance,
+        }
+        for name, section in sections.items():
+            data[name] = self._section_data(name, section)
+        data['equipment'] = [self._equipment_data(check) for check in checks]
+        return data
+
+    def snapshot(self, audit):
+        """
+        Everything an offline client needs to complete an audit.
+
+        Returns:
+            Dict with the audit's status, each section's values and the
+            equipment rows (with item details), each carrying its version.
+        """
+        return self._snapshot(*self._load(audit.pk))
+
+    # -- Applying -----------------------------------------------------------
+
+    def apply(self, audit, payload):
+        """
+        Validate an upload and write it in one transaction.
+
+        Args:
+            audit: Audit being synced; must be in progress
+            payload: Decoded JSON upload (see module docstring)
+
+        Returns:
+            (snapshot, updated, submission) tuple. snapshot is the audit
+            after the upload. updated counts the rows written per section.
+            submission is the (overall, critical_issues) result of
+            AuditSubmissionService.submit, or None if the upload did not
+            ask to submit.
+
+        Raises:
+            SyncValidationError: if the upload has invalid values.
+            SyncConflictError: if the audit is no longer in progress or a
+                version stamp is out of date. Nothing is written in either
+                case.
+        """
+        from audit.models import AuditEquipment
+
+        if not isinstance(payload, dict):
+            raise SyncValidationError({'': ['Expected a JSON object.']})
+        unknown = set(payload) - {*self.SECTIONS, 'equipment', 'submit'}
+        if unknown:
+            raise SyncValidationError({name: ['Unknown section.'] for name in sorted(unknown)})
+        submit = payload.get('submit', False)
+        if not isinstance(submit, bool):
+            raise SyncValidationError({'submit': ['Must be true or false.']})
+
+        with transaction.atomic():
+            audit, sections, checks = self._load(audit.pk, for_update=True)
+            if audit.submission_status != 'InProgress':
+                raise SyncConflictError([{
+                    'section': 'audit',
+                    'id': audit.pk,
+                    'current': {
+                        'submission_status': audit.submission_status,
+                        'overall_compliance': audit.overall_compliance,
+                    },
+                }])
+
+            errors = {}
+            conflicts = []
+            forms = {}
+            for name, section in sections.items():
+                if name in payload:
+                    forms[name] = self._validate_section(
+                        name, section, payload[name], errors, conflicts,
+                    )
+            changed_checks = self._validate_equipment(
+                checks, payload.get('equipment', []), errors, conflicts,
+            )
+            if errors:
+                raise SyncValidationError(errors)
+            if conflicts:
+                raise SyncConflictError(conflicts)
+
+            updated = {name: 0 for name in (*self.SECTIONS, 'equipment')}
+            for name, form in forms.items():
+                if form.has_changed():
+                    form.instance.save(update_fields=form.changed_data + ['updated_at'])
+                    updated[name] = 1
+
+            if changed_checks:
+                now = timezone.now()
+                for check in changed_checks:
+                    check.updated_at = now
+                AuditEquipment.objects.bulk_update(
+                    changed_checks,
+                    EquipmentChecklistService.UPDATE_FIELDS + ['updated_at'],
+                )
+                updated['equipment'] = len(changed_checks)
+
+            submission = None
+            if submit:
+                submission = AuditSubmissionService().submit(audit)
+
+        return self._snapshot(audit, sections, checks), updated, submission
+
+    def _check_version(self, entry, current, conflict, conflicts):
+        """Record a conflict if entry's version stamp is out of date."""
+        version = entry.get('version')
+        if version is not None and version != self.version(current):
+            conflicts.append(conflict)
+
+    def _validate_section(self, name, section, data, errors, conflicts):
+        """Return the bound, validated form for one section of the upload."""
+        if not isinstance(data, dict):
+            errors[name] = ['Expected an object.']
+            return None
+
+        self._check_version(data, section, {
+            'section': name, 'current': self._section_data(name, section),
+        }, conflicts)
+
+        form_class = self.section_forms()[name]
+        unknown = set(data) - {'version', *form_class._meta.fields}
+        for field in sorted(unknown):
+            errors[f'{name}.{field}'] = ['Unknown field.']
+
+        # Fields left out of the upload keep their stored values
+        values = model_to_dict(section, fields=form_class._meta.fields)
+        values.update({key: value for key, value in data.items() if key != 'version'})
+        form = form_class(values, instance=section)
+        if not form.is_valid():
+            for field, messages in form.errors.items():
+                errors[f'{name}.{field}'] = list(messages)
+        return form
+
+    def _validate_equipment(self, checks, entries, errors, conflicts):
+        """
+        Validate the equipment rows of the upload.
+
+        Returns:
+            The AuditEquipment rows whose values changed, already updated
+            in memory.
+        """
+        if not isinstance(entries, list):
+            errors['equipment'] = ['Expected a list.']
+            return []
+
+        by_id = {check.pk: check for check in checks}
+        seen = set()
+        parsed = []
+        for index, entry in enumerate(entries):
+            path = f'equipment[{index}]'
+            if not isinstance(entry, dict):
+                errors[path] = ['Expected an object.']
+                continue
+            try:
+                check = by_id.get(uuid.UUID(str(entry.get('id'))))
+            except ValueError:
+                check = None
+            if check is None:
+                errors[path] = ['Not an equipment row of this audit.']
+                continue
+            if check.pk in seen:
+                errors[path] = ['Duplicate equipment row.']
+                continue
+            seen.add(check.pk)
+
+            self._check_version(entry, check, {
+                'section': 'equipment', 'id': check.pk,
+                'current': self._equipment_data(check),
+            }, conflicts)
+
+            values = {}
+            for field, value in entry.items():
+                if field in ('id', 'version'):
+                    continue
+                expected = self.EQUIPMENT_FIELDS.get(field)
+                if expected is None:
+                    errors[f'{path}.{field}'] = ['Unknown field.']
+                # bool is an int subclass; reject true/false as quantities
+                elif not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+                    errors[f'{path}.{field}'] = [
+                        f'Invalid {field} value for {check.equipment.item_name}'
+                    ]
+                elif field == 'quantity_found' and value < 0:
+                    errors[f'{path}.{field}'] = [
+                        f'Quantity cannot be negative for {check.equipment.item_name}'
+                    ]
+                # Expiry only applies to items that need it; keep the stored
+                # value for the rest, as the checklist page does
+                elif field != 'expiry_ok' or check.equipment.requires_expiry_check:
+                    values[field] = value
+            parsed.append((check, values))
+
+        if errors:
+            return []
+        checklist = EquipmentChecklistService()
+        return [check for check, values in parsed if checklist.apply_values(check, values)]
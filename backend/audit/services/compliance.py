@@ -6,23 +6,112 @@ Implements the 4-factor weighted compliance scoring formula:
 - Equipment: 40% (60/40 critical vs non-critical)
 - Condition: 15%
 - Routine Checks: 20%
+
+Two equipment scoring engines are available:
+- 'python': walks AuditEquipment rows and counts passes per item
+- 'sql': counts critical/non-critical passes with one conditional-aggregate
+  query per audit, or for a whole set of audits at once
+
+Both engines feed identical integer counts into the same Decimal formula,
+so scores and rounding are exactly the same.
+
+Weights come from the active ScoringProfile, which is loaded once per
+process and reloaded when any profile is saved (see audit/signals.py).
+The class constants below are only used when no profile exists.
 """
+import time
 from decimal import Decimal, ROUND_HALF_UP
 
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+PROFILE_STAMP_KEY = 'audit:scoring_profile:stamp'
+PROFILE_LOCAL_TTL = 60  # seconds; bounds staleness with per-process caches
+
+_active_profile = {'stamp': None, 'loaded_at': 0.0, 'profile': None}
+
+
+def get_active_profile():
+    """
+    Return the active ScoringProfile, or None if there is none.
+
+    The profile is memoised in-process. The memo is discarded when the
+    shared invalidation stamp changes (any profile save) or after
+    PROFILE_LOCAL_TTL seconds, whichever comes first.
+    """
+    stamp = cache.get_or_set(PROFILE_STAMP_KEY, time.time_ns, None)
+    now = time.monotonic()
+    if (
+        _active_profile['stamp'] == stamp
+        and now - _active_profile['loaded_at'] < PROFILE_LOCAL_TTL
+    ):
+        return _active_profile['profile']
+
+    from audit.models import ScoringProfile
+    profile = (
+        ScoringProfile.objects.filter(is_active=True)
+        .order_by('-version')
+        .first()
+    )
+    _active_profile.update(stamp=stamp, loaded_at=now, profile=profile)
+    return profile
+
+
+def invalidate_profile_cache():
+    """Force every process to reload the active scoring profile."""
+    _active_profile['stamp'] = None
+    cache.set(PROFILE_STAMP_KEY, time.time_ns(), None)
+
 
 class ComplianceScorer:
     """Calculate compliance scores for trolley audits."""
 
-    # Component weights
+    ENGINES = ('python', 'sql')
+
+    # Audit fields written by calculate_overall_score
+    SCORE_FIELDS = [
+        'document_score', 'equipment_score', 'condition_score',
+        'check_score', 'overall_compliance',
+    ]
+
+    # Default component weights (used when no ScoringProfile exists)
     DOCUMENTATION_WEIGHT = Decimal('0.25')
     EQUIPMENT_WEIGHT = Decimal('0.40')
     CONDITION_WEIGHT = Decimal('0.15')
     CHECK_WEIGHT = Decimal('0.20')
 
-    # Equipment sub-weights
+    # Default equipment sub-weights
     CRITICAL_WEIGHT = Decimal('0.60')
     NON_CRITICAL_WEIGHT = Decimal('0.40')
 
+    def __init__(self, engine='python', profile=None):
+        """
+        Args:
+            engine: Equipment scoring engine, 'python' or 'sql'
+            profile: ScoringProfile to score with (default: the active profile)
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(
+                f"Unknown scoring engine '{engine}'. Must be one of: {', '.join(self.ENGINES)}"
+            )
+        self.engine = engine
+        self.profile = profile if profile is not None else get_active_profile()
+
+        if self.profile is not None:
+            self.documentation_weight = self.profile.documentation_weight
+            self.equipment_weight = self.profile.equipment_weight
+            self.condition_weight = self.profile.condition_weight
+            self.check_weight = self.profile.check_weight
+            self.critical_weight = self.profile.critical_weight
+            self.non_critical_weight = self.profile.non_critical_weight
+        else:
+            self.documentation_weight = self.DOCUMENTATION_WEIGHT
+            self.equipment_weight = self.EQUIPMENT_WEIGHT
+            self.condition_weight = self.CONDITION_WEIGHT
+            self.check_weight = self.CHECK_WEIGHT
+            self.critical_weight = self.CRITICAL_WEIGHT
+            self.non_critical_weight = self.NON_CRITICAL_WEIGHT
+
     def calculate_documentation_score(self, audit_documents):
         """Calculate documentation compliance score (0-100)."""
         # audit_documents is an AuditDocuments model instance
@@ -68,6 +157,13 @@ class ComplianceScorer:
                 if passes:
                     non_critical_pass += 1
 
+        return self.equipment_score_from_counts(
+            critical_pass, critical_total, non_critical_pass, non_critical_total,
+        )
+
+    def equipment_score_from_counts(self, critical_pass, critical_total,
+                                    non_critical_pass, non_critical_total):
+        """Combine critical/non-critical pass counts into an equipment score (0-100)."""
         critical_score = (
             Decimal(critical_pass) / Decimal(critical_total) * 100
             if critical_total > 0 else Decimal('100')
@@ -77,7 +173,67 @@ class ComplianceScorer:
             if non_critical_total > 0 else Decimal('100')
         )
 
-        return (critical_score * self.CRITICAL_WEIGHT) + (non_critical_score * self.NON_CRITICAL_WEIGHT)
+        return (critical_score * self.critical_weight) + (non_critical_score * self.non_critical_weight)
+
+    def get_equipment_counts(self, audit_ids):
+        """
+        Count equipment passes for a set of audits in one aggregate query.
+
+        An item passes when it is present, at or above the expected quantity,
+        and (if it requires an expiry check) within expiry.
+
+        Returns:
+            Dict mapping audit_id -> (critical_pass, critical_total,
+            non_critical_pass, non_critical_total). Audits with no equipment
+            rows are omitted.
+        """
+        from audit.models import AuditEquipment
+
+        passes = (
+            Q(is_present=True, quantity_found__gte=F('quantity_expected'))
+            & (Q(equipment__requires_expiry_check=False) | Q(expiry_ok=True))
+        )
+        critical = Q(equipment__critical_item=True)
+
+        rows = (
+            AuditEquipment.objects.filter(audit_id__in=audit_ids)
+            .order_by()
+            .values('audit_id')
+            .annotate(
+                critical_pass=Count('id', filter=critical & passes),
+                critical_total=Count('id', filter=critical),
+                non_critical_pass=Count('id', filter=~critical & passes),
+                non_critical_total=Count('id', filter=~critical),
+            )
+        )
+        return {
+            row['audit_id']: (
+                row['critical_pass'], row['critical_total'],
+                row['non_critical_pass'], row['non_critical_total'],
+            )
+            for row in rows
+        }
+
+    def calculate_equipment_scores(self, audit_ids):
+        """
+        Calculate equipment scores for many audits with the SQL engine.
+
+        Returns:
+            Dict mapping audit_id -> equipment score (0-100). Audits without
+            equipment rows score 100, matching calculate_equipment_score.
+        """
+        audit_ids = list(audit_ids)
+        counts = self.get_equipment_counts(audit_ids)
+        return {
+            audit_id: self.equipment_score_from_counts(*counts.get(audit_id, (0, 0, 0, 0)))
+            for audit_id in audit_ids
+        }
+
+    def score_equipment(self, audit):
+        """Calculate an audit's equipment score using the configured engine."""
+        if self.engine == 'sql':
+            return self.calculate_equipment_scores([audit.pk])[audit.pk]
+        return self.calculate_equipment_score(audit.equipment_checks.all())
 
     def calculate_condition_score(self, audit_condition):
         """Calculate physical condition compliance score (0-100)."""
@@ -120,19 +276,22 @@ class ComplianceScorer:
 
         return (outside_compliance * Decimal('0.5')) + (inside_compliance * Decimal('0.5'))
 
-    def calculate_overall_score(self, audit):
+    def calculate_component_scores(self, audit, equip_score=None):
         """
-        Calculate overall compliance score for an audit.
-        Updates the audit instance with all component scores and overall score.
-        Returns the overall score.
+        Calculate all component scores and the overall score for an audit
+        without saving anything.
 
         Args:
-            audit: An Audit model instance with related documents, condition, checks,
-                   and equipment_checks loaded
+            audit: An Audit model instance
+            equip_score: Precomputed equipment score (e.g. from
+                         calculate_equipment_scores). Calculated with the
+                         configured engine when omitted.
+
+        Returns:
+            Dict mapping each of SCORE_FIELDS to a Decimal rounded to 2 places.
         """
         # Calculate each component
         doc_score = Decimal('0')
-        equip_score = Decimal('0')
         cond_score = Decimal('0')
         check_score = Decimal('0')
 
@@ -141,7 +300,8 @@ class ComplianceScorer:
         except Exception:
             pass  # AuditDocuments may not exist yet
 
-        equip_score = self.calculate_equipment_score(audit.equipment_checks.all())
+        if equip_score is None:
+            equip_score = self.score_equipment(audit)
 
         try:
             cond_score = self.calculate_condition_score(audit.condition)
@@ -155,28 +315,37 @@ class ComplianceScorer:
 
         # Calculate overall weighted score
         overall = (
-            doc_score * self.DOCUMENTATION_WEIGHT +
-            equip_score * self.EQUIPMENT_WEIGHT +
-            cond_score * self.CONDITION_WEIGHT +
-            check_score * self.CHECK_WEIGHT
+            doc_score * self.documentation_weight +
+            equip_score * self.equipment_weight +
+            cond_score * self.condition_weight +
+            check_score * self.check_weight
         )
 
         # Round to 2 decimal places
-        overall = overall.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        doc_score = doc_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        equip_score = equip_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        cond_score = cond_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        check_score = check_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-
-        # Update audit instance
-        audit.document_score = doc_score
-        audit.equipment_score = equip_score
-        audit.condition_score = cond_score
-        audit.check_score = check_score
-        audit.overall_compliance = overall
-        audit.save(update_fields=[
-            'document_score', 'equipment_score', 'condition_score',
-            'check_score', 'overall_compliance'
-        ])
-
-        return overall
+        return {
+            'document_score': doc_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'equipment_score': equip_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'condition_score': cond_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'check_score': check_score.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+            'overall_compliance': overall.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP),
+        }
+
+    def calculate_overall_score(self, audit):
+        """
+        Calculate overall compliance score for an audit.
+        Updates the audit instance with all component scores and overall score.
+        Returns the overall score.
+
+        Args:
+            audit: An Audit model instance with related documents, condition, checks,
+                   and equipment_checks loaded
+        """
+        scores = self.calculate_component_scores(audit)
+
+        # Update audit instance and record which profile scored it
+        for field, value in scores.items():
+            setattr(audit, field, value)
+        audit.scoring_profile = self.profile
+        audit.save(update_fields=self.SCORE_FIELDS + ['scoring_profile'])
+
+        return scores['overall_compliance']
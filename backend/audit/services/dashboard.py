@@ -0,0 +1,89 @@
+"""
+Dashboard statistics for the REdI Trolley Audit System.
+
+The dashboard is the landing page for every user, so its summary block is
+computed once and served from Django's cache framework until something it
+depends on changes. Signal receivers (see audit/signals.py) invalidate it
+when audits are submitted, issues change, selections are generated, or
+locations and service lines are edited.
+
+Entries are keyed by a version stamp that is bumped on invalidation. A
+request that started building stats before an invalidation writes them
+under the old version, so it cannot overwrite fresher data.
+
+Invalidation only reaches the workers that share the cache, so the block is
+cached only when the default cache is shared (REDIS_URL). With the
+process-local default it is rebuilt on every request.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from audit.cache_versions import bump_version, cache_is_shared, get_version
+
+
+class DashboardStatsService:
+    """Build and cache the dashboard summary statistics."""
+
+    CACHE_PREFIX = 'audit:dashboard:stats'
+    VERSION_KEY = 'audit:dashboard:stats:version'
+    DEFAULT_TIMEOUT = 300  # seconds
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', self.DEFAULT_TIMEOUT)
+
+    def _cache_key(self):
+        version = get_version(self.VERSION_KEY)
+        return f'{self.CACHE_PREFIX}:v{version}'
+
+    def build_stats(self):
+        """
+        Compute the dashboard statistics block.
+
+        Returns:
+            Dict of context values; querysets are evaluated to lists so the
+            result can be cached.
+        """
+        from audit.models import Audit, Issue, Location
+
+        from .random_selection import RandomAuditSelector
+        from .rollup import ComplianceRollupService
+
+        rollup = ComplianceRollupService()
+        total_audits, avg_compliance = rollup.totals()
+
+        return {
+            'total_locations': Location.objects.filter(status='Active').count(),
+            'total_audits': total_audits,
+            'avg_compliance': avg_compliance,
+            'open_issues': Issue.objects.exclude(
+                status__in=['Closed', 'Resolved'],
+            ).count(),
+            'recent_audits': list(
+                Audit.objects.filter(submission_status='Submitted')
+                .select_related('location', 'location__service_line', 'period')
+                .order_by('-completed_at')[:10]
+            ),
+            'recent_issues': list(
+                Issue.objects.select_related('location', 'equipment')
+                .order_by('-reported_date')[:10]
+            ),
+            'active_selection': RandomAuditSelector().get_active_selection(),
+            'service_line_stats': rollup.service_line_stats(),
+        }
+
+    def get_stats(self):
+        """Return the dashboard statistics, from cache when available."""
+        if not cache_is_shared():
+            return self.build_stats()
+        key = self._cache_key()
+        stats = cache.get(key)
+        if stats is None:
+            stats = self.build_stats()
+            cache.set(key, stats, self.timeout)
+        return stats
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate the cached dashboard statistics."""
+        bump_version(cls.VERSION_KEY)
@@ -3,11 +3,23 @@ Email service using Power Automate HTTP trigger API.
 
 Replaces Django SMTP email with direct HTTP POST to a Power Automate
 workflow endpoint for sending emails via the organization's shared mailbox.
+
+All instances share one process-wide requests.Session, so consecutive
+emails reuse pooled keep-alive connections instead of paying a TCP and TLS
+handshake each. The session's adapter retries only when the flow cannot
+have run: connection failures, and 429/503 responses, which Power Automate
+returns before accepting a run. Gateway errors (502/504) and read timeouts
+can arrive after the run was accepted, so they are not retried here; the
+outbound email queue retries those later rather than risk an immediate
+duplicate.
 """
 import logging
+import threading
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +27,53 @@ logger = logging.getLogger(__name__)
 class PowerAutomateEmailService:
     """Send emails via Power Automate HTTP trigger workflow."""
 
+    # Statuses returned before the flow run is accepted; a 502/504 from a
+    # gateway may follow an accepted run, so re-posting could send twice
+    RETRY_STATUSES = (429, 503)
+
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls):
+        """Return the shared HTTP session, creating it on first use."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    cls._session = cls._build_session()
+        return cls._session
+
+    @classmethod
+    def close_session(cls):
+        """Close the shared session; the next send opens a new one."""
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+    @staticmethod
+    def _build_session():
+        retries = getattr(settings, 'EMAIL_API_RETRIES', 2)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            status_forcelist=PowerAutomateEmailService.RETRY_STATUSES,
+            allowed_methods=frozenset({'POST'}),
+            backoff_factor=0.5,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_maxsize=getattr(settings, 'EMAIL_API_POOL_SIZE', 4),
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
     def __init__(self):
         self.endpoint = getattr(
             settings,
@@ -26,7 +85,10 @@ class PowerAutomateEmailService:
             'DEFAULT_FROM_EMAIL',
             'redi-noreply@health.qld.gov.au',
         )
-        self.timeout = getattr(settings, 'EMAIL_API_TIMEOUT', 30)
+        self.timeout = (
+            getattr(settings, 'EMAIL_API_CONNECT_TIMEOUT', 5),
+            getattr(settings, 'EMAIL_API_TIMEOUT', 30),
+        )
 
     def send(self, to, subject, body, cc=None, bcc=None,
              importance='Normal', reply_to=None):
@@ -68,7 +130,7 @@ class PowerAutomateEmailService:
             payload['replyTo'] = reply_to
 
         try:
-            response = requests.post(
+            response = self.get_session().post(
                 self.endpoint,
                 json=payload,
                 timeout=self.timeout,
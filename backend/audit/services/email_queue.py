@@ -0,0 +1,198 @@
+"""
+Durable outbound email queue for the REdI Trolley Audit System.
+
+Notifications are written to the OutboundEmail table instead of being sent
+inside the request. The row is inserted in the caller's transaction, so it
+becomes visible to the sender exactly when the change that triggered it
+commits, and disappears with it on rollback. The send_queued_email worker
+then delivers queued rows:
+
+- batches are claimed with a single conditional UPDATE and a claim token,
+  so several workers can drain the same table
+- failed deliveries are retried with exponential backoff
+- after EMAIL_QUEUE_MAX_ATTEMPTS failures a row is dead-lettered (Dead)
+
+A claimed batch is sent concurrently by up to EMAIL_QUEUE_CONCURRENCY
+threads, so a bulk event (an SLA sweep, the weekly selection) is not
+delivered one round trip at a time. Only the transport call runs in the
+pool; outcomes are recorded on the worker's own database connection.
+"""
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class EmailQueue:
+    """Enqueue notification emails and deliver them in the background."""
+
+    DEFAULT_MAX_ATTEMPTS = 6
+    BACKOFF_BASE = 60  # seconds before the first retry
+    BACKOFF_MAX = 6 * 60 * 60  # longest wait between retries
+    SENDING_TIMEOUT = 15 * 60  # seconds before a claimed row is presumed lost
+    DEFAULT_BATCH_SIZE = 50
+    DEFAULT_CONCURRENCY = 4
+
+    def __init__(self, transport=None):
+        """
+        Args:
+            transport: Callable (to, subject, body, importance) -> bool that
+                performs delivery; defaults to NotificationService.deliver.
+                Must be thread-safe, as batches are sent concurrently.
+        """
+        self._transport = transport
+
+    @property
+    def max_attempts(self):
+        return getattr(settings, 'EMAIL_QUEUE_MAX_ATTEMPTS', self.DEFAULT_MAX_ATTEMPTS)
+
+    @property
+    def concurrency(self):
+        return max(getattr(settings, 'EMAIL_QUEUE_CONCURRENCY', self.DEFAULT_CONCURRENCY), 1)
+
+    def _get_transport(self):
+        if self._transport is None:
+            from .notifications import NotificationService
+            self._transport = NotificationService().deliver
+        return self._transport
+
+    def enqueue(self, to, subject, body, importance='Normal'):
+        """Queue an email for delivery. Returns the OutboundEmail row."""
+        from audit.models import OutboundEmail
+
+        return OutboundEmail.objects.create(
+            to=to,
+            subject=subject[:500],
+            body=body,
+            importance=importance,
+        )
+
+    def backoff(self, attempts):
+        """Delay before retrying after the given number of failed attempts."""
+        seconds = self.BACKOFF_BASE * 2 ** max(attempts - 1, 0)
+        return timedelta(seconds=min(seconds, self.BACKOFF_MAX))
+
+    def claim_batch(self, limit=None):
+        """
+        Claim due queued emails for this worker.
+
+        Returns:
+            List of OutboundEmail rows now in Sending state.
+        """
+        from audit.models import OutboundEmail
+
+        now = timezone.now()
+        token = uuid.uuid4()
+        due = (
+            OutboundEmail.objects.filter(status='Queued', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('pk', flat=True)[:limit or self.DEFAULT_BATCH_SIZE]
+        )
+        OutboundEmail.objects.filter(pk__in=list(due), status='Queued').update(
+            status='Sending',
+            claim_token=token,
+            claimed_at=now,
+        )
+        return list(
+            OutboundEmail.objects.filter(claim_token=token, status='Sending')
+            .order_by('next_attempt_at')
+        )
+
+    def _send(self, transport, email):
+        """Call the transport for one email. Returns (sent, error); no DB access."""
+        try:
+            sent = transport(
+                to=email.to,
+                subject=email.subject,
+                body=email.body,
+                importance=email.importance,
+            )
+            return sent, '' if sent else 'Email backend reported a failed send'
+        except Exception as e:
+            logger.warning('Email delivery raised for %s', email.pk, exc_info=True)
+            return False, f'{type(e).__name__}: {e}'
+
+    def _record(self, email, sent, error):
+        """Save the outcome of a delivery attempt."""
+        email.attempts += 1
+        email.claim_token = None
+        if sent:
+            email.status = 'Sent'
+            email.sent_at = timezone.now()
+            email.last_error = ''
+        elif email.attempts >= self.max_attempts:
+            email.status = 'Dead'
+            email.last_error = error
+            logger.error(
+                'Email dead-lettered after %s attempts: %s', email.attempts, email.subject,
+            )
+        else:
+            email.status = 'Queued'
+            email.next_attempt_at = timezone.now() + self.backoff(email.attempts)
+            email.last_error = error
+        email.save(update_fields=[
+            'status', 'attempts', 'claim_token', 'sent_at',
+            'next_attempt_at', 'last_error',
+        ])
+
+    def deliver(self, email):
+        """Send one claimed email and record the outcome. Returns True if sent."""
+        sent, error = self._send(self._get_transport(), email)
+        self._record(email, sent, error)
+        return sent
+
+    def deliver_many(self, emails):
+        """
+        Send claimed emails concurrently and record each outcome.
+
+        Returns:
+            List of (email, sent) tuples in the order given.
+        """
+        if len(emails) <= 1 or self.concurrency == 1:
+            return [(email, self.deliver(email)) for email in emails]
+
+        transport = self._get_transport()
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(emails))) as pool:
+            results = list(pool.map(lambda email: self._send(transport, email), emails))
+
+        outcomes = []
+        for email, (sent, error) in zip(emails, results, strict=True):
+            self._record(email, sent, error)
+            outcomes.append((email, sent))
+        return outcomes
+
+    def process_batch(self, limit=None):
+        """
+        Deliver one batch of due emails.
+
+        Returns:
+            (sent, failed) counts for the batch.
+        """
+        outcomes = self.deliver_many(self.claim_batch(limit))
+        sent = sum(1 for _, ok in outcomes if ok)
+        return sent, len(outcomes) - sent
+
+    def requeue_stale(self):
+        """Return rows claimed by a worker that died back to the queue."""
+        from audit.models import OutboundEmail
+
+        cutoff = timezone.now() - timedelta(seconds=self.SENDING_TIMEOUT)
+        return OutboundEmail.objects.filter(
+            status='Sending', claimed_at__lt=cutoff,
+        ).update(status='Queued', claim_token=None)
+
+    def purge_sent(self, older_than_days):
+        """Delete delivered rows (and digested notices) older than the retention period."""
+        from audit.models import OutboundEmail, PendingNotification
+
+        cutoff = timezone.now() - timedelta(days=older_than_days)
+        PendingNotification.objects.filter(digested_at__lt=cutoff).delete()
+        deleted, _ = OutboundEmail.objects.filter(
+            status='Sent', sent_at__lt=cutoff,
+        ).delete()
+        return deleted
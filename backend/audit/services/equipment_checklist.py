@@ -0,0 +1,188 @@
+"""
+Equipment checklist persistence for the REdI Trolley Audit System.
+
+Parses the equipment step of the audit wizard in one pass, validates the
+whole payload before anything is written, and saves only the rows whose
+values actually changed with a single bulk UPDATE.
+
+The checklist page also autosaves each row as it is edited (save_item),
+returning the running equipment score (progress) after every change. Both
+write paths lock the audit row first, as the offline sync upload does.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+
+class ChecklistValidationError(Exception):
+    """Raised when a submitted equipment checklist contains invalid values."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+
+class EquipmentChecklistService:
+    """Validate and save equipment checklist submissions."""
+
+    UPDATE_FIELDS = ['is_present', 'quantity_found', 'expiry_ok', 'item_notes']
+
+    @staticmethod
+    def field_prefix(check_id):
+        """Return the form field prefix used for an AuditEquipment row."""
+        return f'equip_{check_id}'
+
+    @staticmethod
+    def lock_audit(audit_id):
+        """
+        Lock an audit's row until the end of the current transaction.
+
+        Offline sync uploads hold this lock while they check version stamps
+        and write (see audit_sync.py); taking it before writing checklist
+        rows keeps an autosave from landing between the two.
+        """
+        from audit.models import Audit
+
+        Audit.objects.select_for_update().only('pk').get(pk=audit_id)
+
+    def parse_item(self, check, data):
+        """
+        Parse the submitted values for one AuditEquipment row.
+
+        Args:
+            check: AuditEquipment instance with equipment loaded
+            data: QueryDict or mapping of submitted form values
+
+        Returns:
+            (values, error) tuple. values maps UPDATE_FIELDS to parsed values;
+            error is a message string or None.
+        """
+        prefix = self.field_prefix(check.pk)
+
+        qty_value = str(data.get(f'{prefix}_qty', '0')).strip() or '0'
+        try:
+            quantity = int(qty_value)
+        except ValueError:
+            return None, f'Invalid quantity value for {check.equipment.item_name}'
+        if quantity < 0:
+            return None, f'Quantity cannot be negative for {check.equipment.item_name}'
+
+        values = {
+            'is_present': data.get(f'{prefix}_present') == 'on',
+            'quantity_found': quantity,
+            'item_notes': data.get(f'{prefix}_notes', ''),
+            # Expiry is only rendered for items that need it; keep the stored
+            # value for the rest rather than clearing it on every save.
+            'expiry_ok': (
+                data.get(f'{prefix}_expiry') == 'on'
+                if check.equipment.requires_expiry_check
+                else check.expiry_ok
+            ),
+        }
+        return values, None
+
+    def apply_values(self, check, values):
+        """Apply parsed values to a row. Returns True if anything changed."""
+        changed = False
+        for field, value in values.items():
+            if getattr(check, field) != value:
+                setattr(check, field, value)
+                changed = True
+        return changed
+
+    def save_checklist(self, audit, data):
+        """
+        Validate a full checklist submission and persist the changed rows.
+
+        Args:
+            audit: Audit whose equipment checklist is being saved
+            data: Submitted form data (request.POST)
+
+        Returns:
+            Number of AuditEquipment rows updated.
+
+        Raises:
+            ChecklistValidationError: if any item has an invalid value.
+                Nothing is written in that case.
+        """
+        from audit.models import AuditEquipment
+
+        checks = list(
+            AuditEquipment.objects.filter(audit=audit)
+            .select_related('equipment')
+            .order_by('equipment__category__sort_order', 'equipment__sort_order')
+        )
+
+        parsed = []
+        errors = []
+        for check in checks:
+            values, error = self.parse_item(check, data)
+            if error:
+                errors.append(error)
+            else:
+                parsed.append((check, values))
+
+        if errors:
+            raise ChecklistValidationError(errors)
+
+        now = timezone.now()
+        changed = []
+        for check, values in parsed:
+            if self.apply_values(check, values):
+                check.updated_at = now
+                changed.append(check)
+
+        if changed:
+            with transaction.atomic():
+                self.lock_audit(audit.pk)
+                AuditEquipment.objects.bulk_update(
+                    changed, self.UPDATE_FIELDS + ['updated_at'],
+                )
+
+        return len(changed)
+
+    def save_item(self, check, data):
+        """
+        Validate and persist the submitted values of a single row.
+
+        Args:
+            check: AuditEquipment instance with equipment loaded
+            data: Submitted form data containing only this row's fields
+
+        Returns:
+            True if the row changed.
+
+        Raises:
+            ChecklistValidationError: if a value is invalid; nothing is
+                written in that case.
+        """
+        values, error = self.parse_item(check, data)
+        if error:
+            raise ChecklistValidationError([error])
+        with transaction.atomic():
+            self.lock_audit(check.audit_id)
+            # The row may have been written by a sync upload since it was read
+            check.refresh_from_db(fields=self.UPDATE_FIELDS + ['updated_at'])
+            if not self.apply_values(check, values):
+                return False
+            check.save(update_fields=self.UPDATE_FIELDS + ['updated_at'])
+        return True
+
+    def progress(self, audit):
+        """
+        Running equipment result of an audit, from one aggregate query.
+
+        Returns:
+            Dict with the equipment score (0-100, as the audit would be
+            scored now), the number of items passing and the item total.
+        """
+        from .compliance import ComplianceScorer
+
+        scorer = ComplianceScorer(engine='sql')
+        counts = scorer.get_equipment_counts([audit.pk]).get(audit.pk, (0, 0, 0, 0))
+        critical_pass, critical_total, non_critical_pass, non_critical_total = counts
+        return {
+            'score': scorer.equipment_score_from_counts(*counts),
+            'passed': critical_pass + non_critical_pass,
+            'total': critical_total + non_critical_total,
+            'critical_failed': critical_total - critical_pass,
+        }
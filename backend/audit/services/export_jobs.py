@@ -0,0 +1,167 @@
+"""
+Background export jobs for the REdI Trolley Audit System.
+
+Large exports are built outside the request cycle: the web view records an
+ExportJob and the run_export_jobs worker builds the file into media storage,
+reporting progress as it goes, while the browser polls for completion.
+
+Requests are deduplicated by a hash of their parameters - a pending or
+running job, or a completed artifact younger than EXPORT_ARTIFACT_REUSE
+seconds, is returned instead of starting another build. Jobs are claimed
+with a conditional UPDATE, so several workers can poll the same table.
+"""
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import Q
+from django.utils import timezone
+
+from .exports import ExportService
+
+logger = logging.getLogger(__name__)
+
+
+class ExportJobService:
+    """Queue, deduplicate and run export jobs."""
+
+    DEFAULT_ARTIFACT_REUSE = 600  # seconds a finished file is reused
+    DEFAULT_ARTIFACT_TTL = 24 * 60 * 60  # seconds before a file is purged
+    RUNNING_TIMEOUT = 60 * 60  # seconds before a running job is presumed dead
+
+    @property
+    def artifact_reuse(self):
+        return getattr(settings, 'EXPORT_ARTIFACT_REUSE', self.DEFAULT_ARTIFACT_REUSE)
+
+    @property
+    def artifact_ttl(self):
+        return getattr(settings, 'EXPORT_ARTIFACT_TTL', self.DEFAULT_ARTIFACT_TTL)
+
+    @staticmethod
+    def params_hash(export_type, export_format):
+        """Stable hash identifying identical export requests."""
+        params = {'type': export_type, 'format': export_format}
+        encoded = json.dumps(params, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def request_export(self, export_type, export_format, user=None):
+        """
+        Return a job for the export, reusing an identical one when possible.
+
+        Returns:
+            (job, created) tuple.
+
+        Raises:
+            ValueError: if export_type or export_format is not supported.
+        """
+        from audit.models import ExportJob
+
+        if export_type not in ExportService.EXPORT_TYPES:
+            raise ValueError(f'Unknown export type: {export_type}')
+        if export_format not in dict(ExportJob.FORMAT_CHOICES):
+            raise ValueError(f'Unknown export format: {export_format}')
+
+        params_hash = self.params_hash(export_type, export_format)
+        reuse_after = timezone.now() - timedelta(seconds=self.artifact_reuse)
+        existing = (
+            ExportJob.objects.filter(params_hash=params_hash)
+            .filter(
+                Q(status__in=['Pending', 'Running'])
+                | Q(status='Completed', completed_at__gte=reuse_after)
+            )
+            .order_by('-created_at')
+            .first()
+        )
+        if existing is not None:
+            return existing, False
+
+        job = ExportJob.objects.create(
+            export_type=export_type,
+            export_format=export_format,
+            params_hash=params_hash,
+            requested_by=user,
+        )
+        return job, True
+
+    def claim_next(self):
+        """
+        Claim the oldest pending job for this worker.
+
+        Returns:
+            The claimed ExportJob (now Running), or None if the queue is empty.
+        """
+        from audit.models import ExportJob
+
+        pending = ExportJob.objects.filter(status='Pending').order_by('created_at')
+        for job_id in pending.values_list('pk', flat=True)[:10]:
+            claimed = ExportJob.objects.filter(pk=job_id, status='Pending').update(
+                status='Running',
+                started_at=timezone.now(),
+            )
+            if claimed:
+                return ExportJob.objects.get(pk=job_id)
+        return None
+
+    def requeue_stale(self):
+        """Return jobs left Running by a worker that died to the queue."""
+        from audit.models import ExportJob
+
+        cutoff = timezone.now() - timedelta(seconds=self.RUNNING_TIMEOUT)
+        return ExportJob.objects.filter(
+            status='Running', started_at__lt=cutoff,
+        ).update(status='Pending', started_at=None, rows_written=0)
+
+    def run_job(self, job):
+        """Build the export file for a claimed job and record the outcome."""
+        from audit.models import ExportJob
+
+        def report(rows_written):
+            ExportJob.objects.filter(pk=job.pk).update(rows_written=rows_written)
+
+        exporter = ExportService(progress=report)
+        try:
+            job.total_rows = exporter.count_rows(job.export_type)
+            job.save(update_fields=['total_rows'])
+
+            with tempfile.TemporaryFile() as artifact:
+                if job.export_format == 'xlsx':
+                    exporter.write_xlsx(job.export_type, artifact)
+                else:
+                    for line in exporter.iter_csv(job.export_type):
+                        artifact.write(line.encode('utf-8'))
+                artifact.seek(0)
+                job.file.save(job.filename, File(artifact), save=False)
+        except Exception as e:
+            logger.exception('Export job %s failed', job.pk)
+            job.status = 'Failed'
+            job.error = str(e)
+            job.completed_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'completed_at'])
+            return job
+
+        job.refresh_from_db(fields=['rows_written'])
+        job.status = 'Completed'
+        job.completed_at = timezone.now()
+        job.save(update_fields=['status', 'file', 'completed_at'])
+        return job
+
+    def purge_expired(self):
+        """Delete export files and jobs older than the artifact TTL."""
+        from audit.models import ExportJob
+
+        cutoff = timezone.now() - timedelta(seconds=self.artifact_ttl)
+        expired = ExportJob.objects.filter(
+            created_at__lt=cutoff,
+            status__in=['Completed', 'Failed'],
+        )
+        count = 0
+        for job in expired.iterator():
+            if job.file:
+                job.file.delete(save=False)
+            job.delete()
+            count += 1
+        return count
@@ -0,0 +1,225 @@
+"""
+Data export for the REdI Trolley Audit System.
+
+Produces the rows for the audit, issue and location exports. Rows are read
+with values_list() and QuerySet.iterator(), so no model instances are built
+and only one chunk of rows is held in memory at a time regardless of how
+many rows are exported.
+
+Excel files are written with a write-only openpyxl workbook. Column widths
+must be fixed before the first row is written, so they are sized from the
+header and the first XLSX_WIDTH_SAMPLE_ROWS rows instead of a second pass
+over the finished sheet.
+"""
+import csv
+from itertools import islice
+
+
+class Echo:
+    """File-like object whose write() returns the value instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _number(value):
+    return float(value) if value else ''
+
+
+def _date(value, default=''):
+    return value.strftime('%Y-%m-%d') if value else default
+
+
+class ExportService:
+    """Generate export rows for audits, issues and locations."""
+
+    EXPORT_TYPES = ('audits', 'issues', 'locations')
+    CHUNK_SIZE = 2000
+
+    HEADERS = {
+        'audits': [
+            'Location', 'Service Line', 'Audit Date', 'Auditor',
+            'Overall %', 'Documentation %', 'Equipment %',
+            'Condition %', 'Checks %', 'Status',
+        ],
+        'issues': [
+            'Issue #', 'Location', 'Category', 'Severity',
+            'Title', 'Status', 'Reported Date', 'Assigned To',
+            'Escalation Level',
+        ],
+        'locations': [
+            'Department', 'Display Name', 'Service Line', 'Building',
+            'Level', 'Operating Hours', 'Has Paed Box', 'Defib Type',
+            'Last Audit', 'Last Compliance %', 'Status',
+        ],
+    }
+
+    XLSX_WIDTH_SAMPLE_ROWS = 1000
+    XLSX_MAX_COLUMN_WIDTH = 50
+    XLSX_HEADER_COLOR = '1B3A5F'
+
+    def __init__(self, chunk_size=None, progress=None):
+        """
+        Args:
+            chunk_size: Rows fetched per database round trip
+            progress: Optional callable receiving the number of data rows
+                produced so far; called once per chunk and at the end
+        """
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.progress = progress
+
+    def get_queryset(self, export_type):
+        """Base queryset of the records exported for export_type."""
+        from audit.models import Audit, Issue, Location
+
+        if export_type == 'audits':
+            return Audit.objects.filter(submission_status='Submitted')
+        if export_type == 'issues':
+            return Issue.objects.all()
+        if export_type == 'locations':
+            return Location.objects.all()
+        raise ValueError(f'Unknown export type: {export_type}')
+
+    def count_rows(self, export_type):
+        """Number of data rows (excluding the header) an export will contain."""
+        return self.get_queryset(export_type).count()
+
+    def iter_rows(self, export_type):
+        """
+        Yield the header row followed by every data row for an export.
+
+        Raises:
+            ValueError: if export_type is not one of EXPORT_TYPES.
+        """
+        if export_type not in self.EXPORT_TYPES:
+            raise ValueError(f'Unknown export type: {export_type}')
+        yield self.HEADERS[export_type]
+
+        written = 0
+        for row in getattr(self, f'_{export_type}_rows')():
+            yield row
+            written += 1
+            if self.progress and written % self.chunk_size == 0:
+                self.progress(written)
+        if self.progress:
+            self.progress(written)
+
+    def iter_csv(self, export_type):
+        """Yield the export as encoded CSV lines, one row at a time."""
+        writer = csv.writer(Echo())
+        for row in self.iter_rows(export_type):
+            yield writer.writerow(row)
+
+    @classmethod
+    def column_widths(cls, rows):
+        """Width for each column: longest non-empty value + 2, capped."""
+        lengths = {}
+        for row in rows:
+            for index, value in enumerate(row):
+                length = len(str(value)) if value else 0
+                lengths[index] = max(lengths.get(index, 0), length)
+        return [
+            min(lengths[index] + 2, cls.XLSX_MAX_COLUMN_WIDTH)
+            for index in sorted(lengths)
+        ]
+
+    def write_xlsx(self, export_type, fileobj):
+        """
+        Write the export as an Excel workbook to a binary file object.
+
+        Raises:
+            ImportError: if openpyxl is not installed.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        rows = self.iter_rows(export_type)
+        header = next(rows)
+        sample = list(islice(rows, self.XLSX_WIDTH_SAMPLE_ROWS))
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=export_type.capitalize())
+        for index, width in enumerate(self.column_widths([header] + sample), 1):
+            ws.column_dimensions[get_column_letter(index)].width = width
+
+        header_font = Font(bold=True, color='FFFFFF')
+        header_fill = PatternFill(
+            start_color=self.XLSX_HEADER_COLOR,
+            end_color=self.XLSX_HEADER_COLOR,
+            fill_type='solid',
+        )
+        header_cells = []
+        for value in header:
+            cell = WriteOnlyCell(ws, value=value)
+            cell.font = header_font
+            cell.fill = header_fill
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        for row in sample:
+            ws.append(row)
+        for row in rows:
+            ws.append(row)
+
+        wb.save(fileobj)
+
+    def _audits_rows(self):
+        rows = self.get_queryset('audits').values_list(
+            'location__display_name', 'location__service_line__abbreviation',
+            'completed_at', 'auditor_name', 'overall_compliance',
+            'document_score', 'equipment_score', 'condition_score',
+            'check_score', 'submission_status',
+        )
+        for (
+            location, service_line, completed_at, auditor, overall,
+            documents, equipment, condition, checks, status,
+        ) in rows.iterator(chunk_size=self.chunk_size):
+            yield [
+                location, service_line, _date(completed_at), auditor,
+                _number(overall), _number(documents), _number(equipment),
+                _number(condition), _number(checks), status,
+            ]
+
+    def _issues_rows(self):
+        rows = self.get_queryset('issues').values_list(
+            'issue_number', 'location__display_name', 'issue_category',
+            'severity', 'title', 'status', 'reported_date', 'assigned_to',
+            'escalation_level',
+        )
+        for (
+            number, location, category, severity, title, status,
+            reported_date, assigned_to, escalation_level,
+        ) in rows.iterator(chunk_size=self.chunk_size):
+            yield [
+                number, location, category, severity, title, status,
+                _date(reported_date), assigned_to, escalation_level,
+            ]
+
+    def _locations_rows(self):
+        from audit.models import Location
+
+        operating_hours = dict(Location._meta.get_field('operating_hours').flatchoices)
+        defib_types = dict(Location._meta.get_field('defibrillator_type').flatchoices)
+
+        rows = self.get_queryset('locations').values_list(
+            'department_name', 'display_name', 'service_line__abbreviation',
+            'building', 'level', 'operating_hours', 'has_paediatric_box',
+            'defibrillator_type', 'last_audit_date', 'last_audit_compliance',
+            'status',
+        )
+        for (
+            department, display_name, service_line, building, level, hours,
+            has_paediatric_box, defib_type, last_audit_date, last_compliance,
+            status,
+        ) in rows.iterator(chunk_size=self.chunk_size):
+            yield [
+                department, display_name, service_line, building, level,
+                operating_hours.get(hours, hours),
+                'Yes' if has_paediatric_box else 'No',
+                defib_types.get(defib_type, defib_type),
+                _date(last_audit_date, default='Never'),
+                float(last_compliance) if last_compliance else 'N/A',
+                status,
+            ]
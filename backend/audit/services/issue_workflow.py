@@ -4,10 +4,18 @@ Issue state machine and workflow service for the REdI Trolley Audit System.
 Implements a 7-state issue lifecycle with SLA-based auto-escalation:
 Open -> Assigned -> InProgress -> PendingVerification -> Resolved -> Closed
 With Escalated branch and Reopen paths.
+
+The nightly SLA sweep (escalate_breached) works on sets of issues: breaches
+are found in SQL and escalated with one UPDATE plus bulk comment inserts.
 """
 from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
+from audit.metrics import ISSUE_TRANSITIONS
+
 
 class InvalidTransitionError(Exception):
     """Raised when an invalid state transition is attempted."""
@@ -36,8 +44,17 @@ class IssueWorkflow:
         'Low': 240,       # 10 business days
     }
 
+    DEFAULT_SLA_HOURS = 240
+
     MAX_ESCALATION_LEVEL = 5
 
+    CLOSED_STATUSES = ('Resolved', 'Closed')
+
+    # Statuses from which an issue can move to Escalated
+    ESCALATABLE_STATUSES = tuple(
+        status for status, allowed in TRANSITIONS.items() if 'Escalated' in allowed
+    )
+
     def can_transition(self, issue, new_status):
         """Check if a state transition is valid."""
         current = issue.status
@@ -96,6 +113,7 @@ class IssueWorkflow:
 
         issue.status = new_status
         issue.save()
+        ISSUE_TRANSITIONS.labels(new_status).inc()
 
         # Add a comment about the transition
         from audit.models import IssueComment
@@ -152,7 +170,7 @@ class IssueWorkflow:
 
     def get_sla_target(self, issue):
         """Calculate the SLA target date for an issue based on severity."""
-        hours = self.SLA_HOURS.get(issue.severity, 240)
+        hours = self.SLA_HOURS.get(issue.severity, self.DEFAULT_SLA_HOURS)
         if issue.reported_date:
             return issue.reported_date + timedelta(hours=hours)
         return None
@@ -166,6 +184,95 @@ class IssueWorkflow:
             return False
         return timezone.now() > target
 
+    def sla_breach_q(self, now=None):
+        """
+        Q matching issues reported longer ago than their severity's SLA.
+
+        Equivalent to is_sla_breached() for open issues, but evaluated in
+        SQL as one reported_date cutoff per severity.
+        """
+        now = now or timezone.now()
+        condition = Q(
+            ~Q(severity__in=list(self.SLA_HOURS)),
+            reported_date__lt=now - timedelta(hours=self.DEFAULT_SLA_HOURS),
+        )
+        for severity, hours in self.SLA_HOURS.items():
+            condition |= Q(
+                severity=severity,
+                reported_date__lt=now - timedelta(hours=hours),
+            )
+        return condition
+
+    def get_breached_issues(self, now=None):
+        """Open issues that have breached their SLA."""
+        from audit.models import Issue
+        return Issue.objects.exclude(
+            status__in=self.CLOSED_STATUSES,
+        ).filter(self.sla_breach_q(now))
+
+    def escalate_breached(self, now=None):
+        """
+        Escalate every open issue that has breached its SLA.
+
+        Issues that can move to Escalated and are below MAX_ESCALATION_LEVEL
+        are escalated with a single UPDATE, and their transition comments
+        are written with bulk inserts, all in one transaction. No
+        notifications are sent; that is left to the caller.
+
+        Returns:
+            (escalated_ids, not_escalated_count): primary keys of escalated
+            issues, and the number of breached issues that could not be
+            escalated (already escalated, awaiting verification or at the
+            maximum level).
+        """
+        from audit.models import Issue, IssueComment
+
+        from .dashboard import DashboardStatsService
+
+        now = now or timezone.now()
+        escalatable = self.get_breached_issues(now).filter(
+            status__in=self.ESCALATABLE_STATUSES,
+            escalation_level__lt=self.MAX_ESCALATION_LEVEL,
+        )
+
+        with transaction.atomic():
+            rows = list(
+                escalatable.select_for_update()
+                .order_by()
+                .values_list('pk', 'status', 'severity')
+            )
+            if rows:
+                # Update exactly the locked rows; re-running the breach filter
+                # could pick up issues that started matching in between
+                Issue.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                    status='Escalated',
+                    escalation_level=F('escalation_level') + 1,
+                    updated_at=now,
+                )
+                IssueComment.objects.bulk_create(
+                    [
+                        IssueComment(
+                            issue_id=pk,
+                            comment_text=(
+                                f"Status changed from '{status}' to 'Escalated'. "
+                                f"Escalated: SLA breached ({severity} severity)"
+                            ),
+                            comment_by='System',
+                            is_internal=True,
+                        )
+                        for pk, status, severity in rows
+                    ],
+                    batch_size=1000,
+                )
+                transaction.on_commit(DashboardStatsService.invalidate)
+                transaction.on_commit(
+                    lambda: ISSUE_TRANSITIONS.labels('Escalated').inc(len(rows))
+                )
+
+        escalated_ids = [pk for pk, _, _ in rows]
+        not_escalated = self.get_breached_issues(now).count() - len(escalated_ids)
+        return escalated_ids, not_escalated
+
     def check_and_auto_escalate(self, issue):
         """
         Check SLA and auto-escalate if breached.
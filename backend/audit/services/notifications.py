@@ -10,14 +10,33 @@ Sends notifications for:
 6. Weekly random selection (to MERT educators)
 
 Supports Power Automate HTTP trigger API and Django SMTP fallback.
+
+Notifications are not sent inside the request: _send_email() writes them to
+the outbound email queue (see email_queue.py) and the send_queued_email
+worker delivers them through deliver().
+
+SLA warnings are digested when NOTIFICATION_DIGEST_WINDOW is positive: they
+are recorded as PendingNotification rows per recipient, and flush_digests()
+later sends each recipient a single summary of everything pending once
+their oldest notice has waited for the window. A backlog sweep therefore
+produces one email per recipient instead of one per issue. Critical-issue
+alerts are sent immediately unless NOTIFICATION_DIGEST_CRITICAL is also set.
 """
 import logging
+from collections import defaultdict
+from datetime import timedelta
 
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
 from django.utils.html import escape, strip_tags
 
+from audit.metrics import EMAILS
+
 from .email_backend import PowerAutomateEmailService
+from .recipients import RecipientDirectory
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +44,8 @@ logger = logging.getLogger(__name__)
 class NotificationService:
     """Send email notifications for audit system events."""
 
+    DEFAULT_DIGEST_WINDOW = 300  # seconds
+
     def __init__(self):
         self.subject_prefix = getattr(
             settings, 'EMAIL_SUBJECT_PREFIX', '[REdI] ',
@@ -36,10 +57,53 @@ class NotificationService:
         else:
             self._backend = 'django'
             self._pa_service = None
+        self.directory = RecipientDirectory()
+
+    @property
+    def digest_window(self):
+        return getattr(settings, 'NOTIFICATION_DIGEST_WINDOW', self.DEFAULT_DIGEST_WINDOW)
+
+    @property
+    def digest_critical(self):
+        return getattr(settings, 'NOTIFICATION_DIGEST_CRITICAL', False) and self.digest_window > 0
 
     def _send_email(self, to, subject, body, importance='Normal'):
         """
-        Send email using configured backend.
+        Queue an email for background delivery.
+
+        The queue row is written in the caller's transaction, so the email
+        is only sent if the change that triggered it commits.
+
+        Args:
+            to: Recipient(s) - semicolon-separated string or list of strings.
+            subject: Email subject.
+            body: HTML email body.
+            importance: Email importance level.
+
+        Returns:
+            True if the email was queued, False if it had no recipients.
+        """
+        from .email_queue import EmailQueue
+
+        recipients = to.split(';') if isinstance(to, str) else to
+        recipients = [r.strip() for r in recipients if r.strip()]
+        if not recipients:
+            logger.warning('No recipients for email: %s', subject)
+            return False
+        EmailQueue().enqueue(
+            to=';'.join(recipients),
+            subject=subject,
+            body=body,
+            importance=importance,
+        )
+        return True
+
+    def deliver(self, to, subject, body, importance='Normal'):
+        """
+        Send an email immediately using the configured backend.
+
+        Called by the send_queued_email worker; views should use the
+        notify_* methods, which queue instead.
 
         Args:
             to: Recipient(s) - semicolon-separated string for Power Automate,
@@ -47,7 +111,15 @@ class NotificationService:
             subject: Email subject.
             body: HTML email body.
             importance: Email importance level.
+
+        Returns:
+            True if sent successfully, False otherwise.
         """
+        sent = self._deliver(to, subject, body, importance)
+        EMAILS.labels(self._backend, 'sent' if sent else 'failed').inc()
+        return sent
+
+    def _deliver(self, to, subject, body, importance):
         if self._backend == 'power_automate' and self._pa_service:
             return self._pa_service.send(
                 to=to if isinstance(to, str) else ';'.join(to),
@@ -115,6 +187,22 @@ class NotificationService:
         if issue.severity != 'Critical':
             return
 
+        recipients = self._get_educator_emails()
+        if not recipients:
+            return
+        if self.digest_critical:
+            self._record_pending('Critical Issue', [(issue, recipients)])
+            return
+
+        subject, body = self._critical_issue_message(issue)
+        self._send_email(
+            to=';'.join(recipients),
+            subject=subject,
+            body=body,
+            importance='High',
+        )
+
+    def _critical_issue_message(self, issue):
         subject = f'{self.subject_prefix}CRITICAL Issue: {issue.title}'
         body = (
             f"<h2>Critical Issue Reported</h2>"
@@ -125,15 +213,7 @@ class NotificationService:
             f"<p><strong>Reported by:</strong> {escape(issue.reported_by)}</p>"
             f"<p><strong>SLA Target:</strong> {issue.target_resolution_date}</p>"
         )
-
-        recipients = self._get_educator_emails()
-        if recipients:
-            self._send_email(
-                to=';'.join(recipients),
-                subject=subject,
-                body=body,
-                importance='High',
-            )
+        return subject, body
 
     def notify_issue_assigned(self, issue):
         """Notify the assigned person about their new issue."""
@@ -147,24 +227,52 @@ class NotificationService:
             f"<p><strong>Target Resolution:</strong> {issue.target_resolution_date}</p>"
         )
 
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        try:
-            user = User.objects.get(username=issue.assigned_to)
-            if user.email:
-                self._send_email(
-                    to=user.email,
-                    subject=subject,
-                    body=body,
-                )
-        except User.DoesNotExist:
+        email = self.directory.user_email(issue.assigned_to)
+        if email is None:
             logger.warning(
                 'Cannot notify assigned user: %s not found',
                 issue.assigned_to,
             )
+        elif email:
+            self._send_email(
+                to=email,
+                subject=subject,
+                body=body,
+            )
 
     def notify_sla_warning(self, issue):
         """Send SLA breach warning."""
+        self.notify_sla_warnings([issue])
+
+    def notify_sla_warnings(self, issues):
+        """
+        Send SLA breach warnings for several issues.
+
+        Issues should have location__service_line loaded.
+        """
+        educators = self._get_educator_emails()
+        warnings = []
+        for issue in issues:
+            recipients = self._get_service_line_contacts(issue.location.service_line)
+            recipients.extend(educators)
+            recipients = list(set(recipients))
+            if recipients:
+                warnings.append((issue, recipients))
+
+        if self.digest_window > 0:
+            self._record_pending('SLA Warning', warnings)
+            return
+
+        for issue, recipients in warnings:
+            subject, body = self._sla_warning_message(issue)
+            self._send_email(
+                to=';'.join(recipients),
+                subject=subject,
+                body=body,
+                importance='High',
+            )
+
+    def _sla_warning_message(self, issue):
         subject = f'{self.subject_prefix}SLA WARNING: {issue.issue_number} - {issue.title}'
         body = (
             f"<h2>SLA Breach Warning</h2>"
@@ -175,18 +283,7 @@ class NotificationService:
             f"<p><strong>Target Date:</strong> {issue.target_resolution_date}</p>"
             f"<p><strong>Escalation Level:</strong> {issue.escalation_level}</p>"
         )
-
-        recipients = self._get_service_line_contacts(issue.location.service_line)
-        recipients.extend(self._get_educator_emails())
-        recipients = list(set(recipients))
-
-        if recipients:
-            self._send_email(
-                to=';'.join(recipients),
-                subject=subject,
-                body=body,
-                importance='High',
-            )
+        return subject, body
 
     def notify_weekly_selection(self, selection):
         """Notify educators about new weekly selection."""
@@ -225,6 +322,113 @@ class NotificationService:
                 body=body,
             )
 
+    # -- Digests --------------------------------------------------------------
+
+    def _record_pending(self, kind, notices):
+        """Store (issue, recipients) notices for a later digest."""
+        from audit.models import PendingNotification
+
+        PendingNotification.objects.bulk_create([
+            PendingNotification(kind=kind, recipient=recipient, issue=issue)
+            for issue, recipients in notices
+            for recipient in recipients
+        ])
+
+    def flush_digests(self, now=None):
+        """
+        Send a digest to every recipient whose oldest pending notice has
+        waited for the digest window.
+
+        Returns:
+            Number of digest emails queued.
+        """
+        from audit.models import PendingNotification
+
+        now = now or timezone.now()
+        cutoff = now - timedelta(seconds=max(self.digest_window, 0))
+        due = list(
+            PendingNotification.objects.filter(digested_at__isnull=True)
+            .values('recipient')
+            .annotate(oldest=Min('created_at'))
+            .filter(oldest__lte=cutoff)
+            .values_list('recipient', flat=True)
+        )
+
+        queued = 0
+        for recipient in due:
+            with transaction.atomic():
+                pending = list(
+                    PendingNotification.objects.select_for_update(
+                        skip_locked=True, of=('self',),
+                    )
+                    .filter(recipient=recipient, digested_at__isnull=True)
+                    .select_related('issue__location')
+                )
+                if not pending:
+                    continue
+                email = self._send_digest(recipient, pending)
+                PendingNotification.objects.filter(
+                    pk__in=[notice.pk for notice in pending],
+                ).update(digested_at=now, digest=email)
+                queued += 1
+        return queued
+
+    def _send_digest(self, recipient, pending):
+        """Queue one email covering every pending notice for a recipient."""
+        from .email_queue import EmailQueue
+
+        notices = {}
+        for notice in pending:
+            notices.setdefault((notice.kind, notice.issue_id), notice)
+        notices = sorted(
+            notices.values(),
+            key=lambda n: (n.kind != 'Critical Issue', n.issue.issue_number),
+        )
+
+        if len(notices) == 1:
+            issue = notices[0].issue
+            if notices[0].kind == 'Critical Issue':
+                subject, body = self._critical_issue_message(issue)
+            else:
+                subject, body = self._sla_warning_message(issue)
+        else:
+            subject, body = self._digest_message(notices)
+
+        return EmailQueue().enqueue(
+            to=recipient,
+            subject=subject,
+            body=body,
+            importance='High',
+        )
+
+    def _digest_message(self, notices):
+        counts = defaultdict(int)
+        for notice in notices:
+            counts[notice.kind] += 1
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+
+        subject = f'{self.subject_prefix}Issue Digest: {len(notices)} issues need attention'
+        rows = ''.join([
+            f"<tr><td>{notice.kind}</td>"
+            f"<td>{escape(notice.issue.issue_number)}</td>"
+            f"<td>{escape(notice.issue.title)}</td>"
+            f"<td>{escape(notice.issue.location.display_name)}</td>"
+            f"<td>{notice.issue.severity}</td>"
+            f"<td>{notice.issue.status}</td>"
+            f"<td>{notice.issue.target_resolution_date}</td>"
+            f"<td>{notice.issue.escalation_level}</td></tr>"
+            for notice in notices
+        ])
+        body = (
+            f"<h2>Issue Digest</h2>"
+            f"<p><strong>Summary:</strong> {summary}</p>"
+            f"<table border='1' cellpadding='8' cellspacing='0' style='border-collapse: collapse;'>"
+            f"<thead><tr><th>Notice</th><th>Issue</th><th>Title</th><th>Location</th>"
+            f"<th>Severity</th><th>Status</th><th>Target Date</th><th>Escalation</th></tr></thead>"
+            f"<tbody>{rows}</tbody></table>"
+        )
+        return subject, body
+
     def _get_service_line_contacts(self, service_line):
         """Get email addresses for a service line."""
         emails = []
@@ -234,11 +438,4 @@ class NotificationService:
 
     def _get_educator_emails(self):
         """Get email addresses of all MERT educators."""
-        from django.contrib.auth.models import Group
-        try:
-            group = Group.objects.get(name='MERT Educator')
-            return list(group.user_set.filter(
-                email__isnull=False,
-            ).exclude(email='').values_list('email', flat=True))
-        except Group.DoesNotExist:
-            return []
+        return self.directory.group_emails('MERT Educator')
@@ -0,0 +1,109 @@
+"""
+Notification recipient directory for the REdI Trolley Audit System.
+
+Resolves role groups and usernames to email addresses through Django's
+cache framework, so sending a notification does not query the auth tables
+each time. Entries expire after RECIPIENT_CACHE_TIMEOUT seconds and are
+invalidated by signal receivers (see audit/signals.py) whenever a user,
+a group or group membership changes.
+
+Keys carry a version stamp that invalidate() bumps, matching the dashboard
+and equipment template caches. As with those, lookups are only cached when
+the default cache is shared between workers (REDIS_URL); otherwise a user
+removed from a group in one worker would keep receiving notifications sent
+from the others until their entries expired.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from audit.cache_versions import bump_version, cache_is_shared, get_version
+
+
+class RecipientDirectory:
+    """Cached lookup of notification email addresses."""
+
+    CACHE_PREFIX = 'audit:recipients'
+    VERSION_KEY = 'audit:recipients:version'
+    DEFAULT_TIMEOUT = 600  # seconds
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'RECIPIENT_CACHE_TIMEOUT', self.DEFAULT_TIMEOUT)
+
+    def _prefix(self):
+        version = get_version(self.VERSION_KEY)
+        return f'{self.CACHE_PREFIX}:v{version}'
+
+    def group_emails(self, group_name):
+        """Email addresses of every member of a role group (empty if none)."""
+        from django.contrib.auth import get_user_model
+
+        def query():
+            return list(
+                get_user_model().objects.filter(groups__name=group_name)
+                .exclude(email='')
+                .exclude(email__isnull=True)
+                .values_list('email', flat=True)
+                .distinct()
+            )
+
+        if not cache_is_shared():
+            return query()
+        key = f'{self._prefix()}:group:{group_name}'
+        emails = cache.get(key)
+        if emails is None:
+            emails = query()
+            cache.set(key, emails, self.timeout)
+        return emails
+
+    def user_emails(self, usernames):
+        """
+        Resolve usernames to email addresses with at most one query.
+
+        Returns:
+            Dict of username to email; unknown users are omitted and users
+            without an address map to ''.
+        """
+        from django.contrib.auth import get_user_model
+
+        usernames = {name for name in usernames if name}
+        if not usernames:
+            return {}
+
+        shared = cache_is_shared()
+        resolved = {}
+        if shared:
+            prefix = self._prefix()
+            keys = {f'{prefix}:user:{name}': name for name in usernames}
+            cached = cache.get_many(keys)
+            # Unknown users are cached as None so they are not looked up again
+            resolved = {keys[key]: email for key, email in cached.items()}
+
+        missing = usernames - resolved.keys()
+        if missing:
+            found = dict(
+                get_user_model().objects.filter(username__in=missing)
+                .values_list('username', 'email')
+            )
+            fetched = {name: found.get(name) for name in missing}
+            if shared:
+                cache.set_many(
+                    {f'{prefix}:user:{name}': email for name, email in fetched.items()},
+                    self.timeout,
+                )
+            resolved.update(fetched)
+
+        return {
+            name: email or ''
+            for name, email in resolved.items()
+            if email is not None
+        }
+
+    def user_email(self, username):
+        """Email address for one username; None if the user does not exist."""
+        return self.user_emails([username]).get(username)
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate every cached recipient lookup."""
+        bump_version(cls.VERSION_KEY)
@@ -0,0 +1,152 @@
+"""
+Per-view request metrics for the REdI Trolley Audit System.
+
+RequestMetricsMiddleware reports each request here. Samples are summed in
+memory per URL name and added to the ViewMetric table at most once every
+REQUEST_METRICS_FLUSH_INTERVAL seconds per process, with one
+UPDATE ... SET x = x + n per view, so recording a request costs no database
+work and the totals still cover every worker process.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = [0.0]
+
+
+class RequestMetrics:
+    """Record, persist and report per-view request metrics."""
+
+    DEFAULT_FLUSH_INTERVAL = 30  # seconds
+
+    TOTAL_FIELDS = (
+        'requests', 'query_count', 'db_time_ms', 'template_time_ms',
+        'total_time_ms', 'response_bytes',
+    )
+    MAX_FIELDS = ('max_queries', 'max_time_ms')
+
+    SORT_KEYS = {
+        'queries': 'avg_queries',
+        'db_time': 'db_time_ms',
+        'time': 'avg_time_ms',
+        'total_time': 'total_time_ms',
+        'requests': 'requests',
+        'bytes': 'avg_response_bytes',
+    }
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'REQUEST_METRICS_FLUSH_INTERVAL', self.DEFAULT_FLUSH_INTERVAL)
+
+    def record(self, url_name, queries, db_time_ms, template_time_ms,
+               total_time_ms, response_bytes):
+        """Add one request's measurements to the in-memory totals."""
+        with _lock:
+            totals = _pending.get(url_name)
+            if totals is None:
+                totals = _pending[url_name] = dict.fromkeys(
+                    self.TOTAL_FIELDS + self.MAX_FIELDS, 0,
+                )
+            totals['requests'] += 1
+            totals['query_count'] += queries
+            totals['db_time_ms'] += db_time_ms
+            totals['template_time_ms'] += template_time_ms
+            totals['total_time_ms'] += total_time_ms
+            totals['response_bytes'] += response_bytes
+            totals['max_queries'] = max(totals['max_queries'], queries)
+            totals['max_time_ms'] = max(totals['max_time_ms'], total_time_ms)
+
+    def flush_due(self):
+        return time.monotonic() - _last_flush[0] >= self.flush_interval
+
+    def flush(self):
+        """
+        Add this process's pending totals to the ViewMetric table.
+
+        Returns:
+            Number of views updated.
+        """
+        with _lock:
+            pending = dict(_pending)
+            _pending.clear()
+            _last_flush[0] = time.monotonic()
+
+        for url_name, totals in pending.items():
+            if self._increment(url_name, totals):
+                continue
+            try:
+                with transaction.atomic():
+                    self._create(url_name, totals)
+            except IntegrityError:
+                # Another process created the row first
+                self._increment(url_name, totals)
+        return len(pending)
+
+    def _increment(self, url_name, totals):
+        from audit.models import ViewMetric
+
+        updates = {field: F(field) + totals[field] for field in self.TOTAL_FIELDS}
+        updates.update(
+            {field: Greatest(F(field), totals[field]) for field in self.MAX_FIELDS}
+        )
+        return ViewMetric.objects.filter(url_name=url_name).update(**updates)
+
+    def _create(self, url_name, totals):
+        from audit.models import ViewMetric
+
+        ViewMetric.objects.create(url_name=url_name, **totals)
+
+    def report(self, sort='queries', limit=20):
+        """
+        The top views by a sort key.
+
+        Args:
+            sort: One of SORT_KEYS
+            limit: Maximum number of views returned (None for all)
+
+        Returns:
+            List of dicts with totals and per-request averages.
+
+        Raises:
+            ValueError: if sort is not a known key.
+        """
+        from audit.models import ViewMetric
+
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f'Unknown sort key: {sort}')
+
+        metrics = sorted(
+            ViewMetric.objects.filter(requests__gt=0),
+            key=lambda metric: getattr(metric, self.SORT_KEYS[sort]),
+            reverse=True,
+        )[:limit]
+        return [
+            {
+                'view': metric.url_name,
+                'requests': metric.requests,
+                'avg_queries': round(metric.avg_queries, 1),
+                'max_queries': metric.max_queries,
+                'avg_db_time_ms': round(metric.avg_db_time_ms, 2),
+                'avg_template_time_ms': round(metric.avg_template_time_ms, 2),
+                'avg_time_ms': round(metric.avg_time_ms, 2),
+                'max_time_ms': round(metric.max_time_ms, 2),
+                'db_time_ms': round(metric.db_time_ms, 2),
+                'total_time_ms': round(metric.total_time_ms, 2),
+                'avg_response_bytes': round(metric.avg_response_bytes),
+            }
+            for metric in metrics
+        ]
+
+    def reset(self):
+        """Discard pending and stored metrics."""
+        from audit.models import ViewMetric
+
+        with _lock:
+            _pending.clear()
+        return ViewMetric.objects.all().delete()[0]
@@ -0,0 +1,148 @@
+"""
+Batch rescoring of historical audits for the REdI Trolley Audit System.
+
+Used when the ComplianceScorer weights change. Audits are streamed in
+keyset-paginated chunks (ordered by primary key), each chunk is scored
+with set-based queries and written back with bulk_update:
+- 1 query loads the chunk with documents, condition and checks joined
+- 1 conditional-aggregate query counts equipment passes (SQL engine)
+- 1 bulk UPDATE writes the component and overall scores
+- 1 UPDATE refreshes Location.last_audit_compliance for touched locations
+
+Chunks can optionally be scored in a process pool; see rescore_chunk().
+Audits are scored with one ScoringProfile (the active one by default) and
+stamped with it; stale_only restricts a run to audits scored with another
+profile version.
+"""
+from django.db import transaction
+from django.db.models import OuterRef, Q, Subquery
+
+from .compliance import ComplianceScorer
+
+
+class AuditRescorer:
+    """Recompute stored compliance scores for existing audits."""
+
+    DEFAULT_STATUSES = ('Submitted', 'Reviewed')
+    DEFAULT_CHUNK_SIZE = 1000
+
+    def __init__(self, statuses=None, chunk_size=None, profile=None, stale_only=False):
+        self.statuses = tuple(statuses or self.DEFAULT_STATUSES)
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK_SIZE
+        self.stale_only = stale_only
+        self.scorer = ComplianceScorer(engine='sql', profile=profile)
+
+    @property
+    def profile(self):
+        return self.scorer.profile
+
+    def get_queryset(self):
+        """Audits eligible for rescoring."""
+        from audit.models import Audit
+        qs = Audit.objects.filter(submission_status__in=self.statuses)
+        if self.stale_only and self.profile is not None:
+            qs = qs.filter(
+                Q(scoring_profile__isnull=True) | ~Q(scoring_profile=self.profile),
+            )
+        return qs
+
+    def count(self, start_after=None):
+        """Number of audits left to rescore after an optional checkpoint."""
+        qs = self.get_queryset()
+        if start_after is not None:
+            qs = qs.filter(pk__gt=start_after)
+        return qs.count()
+
+    def iter_id_chunks(self, start_after=None):
+        """
+        Yield lists of audit primary keys in ascending order.
+
+        Uses keyset pagination (pk > last seen) rather than OFFSET, so every
+        chunk costs the same regardless of how deep into history it is.
+        """
+        last_pk = start_after
+        while True:
+            qs = self.get_queryset().order_by('pk')
+            if last_pk is not None:
+                qs = qs.filter(pk__gt=last_pk)
+            ids = list(qs.values_list('pk', flat=True)[:self.chunk_size])
+            if not ids:
+                return
+            yield ids
+            last_pk = ids[-1]
+
+    def rescore_ids(self, audit_ids, dry_run=False):
+        """
+        Rescore one chunk of audits.
+
+        Returns:
+            (scored, changed) tuple: audits scored and audits whose stored
+            scores differed from the recalculated ones.
+        """
+        from audit.models import Audit
+
+        audits = list(
+            Audit.objects.filter(pk__in=audit_ids)
+            .select_related('documents', 'condition', 'checks')
+            .order_by()
+        )
+        equipment_scores = self.scorer.calculate_equipment_scores(
+            [audit.pk for audit in audits],
+        )
+
+        changed = []
+        for audit in audits:
+            scores = self.scorer.calculate_component_scores(
+                audit, equip_score=equipment_scores[audit.pk],
+            )
+            if (
+                any(getattr(audit, field) != value for field, value in scores.items())
+                or audit.scoring_profile_id != getattr(self.profile, 'pk', None)
+            ):
+                for field, value in scores.items():
+                    setattr(audit, field, value)
+                audit.scoring_profile = self.profile
+                changed.append(audit)
+
+        if changed and not dry_run:
+            with transaction.atomic():
+                Audit.objects.bulk_update(
+                    changed, ComplianceScorer.SCORE_FIELDS + ['scoring_profile'],
+                )
+                self.refresh_location_compliance(
+                    {audit.location_id for audit in changed},
+                )
+
+        return len(audits), len(changed)
+
+    def refresh_location_compliance(self, location_ids):
+        """Set last_audit_compliance from each location's latest submitted audit."""
+        from audit.models import Audit, Location
+
+        latest = (
+            Audit.objects.filter(
+                location=OuterRef('pk'),
+                submission_status__in=('Submitted', 'Reviewed'),
+                completed_at__isnull=False,
+            )
+            .order_by('-completed_at')
+            .values('overall_compliance')[:1]
+        )
+        Location.objects.filter(pk__in=location_ids).update(
+            last_audit_compliance=Subquery(latest),
+        )
+
+
+def init_worker():
+    """Process pool initializer for spawned workers: load Django settings."""
+    import django
+    django.setup()
+
+
+def rescore_chunk(audit_ids, statuses=None, profile_id=None, dry_run=False):
+    """Process pool entry point: rescore one chunk of audit ids."""
+    from audit.models import ScoringProfile
+
+    profile = ScoringProfile.objects.get(pk=profile_id) if profile_id else None
+    rescorer = AuditRescorer(statuses=statuses, profile=profile)
+    return rescorer.rescore_ids(audit_ids, dry_run=dry_run)
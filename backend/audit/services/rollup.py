@@ -0,0 +1,256 @@
+"""
+Monthly compliance rollup for the REdI Trolley Audit System.
+
+Report charts and dashboard summaries read pre-aggregated ComplianceRollup
+rows (one per month and location) instead of aggregating the Audit table
+on every request, so their cost depends on the number of months and
+locations rather than on audit history.
+
+- record_audit() adds a newly submitted audit to its month with a single
+  UPDATE ... SET x = x + n (rows are created on first use)
+- remove_audit() takes a deleted audit back out of its month
+- move_location() re-files a location's rows under its new service line
+- rebuild() recomputes every row from the Audit table in one GROUP BY
+
+Months are calendar months in the project time zone, matching TruncMonth.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .dashboard import DashboardStatsService
+
+
+class ComplianceRollupService:
+    """Maintain and query the ComplianceRollup table."""
+
+    STATUSES = ('Submitted',)
+
+    @staticmethod
+    def month_for(moment):
+        """Return the first day of the local calendar month containing moment."""
+        return timezone.localtime(moment).date().replace(day=1)
+
+    @staticmethod
+    def trailing_year_start(today=None):
+        """First month of the trailing twelve-month reporting window."""
+        today = today or timezone.localdate()
+        return (today - timedelta(days=365)).replace(day=1)
+
+    def record_audit(self, audit):
+        """
+        Add a submitted audit to its monthly rollup row.
+
+        Call once per audit, inside the transaction that submits it.
+        """
+        from audit.models import ComplianceRollup
+
+        if audit.completed_at is None:
+            return
+
+        month = self.month_for(audit.completed_at)
+        compliance = audit.overall_compliance
+        increments = {
+            'audit_count': 1,
+            'scored_count': 0 if compliance is None else 1,
+            'compliance_total': compliance or Decimal('0'),
+        }
+
+        if self._increment(month, audit.location_id, increments):
+            return
+        try:
+            with transaction.atomic():
+                ComplianceRollup.objects.create(
+                    month=month,
+                    location_id=audit.location_id,
+                    service_line_id=audit.location.service_line_id,
+                    **increments,
+                )
+        except IntegrityError:
+            # Another submission created the row first
+            self._increment(month, audit.location_id, increments)
+
+    def remove_audit(self, audit):
+        """
+        Take a deleted audit back out of its monthly rollup row.
+
+        Does nothing for audits that were never counted (not submitted).
+        Rows left without audits are deleted, as rebuild() would not
+        create them.
+        """
+        from audit.models import ComplianceRollup
+
+        if audit.submission_status not in self.STATUSES or audit.completed_at is None:
+            return
+
+        month = self.month_for(audit.completed_at)
+        compliance = audit.overall_compliance
+        decrements = {
+            'audit_count': 1,
+            'scored_count': 0 if compliance is None else 1,
+            'compliance_total': compliance or Decimal('0'),
+        }
+        # The guards keep a row that never counted this audit from going negative
+        ComplianceRollup.objects.filter(
+            month=month,
+            location_id=audit.location_id,
+            audit_count__gte=decrements['audit_count'],
+            scored_count__gte=decrements['scored_count'],
+        ).update(
+            updated_at=timezone.now(),
+            **{field: F(field) - value for field, value in decrements.items()},
+        )
+        ComplianceRollup.objects.filter(
+            month=month, location_id=audit.location_id, audit_count=0,
+        ).delete()
+
+    def move_location(self, location):
+        """Re-file a location's rollup rows under its current service line."""
+        from audit.models import ComplianceRollup
+
+        ComplianceRollup.objects.filter(location=location).exclude(
+            service_line_id=location.service_line_id,
+        ).update(service_line_id=location.service_line_id, updated_at=timezone.now())
+
+    def _increment(self, month, location_id, increments):
+        from audit.models import ComplianceRollup
+
+        return ComplianceRollup.objects.filter(
+            month=month, location_id=location_id,
+        ).update(
+            updated_at=timezone.now(),
+            **{field: F(field) + value for field, value in increments.items()},
+        )
+
+    def rebuild(self):
+        """
+        Recompute the whole rollup table from submitted audits.
+
+        Returns:
+            Number of rollup rows written.
+        """
+        from audit.models import Audit, ComplianceRollup
+
+        groups = (
+            Audit.objects.filter(
+                submission_status__in=self.STATUSES,
+                completed_at__isnull=False,
+            )
+            .annotate(month=TruncMonth('completed_at', output_field=DateField()))
+            .values('month', 'location_id', 'location__service_line_id')
+            .annotate(
+                audit_count=Count('id'),
+                scored_count=Count('overall_compliance'),
+                compliance_total=Sum('overall_compliance'),
+            )
+            .order_by()
+        )
+
+        rows = [
+            ComplianceRollup(
+                month=group['month'],
+                location_id=group['location_id'],
+                service_line_id=group['location__service_line_id'],
+                audit_count=group['audit_count'],
+                scored_count=group['scored_count'],
+                compliance_total=group['compliance_total'] or Decimal('0'),
+            )
+            for group in groups
+        ]
+
+        with transaction.atomic():
+            ComplianceRollup.objects.all().delete()
+            ComplianceRollup.objects.bulk_create(rows)
+            transaction.on_commit(DashboardStatsService.invalidate)
+
+        return len(rows)
+
+    # -- Queries ------------------------------------------------------------
+
+    @staticmethod
+    def _average(total, count):
+        if not count:
+            return None
+        return total / count
+
+    def monthly_series(self, since):
+        """
+        Monthly totals across all locations from since onwards.
+
+        Returns:
+            List of dicts with month, audit_count and avg_compliance keys,
+            in month order.
+        """
+        from audit.models import ComplianceRollup
+
+        rows = (
+            ComplianceRollup.objects.filter(month__gte=since)
+            .values('month')
+            .annotate(
+                audits=Sum('audit_count'),
+                scored=Sum('scored_count'),
+                total=Sum('compliance_total'),
+            )
+            .order_by('month')
+        )
+        return [
+            {
+                'month': row['month'],
+                'audit_count': row['audits'],
+                'avg_compliance': self._average(row['total'], row['scored']),
+            }
+            for row in rows
+        ]
+
+    def totals(self):
+        """Overall (audit_count, avg_compliance) across every rollup row."""
+        from audit.models import ComplianceRollup
+
+        agg = ComplianceRollup.objects.aggregate(
+            audits=Sum('audit_count'),
+            scored=Sum('scored_count'),
+            total=Sum('compliance_total'),
+        )
+        return agg['audits'] or 0, self._average(agg['total'], agg['scored'])
+
+    def service_line_stats(self):
+        """
+        Active service lines annotated from the rollup.
+
+        Each ServiceLine gets location_count (active locations), audit_count
+        and avg_compliance attributes. Costs two queries.
+        """
+        from audit.models import ComplianceRollup, ServiceLine
+
+        service_lines = list(
+            ServiceLine.objects.filter(is_active=True)
+            .annotate(
+                location_count=Count(
+                    'locations',
+                    filter=Q(locations__status='Active'),
+                ),
+            )
+            .order_by('name')
+        )
+
+        totals = {
+            row['service_line_id']: row
+            for row in ComplianceRollup.objects.values('service_line_id').annotate(
+                audits=Sum('audit_count'),
+                scored=Sum('scored_count'),
+                total=Sum('compliance_total'),
+            ).order_by()
+        }
+
+        for service_line in service_lines:
+            row = totals.get(service_line.pk)
+            service_line.audit_count = row['audits'] if row else 0
+            service_line.avg_compliance = (
+                self._average(row['total'], row['scored']) if row else None
+            )
+
+        return service_lines
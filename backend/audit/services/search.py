@@ -0,0 +1,269 @@
+"""
+Full-text search for the REdI Trolley Audit System.
+
+Locations, issues (title, description and public comments) and equipment
+items (name, short name and S/4HANA code) are copied into SearchDocument
+rows. Signal receivers (see audit/signals.py) re-index an object whenever
+it or its comments change; rebuild() recreates the whole index.
+
+Queries run against the backend's full-text index created by migration
+0009:
+
+- PostgreSQL: a generated tsvector column (title weighted above body) with
+  a GIN index, ranked with ts_rank
+- SQLite: an FTS5 table with the porter tokenizer, ranked with bm25
+
+Every search term is matched as a prefix and all terms must match, so
+"defib lifep" finds "LIFEPAK 1000 defibrillator". Other backends fall back
+to unranked case-insensitive LIKE matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+class SearchService:
+    """Index and search locations, issues and equipment."""
+
+    KINDS = ('location', 'issue', 'equipment')
+    # Fields copied into each kind's document; saves touching none of
+    # them (e.g. issue status transitions) leave the document as it is
+    INDEXED_FIELDS = {
+        'location': {'display_name', 'department_name', 'building', 'level', 'service_line'},
+        'issue': {'issue_number', 'title', 'description'},
+        'equipment': {'item_name', 'short_name', 's4hana_code', 'category'},
+    }
+    TEXT_SEARCH_CONFIG = 'english'  # must match migration 0009
+    DEFAULT_LIMIT = 20
+    MAX_TERMS = 8
+    BATCH_SIZE = 500
+
+    # -- Indexing -----------------------------------------------------------
+
+    def kind_of(self, obj):
+        """The document kind for a model instance, or None if not indexed."""
+        from audit.models import Equipment, Issue, Location
+
+        for model, kind in ((Location, 'location'), (Issue, 'issue'), (Equipment, 'equipment')):
+            if isinstance(obj, model):
+                return kind
+        return None
+
+    def document_for(self, obj):
+        """
+        Build the searchable text of an object.
+
+        Returns:
+            (kind, title, body) tuple.
+        """
+        kind = self.kind_of(obj)
+        if kind == 'location':
+            title = obj.display_name
+            parts = [
+                obj.department_name, obj.building, obj.level,
+                obj.service_line.name, obj.service_line.abbreviation,
+            ]
+        elif kind == 'issue':
+            title = f'{obj.issue_number} {obj.title}'.strip()
+            parts = [obj.description]
+            parts.extend(
+                comment.comment_text for comment in obj.comments.all()
+                if not comment.is_internal
+            )
+        elif kind == 'equipment':
+            title = obj.item_name
+            parts = [obj.short_name, obj.s4hana_code, obj.category.category_name]
+        else:
+            raise ValueError(f'{type(obj).__name__} is not searchable')
+        return kind, title[:400], '\n'.join(part for part in parts if part)
+
+    def index(self, obj, update_fields=None):
+        """
+        Add or refresh the search document of one object.
+
+        Args:
+            obj: Location, Issue or Equipment instance
+            update_fields: The update_fields of the save, if any; the
+                document is left alone when none of them are indexed
+        """
+        from audit.models import SearchDocument
+
+        if update_fields is not None and not self.INDEXED_FIELDS[self.kind_of(obj)] & set(update_fields):
+            return
+        kind, title, body = self.document_for(obj)
+        SearchDocument.objects.update_or_create(
+            kind=kind, object_id=obj.pk, defaults={'title': title, 'body': body},
+        )
+
+    def remove(self, obj):
+        """Drop the search document of one object."""
+        from audit.models import SearchDocument
+
+        SearchDocument.objects.filter(kind=self.kind_of(obj), object_id=obj.pk).delete()
+
+    def rebuild(self):
+        """
+        Recreate the index from scratch.
+
+        Returns:
+            Number of documents written.
+        """
+        from audit.models import Equipment, Issue, Location, SearchDocument
+
+        querysets = [
+            Location.objects.select_related('service_line'),
+            Issue.objects.prefetch_related('comments'),
+            Equipment.objects.select_related('category'),
+        ]
+        SearchDocument.objects.all().delete()
+        written = 0
+        for qs in querysets:
+            batch = []
+            for obj in qs.order_by().iterator(chunk_size=self.BATCH_SIZE):
+                kind, title, body = self.document_for(obj)
+                batch.append(SearchDocument(kind=kind, object_id=obj.pk, title=title, body=body))
+                if len(batch) >= self.BATCH_SIZE:
+                    SearchDocument.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            written += len(batch)
+        return written
+
+    # -- Searching ----------------------------------------------------------
+
+    def terms(self, query):
+        """Lower-cased word tokens of a user query (at most MAX_TERMS)."""
+        return re.findall(r'\w+', (query or '').lower())[:self.MAX_TERMS]
+
+    def search(self, query, kinds=None, limit=DEFAULT_LIMIT):
+        """
+        Ranked search across the index.
+
+        Args:
+            query: Free text typed by the user
+            kinds: Optional iterable restricting results to some KINDS
+            limit: Maximum number of results
+
+        Returns:
+            List of dicts with kind, id, title and rank, best match first.
+        """
+        return [
+            {'kind': kind, 'id': object_id, 'title': title, 'rank': round(rank, 4)}
+            for kind, object_id, title, rank in self._query(query, kinds, limit)
+        ]
+
+    def filter(self, queryset, kind, query):
+        """
+        Restrict a queryset to the objects of one kind matching a query.
+
+        The match runs as a subquery against the full-text index, so list
+        views keep their own ordering and pagination. A query without
+        search terms leaves the queryset unchanged.
+        """
+        terms = self.terms(query)
+        if not terms:
+            return queryset
+
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            sql = (
+                'SELECT object_id FROM audit_searchdocument '
+                'WHERE kind = %s AND search_vector @@ to_tsquery(%s, %s)'
+            )
+            params = (kind, self.TEXT_SEARCH_CONFIG, self._tsquery(terms))
+        elif vendor == 'sqlite':
+            sql = (
+                'SELECT d.object_id FROM audit_searchdocument_fts '
+                'CROSS JOIN audit_searchdocument d ON d.id = audit_searchdocument_fts.rowid '
+                'WHERE audit_searchdocument_fts MATCH %s AND d.kind = %s'
+            )
+            params = (self._fts_query(terms), kind)
+        else:
+            return queryset.filter(
+                pk__in=self._fallback_queryset(terms, [kind]).values('object_id'),
+            )
+        return queryset.filter(pk__in=RawSQL(sql, params))
+
+    def _tsquery(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def _fts_query(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def _query(self, query, kinds, limit):
+        from audit.models import SearchDocument
+
+        terms = self.terms(query)
+        if not terms:
+            return []
+        kinds = [kind for kind in (kinds or self.KINDS) if kind in self.KINDS]
+        if not kinds:
+            return []
+
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            rows = self._query_postgresql(terms, kinds, limit)
+        elif vendor == 'sqlite':
+            rows = self._query_sqlite(terms, kinds, limit)
+        else:
+            return self._query_fallback(terms, kinds, limit)
+
+        to_uuid = SearchDocument._meta.get_field('object_id').to_python
+        return [(kind, to_uuid(object_id), title, rank) for kind, object_id, title, rank in rows]
+
+    def _execute(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _query_postgresql(self, terms, kinds, limit):
+        sql = f"""
+            SELECT kind, object_id, title, ts_rank(search_vector, query) AS rank
+            FROM audit_searchdocument, to_tsquery(%s, %s) query
+            WHERE search_vector @@ query AND kind IN ({', '.join(['%s'] * len(kinds))})
+            ORDER BY rank DESC, title
+        """
+        params = [self.TEXT_SEARCH_CONFIG, self._tsquery(terms), *kinds]
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        return self._execute(sql, params)
+
+    def _query_sqlite(self, terms, kinds, limit):
+        # bm25 is lower for better matches; title matches weigh 10x body.
+        # CROSS JOIN makes SQLite run the MATCH once and then look documents
+        # up by rowid, instead of evaluating it for every document of a kind.
+        sql = f"""
+            SELECT d.kind, d.object_id, d.title,
+                   -bm25(audit_searchdocument_fts, 10.0, 1.0) AS rank
+            FROM audit_searchdocument_fts
+            CROSS JOIN audit_searchdocument d ON d.id = audit_searchdocument_fts.rowid
+            WHERE audit_searchdocument_fts MATCH %s
+              AND d.kind IN ({', '.join(['%s'] * len(kinds))})
+            ORDER BY rank DESC, d.title
+        """
+        params = [self._fts_query(terms), *kinds]
+        if limit:
+            sql += ' LIMIT %s'
+            params.append(limit)
+        return self._execute(sql, params)
+
+    def _fallback_queryset(self, terms, kinds):
+        from audit.models import SearchDocument
+
+        qs = SearchDocument.objects.filter(kind__in=kinds)
+        for term in terms:
+            qs = qs.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        return qs
+
+    def _query_fallback(self, terms, kinds, limit):
+        rows = (
+            self._fallback_queryset(terms, kinds)
+            .order_by('title').values_list('kind', 'object_id', 'title')
+        )
+        if limit:
+            rows = rows[:limit]
+        return [(kind, object_id, title, 0.0) for kind, object_id, title in rows]
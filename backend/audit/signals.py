@@ -0,0 +1,160 @@
+"""
+Signal receivers for the REdI Trolley Audit System.
+
+Keeps derived, cached data in step with the models it is computed from.
+Connected in AuditConfig.ready().
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .mixins import invalidate_user_roles
+from .models import (
+    Audit,
+    Equipment,
+    Issue,
+    IssueComment,
+    Location,
+    RandomAuditSelection,
+    RandomAuditSelectionItem,
+    ScoringProfile,
+    ServiceLine,
+)
+from .services.audit_builder import AuditBuilder
+from .services.compliance import invalidate_profile_cache
+from .services.dashboard import DashboardStatsService
+from .services.recipients import RecipientDirectory
+from .services.rollup import ComplianceRollupService
+from .services.search import SearchService
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Equipment)
+@receiver(post_delete, sender=Equipment)
+def invalidate_equipment_templates(sender, **kwargs):
+    """Drop cached equipment templates when the catalogue changes."""
+    AuditBuilder.invalidate_templates()
+
+
+@receiver(post_save, sender=ScoringProfile)
+@receiver(post_delete, sender=ScoringProfile)
+def invalidate_scoring_profile(sender, **kwargs):
+    """Reload scoring weights in every process when a profile changes."""
+    invalidate_profile_cache()
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=ServiceLine)
+@receiver(post_delete, sender=ServiceLine)
+@receiver(post_save, sender=RandomAuditSelection)
+@receiver(post_delete, sender=RandomAuditSelection)
+@receiver(post_save, sender=RandomAuditSelectionItem)
+@receiver(post_delete, sender=RandomAuditSelectionItem)
+def invalidate_dashboard(sender, **kwargs):
+    """Refresh dashboard statistics once the change is committed."""
+    transaction.on_commit(DashboardStatsService.invalidate)
+
+
+@receiver(post_save, sender=Audit)
+@receiver(post_delete, sender=Audit)
+def invalidate_dashboard_for_audit(sender, instance, **kwargs):
+    """Only submitted audits appear on the dashboard; skip wizard saves."""
+    if instance.submission_status in ('Submitted', 'Reviewed'):
+        transaction.on_commit(DashboardStatsService.invalidate)
+
+
+@receiver(post_delete, sender=Audit)
+def remove_audit_from_rollup(sender, instance, **kwargs):
+    """Deleted audits no longer count towards the monthly rollup."""
+    ComplianceRollupService().remove_audit(instance)
+
+
+@receiver(post_save, sender=Location)
+def move_location_rollups(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Report a location's history under its current service line."""
+    if raw or created:
+        return
+    if update_fields is not None and not {'service_line', 'service_line_id'} & set(update_fields):
+        return  # e.g. recording the last audit on submission
+    ComplianceRollupService().move_location(instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_recipients(sender, update_fields=None, **kwargs):
+    """Re-resolve notification recipients after user or group changes."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # Every login saves the user; addresses are unchanged
+    transaction.on_commit(RecipientDirectory.invalidate)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_roles(sender, created=True, **kwargs):
+    """Drop cached role sets when users, groups or memberships change."""
+    if sender is User and not created:
+        return  # Editing a user does not change their groups
+    if kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    # Bump now so this request sees the change, and again on commit so a
+    # concurrent request cannot re-cache the old roles in between
+    invalidate_user_roles()
+    transaction.on_commit(invalidate_user_roles)
+
+
+@receiver(post_save, sender=Issue)
+def count_created_issue(sender, instance, created, **kwargs):
+    """Count new issues by severity once they are committed."""
+    if created:
+        counter = metrics.ISSUES_CREATED.labels(instance.severity)
+        transaction.on_commit(counter.inc)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Equipment)
+def index_search_document(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Keep the full-text search index in step with searchable objects."""
+    if not raw:
+        SearchService().index(instance, update_fields=update_fields)
+
+
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Equipment)
+def remove_search_document(sender, instance, **kwargs):
+    SearchService().remove(instance)
+
+
+@receiver(post_save, sender=IssueComment)
+@receiver(post_delete, sender=IssueComment)
+def index_issue_comments(sender, instance, raw=False, **kwargs):
+    """Public comments are part of their issue's search document."""
+    if raw or instance.is_internal:
+        return
+    issue = Issue.objects.filter(pk=instance.issue_id).first()
+    if issue is not None:
+        SearchService().index(issue)
+
+
+@receiver(post_save, sender=ServiceLine)
+def index_service_line_locations(sender, instance, created, raw=False, **kwargs):
+    """Location documents include their service line's name."""
+    if raw or created:
+        return
+    service = SearchService()
+    for location in instance.locations.select_related('service_line'):
+        service.index(location)
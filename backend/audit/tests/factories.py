@@ -4,11 +4,14 @@ Test factories for the REdI Trolley Audit System.
 Provides helper functions to create test data for models.
 Uses Django's ORM directly (no factory_boy dependency).
 """
+import shutil
+import tempfile
 from datetime import date, timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.test import override_settings
 from django.utils import timezone
 
 from audit.models import (
@@ -216,3 +219,21 @@ def setup_all_roles():
         group, _ = Group.objects.get_or_create(name=name)
         groups.append(group)
     return groups
+
+
+def use_shared_cache(test):
+    """
+    Point the default cache at a file-based cache for the rest of a test.
+
+    Caches that must follow database changes are only used when the cache
+    is shared between workers (see audit/cache_versions.py); LocMem, the
+    test default, is not.
+    """
+    cache_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+    shared_cache = override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': cache_dir,
+    }})
+    shared_cache.enable()
+    test.addCleanup(shared_cache.disable)
@@ -0,0 +1,283 @@
+"""Tests for audit app management commands."""
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from audit.models import (
+    ComplianceRollup,
+    ExportJob,
+    Issue,
+    OutboundEmail,
+    ScoringProfile,
+    SearchDocument,
+)
+from audit.services.compliance import invalidate_profile_cache
+
+from .factories import (
+    create_audit,
+    create_audit_checks,
+    create_audit_condition,
+    create_audit_documents,
+    create_audit_equipment,
+    create_issue,
+    create_location,
+)
+
+
+class RescoreAuditsCommandTest(TestCase):
+    """Tests for the rescore_audits command."""
+
+    def setUp(self):
+        invalidate_profile_cache()
+        self.addCleanup(invalidate_profile_cache)
+        self.location = create_location()
+        self.audits = []
+        for _ in range(3):
+            audit = create_audit(
+                location=self.location,
+                submission_status='Submitted',
+                completed_at=timezone.now(),
+                overall_compliance=Decimal('1.00'),
+            )
+            create_audit_documents(audit)
+            create_audit_condition(audit)
+            create_audit_checks(audit)
+            create_audit_equipment(audit)
+            self.audits.append(audit)
+        self.draft = create_audit(location=self.location, submission_status='InProgress')
+
+    def test_rescores_submitted_audits(self):
+        out = StringIO()
+        call_command('rescore_audits', '--chunk-size', '2', stdout=out)
+        for audit in self.audits:
+            audit.refresh_from_db()
+            self.assertEqual(audit.overall_compliance, Decimal('100.00'))
+            self.assertEqual(audit.equipment_score, Decimal('100.00'))
+        self.draft.refresh_from_db()
+        self.assertIsNone(self.draft.overall_compliance)
+        self.location.refresh_from_db()
+        self.assertEqual(self.location.last_audit_compliance, Decimal('100.00'))
+        self.assertIn('Scored: 3, Changed: 3', out.getvalue())
+        self.assertEqual(
+            ComplianceRollup.objects.get().compliance_total, Decimal('300.00'),
+        )
+
+    def test_dry_run_saves_nothing(self):
+        call_command('rescore_audits', '--dry-run', stdout=StringIO())
+        for audit in self.audits:
+            audit.refresh_from_db()
+            self.assertEqual(audit.overall_compliance, Decimal('1.00'))
+
+    def test_checkpoint_and_resume(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'rescore.json')
+            call_command(
+                'rescore_audits', '--chunk-size', '1', '--checkpoint', path,
+                stdout=StringIO(),
+            )
+            with open(path) as f:
+                checkpoint = json.load(f)
+            self.assertEqual(checkpoint['scored'], 3)
+
+            out = StringIO()
+            call_command(
+                'rescore_audits', '--checkpoint', path, '--resume', stdout=out,
+            )
+            self.assertIn('Scored: 0', out.getvalue())
+
+    def test_stale_only_skips_current_profile(self):
+        call_command('rescore_audits', stdout=StringIO())
+        ScoringProfile.objects.create(name='Revised', is_active=True)
+        out = StringIO()
+        call_command('rescore_audits', '--stale-only', stdout=out)
+        self.assertIn('Scored: 3', out.getvalue())
+        out = StringIO()
+        call_command('rescore_audits', '--stale-only', stdout=out)
+        self.assertIn('Scored: 0', out.getvalue())
+        for audit in self.audits:
+            audit.refresh_from_db()
+            self.assertEqual(audit.scoring_profile.version, 2)
+
+
+class RebuildComplianceRollupCommandTest(TestCase):
+    """Tests for the rebuild_compliance_rollup command."""
+
+    def test_rebuilds_from_submitted_audits(self):
+        location = create_location()
+        for _ in range(2):
+            create_audit(
+                location=location,
+                submission_status='Submitted',
+                completed_at=timezone.now(),
+                overall_compliance=Decimal('90.00'),
+            )
+        out = StringIO()
+        call_command('rebuild_compliance_rollup', stdout=out)
+
+        self.assertIn('1 rows', out.getvalue())
+        row = ComplianceRollup.objects.get()
+        self.assertEqual(row.audit_count, 2)
+        self.assertEqual(row.compliance_total, Decimal('180.00'))
+
+
+class RunExportJobsCommandTest(TestCase):
+    """Tests for the run_export_jobs command."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_once_processes_queue(self):
+        create_issue()
+        job = ExportJob.objects.create(
+            export_type='issues', export_format='csv', params_hash='x',
+        )
+        out = StringIO()
+        call_command('run_export_jobs', '--once', stdout=out)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Completed')
+        self.assertEqual(job.rows_written, 1)
+        self.assertIn('Processed 1 export jobs', out.getvalue())
+
+
+class CheckSlaCommandTest(TestCase):
+    """Tests for the check_sla command."""
+
+    def test_escalates_breached_issues(self):
+        breached = create_issue(severity='Critical')
+        waiting = create_issue(
+            location=breached.location, severity='Critical',
+            status='PendingVerification',
+        )
+        create_issue(location=breached.location, severity='Low')
+        Issue.objects.filter(pk__in=[breached.pk, waiting.pk]).update(
+            reported_date=timezone.now() - timedelta(days=2),
+        )
+
+        out = StringIO()
+        call_command('check_sla', stdout=out)
+
+        breached.refresh_from_db()
+        self.assertEqual(breached.status, 'Escalated')
+        self.assertIn('Checked: 3, Escalated: 1, Warned: 1', out.getvalue())
+
+
+@override_settings(
+    EMAIL_API_ENDPOINT='',
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class SendQueuedEmailCommandTest(TestCase):
+    """Tests for the send_queued_email command."""
+
+    def test_once_delivers_queue(self):
+        from django.core import mail
+
+        OutboundEmail.objects.create(
+            to='a@test.com; b@test.com', subject='Queued', body='<p>Hello</p>',
+        )
+        out = StringIO()
+        call_command('send_queued_email', '--once', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['a@test.com', 'b@test.com'])
+        self.assertEqual(OutboundEmail.objects.get().status, 'Sent')
+        self.assertIn('Sent: 1, Failed: 0', out.getvalue())
+
+
+class ViewMetricsCommandTest(TestCase):
+    """Tests for the view_metrics command."""
+
+    def test_prints_top_views(self):
+        from audit.services.request_metrics import RequestMetrics
+
+        metrics = RequestMetrics()
+        metrics.reset()
+        metrics.record('audit:audit_detail', 12, 4.0, 3.0, 20.0, 2048)
+        metrics.record('audit:dashboard', 3, 1.0, 3.0, 10.0, 1024)
+        metrics.flush()
+
+        out = StringIO()
+        call_command('view_metrics', '--top', '1', stdout=out)
+        self.assertIn('audit:audit_detail', out.getvalue())
+        self.assertNotIn('audit:dashboard', out.getvalue())
+
+        call_command('view_metrics', '--reset', stdout=out)
+        self.assertIn('Deleted metrics for 2 views', out.getvalue())
+
+
+class RebuildSearchIndexCommandTest(TestCase):
+    """Tests for the rebuild_search_index command."""
+
+    def test_rebuilds_and_skips_populated_index(self):
+        create_location()
+        SearchDocument.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_search_index', '--if-empty', stdout=out)
+        self.assertIn('Search index rebuilt: 1 documents.', out.getvalue())
+        self.assertEqual(SearchDocument.objects.count(), 1)
+
+        call_command('rebuild_search_index', '--if-empty', stdout=out)
+        self.assertIn('Search index already populated.', out.getvalue())
+
+
+class BenchmarkHarnessTest(TestCase):
+    """Tests for the dataset and runner behind the benchmark command."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_tiny_dataset_and_run(self):
+        from audit.benchmark import BenchmarkDataset, BenchmarkRunner
+        from audit.models import Audit, AuditEquipment
+
+        user = BenchmarkDataset(locations=3, audits=12, equipment=4).build()
+        self.assertEqual(Audit.objects.count(), 12)
+        self.assertEqual(AuditEquipment.objects.count(), 48)
+        self.assertTrue(Issue.objects.filter(issue_number__startswith='BENCH-').exists())
+
+        results = BenchmarkRunner(user, iterations=2).run()
+        self.assertEqual(results['dashboard']['n'], 2)
+        self.assertEqual(results['audit_submit']['n'], 2)
+        self.assertEqual(results['audit_sync']['n'], 2)
+        self.assertEqual(Audit.objects.filter(submission_status='Submitted').count(), 16)
+        for stats in results.values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+            self.assertGreater(stats['queries_max'], 0)
+
+    def test_compare_flags_regressions(self):
+        from audit.benchmark import compare
+
+        baseline = {
+            'dashboard': {'p50_ms': 10.0, 'queries_p50': 5},
+            'trolley_list': {'p50_ms': 10.0, 'queries_p50': 5},
+            'export_audits_csv': {'p50_ms': 10.0, 'queries_p50': 2},
+        }
+        current = {
+            'dashboard': {'p50_ms': 11.0, 'queries_p50': 5},
+            'trolley_list': {'p50_ms': 15.0, 'queries_p50': 5},
+            'export_audits_csv': {'p50_ms': 9.0, 'queries_p50': 3},
+        }
+        regressed = {row[0] for row in compare(baseline, current, threshold=20) if row[5]}
+        self.assertEqual(regressed, {'trolley_list', 'export_audits_csv'})
+
+    def test_query_plans_cover_hot_queries(self):
+        from audit.benchmark import hot_querysets, query_plans
+
+        create_location()
+        plans = query_plans()
+        self.assertEqual(set(plans), set(hot_querysets()))
+        self.assertTrue(all(plans.values()))
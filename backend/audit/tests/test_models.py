@@ -1,9 +1,13 @@
 """Tests for audit app models."""
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 
 from audit.models import (
-    Audit, EquipmentCategory, Issue, Location, ServiceLine,
+    Audit, EquipmentCategory, Issue, Location, ScoringProfile, ServiceLine,
 )
+from audit.services.compliance import invalidate_profile_cache
 from .factories import (
     create_audit, create_audit_period, create_equipment,
     create_equipment_category, create_issue, create_location,
@@ -94,3 +98,30 @@ class IssueModelTest(TestCase):
         issue = create_issue()
         url = issue.get_absolute_url()
         self.assertIn(str(issue.pk), url)
+
+
+class ScoringProfileModelTest(TestCase):
+    """Tests for ScoringProfile model."""
+
+    def setUp(self):
+        self.addCleanup(invalidate_profile_cache)
+
+    def test_default_profile_created_by_migration(self):
+        profile = ScoringProfile.objects.get(is_active=True)
+        self.assertEqual(profile.version, 1)
+        self.assertEqual(profile.equipment_weight, Decimal('0.40'))
+
+    def test_versions_auto_increment(self):
+        profile = ScoringProfile.objects.create(name='Revised')
+        self.assertEqual(profile.version, 2)
+        self.assertEqual(str(profile), 'v2 - Revised')
+
+    def test_activating_profile_deactivates_others(self):
+        profile = ScoringProfile.objects.create(name='Revised', is_active=True)
+        active = list(ScoringProfile.objects.filter(is_active=True))
+        self.assertEqual(active, [profile])
+
+    def test_clean_rejects_weights_not_summing_to_one(self):
+        profile = ScoringProfile(name='Broken', equipment_weight=Decimal('0.50'))
+        with self.assertRaises(ValidationError):
+            profile.clean()
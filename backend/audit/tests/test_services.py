@@ -1,14 +1,49 @@
 """Tests for audit app services."""
+import contextlib
+import json
+import shutil
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
 from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from audit.services.compliance import ComplianceScorer
+from audit.models import (
+    AuditCondition, AuditEquipment, ComplianceRollup, Equipment, ExportJob, Issue,
+    IssueComment, Location, LocationEquipment, OutboundEmail, PendingNotification,
+    ScoringProfile, SearchDocument,
+)
+from audit.services.audit_builder import AuditBuilder
+from audit.services.audit_sync import (
+    AuditSyncService, SyncConflictError, SyncValidationError,
+)
+from audit.services.compliance import (
+    ComplianceScorer, get_active_profile, invalidate_profile_cache,
+)
+from audit.services.dashboard import DashboardStatsService
+from audit.services.email_backend import PowerAutomateEmailService
+from audit.services.email_queue import EmailQueue
+from audit.services.equipment_checklist import (
+    ChecklistValidationError, EquipmentChecklistService,
+)
+from audit.services.export_jobs import ExportJobService
+from audit.services.exports import ExportService
 from audit.services.issue_workflow import InvalidTransitionError, IssueWorkflow
+from audit.services.notifications import NotificationService
+from audit.services.recipients import RecipientDirectory
+from audit.services.rollup import ComplianceRollupService
+from audit.services.search import SearchService
 from .factories import (
     create_audit, create_audit_checks, create_audit_condition,
-    create_audit_documents, create_audit_equipment, create_equipment,
-    create_equipment_category, create_issue,
+    create_audit_documents, create_audit_equipment, create_audit_period,
+    create_equipment, create_equipment_category, create_issue,
+    create_location, create_service_line, create_user, use_shared_cache,
 )
 
 
@@ -105,6 +140,752 @@ class ComplianceScorerTest(TestCase):
         self.assertIsNotNone(audit.check_score)
 
 
+class ScoringProfileScorerTest(TestCase):
+    """Tests for ComplianceScorer weights loaded from ScoringProfile."""
+
+    def setUp(self):
+        invalidate_profile_cache()
+        self.addCleanup(invalidate_profile_cache)
+
+    def _scored_audit(self):
+        audit = create_audit()
+        create_audit_documents(audit, bls_poster_present=False)
+        create_audit_condition(audit)
+        create_audit_checks(audit)
+        create_audit_equipment(audit)
+        return audit
+
+    def test_active_profile_recorded_on_audit(self):
+        audit = self._scored_audit()
+        ComplianceScorer().calculate_overall_score(audit)
+        audit.refresh_from_db()
+        self.assertEqual(audit.scoring_profile.version, 1)
+        self.assertEqual(audit.overall_compliance, Decimal('93.75'))
+
+    def test_saving_profile_reloads_weights(self):
+        self.assertEqual(get_active_profile().version, 1)
+        ScoringProfile.objects.create(
+            name='Docs heavy', is_active=True,
+            documentation_weight=Decimal('0.55'),
+            equipment_weight=Decimal('0.15'),
+            condition_weight=Decimal('0.15'),
+            check_weight=Decimal('0.15'),
+        )
+        scorer = ComplianceScorer()
+        self.assertEqual(scorer.profile.version, 2)
+        audit = self._scored_audit()
+        self.assertEqual(scorer.calculate_overall_score(audit), Decimal('86.25'))
+
+    def test_profile_is_cached_per_process(self):
+        get_active_profile()
+        with self.assertNumQueries(0):
+            ComplianceScorer()
+
+
+class SqlScoringEngineTest(TestCase):
+    """Parity tests for the SQL equipment scoring engine."""
+
+    def setUp(self):
+        self.python_scorer = ComplianceScorer()
+        self.sql_scorer = ComplianceScorer(engine='sql')
+        cat = create_equipment_category()
+        self.critical = create_equipment(category=cat, item_name='Crit', critical_item=True)
+        self.expiring = create_equipment(
+            category=cat, item_name='Drug', requires_expiry_check=True,
+        )
+        self.plain = create_equipment(category=cat, item_name='Plain')
+        self.extra = create_equipment(category=cat, item_name='Extra')
+
+    def _make_audit(self, **rows):
+        audit = create_audit()
+        create_audit_equipment(audit, equipment=self.critical, **rows.get('critical', {}))
+        create_audit_equipment(audit, equipment=self.expiring, **rows.get('expiring', {}))
+        create_audit_equipment(audit, equipment=self.plain, **rows.get('plain', {}))
+        create_audit_equipment(audit, equipment=self.extra, **rows.get('extra', {}))
+        return audit
+
+    def test_unknown_engine_rejected(self):
+        with self.assertRaises(ValueError):
+            ComplianceScorer(engine='spreadsheet')
+
+    def test_equipment_score_parity(self):
+        audits = [
+            self._make_audit(),
+            self._make_audit(critical={'is_present': False, 'quantity_found': 0}),
+            self._make_audit(expiring={'expiry_ok': False}, plain={'expiry_ok': False}),
+            self._make_audit(plain={'quantity_found': 0}, extra={'quantity_expected': 3}),
+            create_audit(),
+        ]
+        sql_scores = self.sql_scorer.calculate_equipment_scores([a.pk for a in audits])
+        for audit in audits:
+            expected = self.python_scorer.calculate_equipment_score(audit.equipment_checks.all())
+            self.assertEqual(sql_scores[audit.pk], expected)
+
+    def test_batch_scoring_uses_one_query(self):
+        audits = [self._make_audit() for _ in range(3)]
+        with self.assertNumQueries(1):
+            self.sql_scorer.calculate_equipment_scores([a.pk for a in audits])
+
+    def test_overall_score_parity(self):
+        audit = self._make_audit(
+            critical={'is_present': False, 'quantity_found': 0},
+            plain={'quantity_found': 0},
+        )
+        create_audit_documents(audit, bls_poster_present=False)
+        create_audit_condition(audit, is_clean=False)
+        create_audit_checks(audit, outside_check_count=17)
+        python_overall = self.python_scorer.calculate_overall_score(audit)
+        python_equipment = audit.equipment_score
+        sql_overall = self.sql_scorer.calculate_overall_score(audit)
+        self.assertEqual(sql_overall, python_overall)
+        self.assertEqual(audit.equipment_score, python_equipment)
+
+
+class AuditBuilderTest(TestCase):
+    """Tests for AuditBuilder service."""
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.builder = AuditBuilder()
+        self.user = create_user()
+        self.period = create_audit_period()
+        self.category = create_equipment_category()
+        self.standard = create_equipment(category=self.category, item_name='Standard')
+        self.paed = create_equipment(
+            category=self.category, item_name='Paed', is_paediatric_item=True,
+        )
+        self.airway = create_equipment(
+            category=self.category, item_name='Airway', is_altered_airway_item=True,
+        )
+        self.defib = create_equipment(
+            category=self.category, item_name='Pads',
+            required_for_defib_type='LIFEPAK_20_20e',
+        )
+        create_equipment(category=self.category, item_name='Retired', is_active=False)
+
+    def test_template_filters_by_configuration(self):
+        location = create_location()
+        ids = {pk for pk, _qty in self.builder.get_equipment_template(location)}
+        self.assertEqual(ids, {self.standard.pk})
+
+    def test_template_includes_optional_kits(self):
+        location = create_location(
+            has_paediatric_box=True, has_altered_airway=True,
+            defibrillator_type='LIFEPAK_20_20e',
+        )
+        ids = {pk for pk, _qty in self.builder.get_equipment_template(location)}
+        self.assertEqual(
+            ids, {self.standard.pk, self.paed.pk, self.airway.pk, self.defib.pk},
+        )
+
+    def test_template_invalidated_on_equipment_save(self):
+        location = create_location()
+        self.builder.get_equipment_template(location)
+        added = create_equipment(category=self.category, item_name='New Item')
+        ids = {pk for pk, _qty in self.builder.get_equipment_template(location)}
+        self.assertIn(added.pk, ids)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_template_not_cached_without_shared_cache(self):
+        location = create_location()
+        self.builder.get_equipment_template(location)
+        # Retired from another worker: no signal reaches this process's cache
+        Equipment.objects.filter(pk=self.standard.pk).update(is_active=False)
+        self.assertEqual(self.builder.get_equipment_template(location), [])
+
+    def test_start_audit_creates_sections_and_equipment(self):
+        location = create_location()
+        LocationEquipment.objects.create(
+            location=location, equipment=self.standard, custom_quantity=3,
+        )
+        audit = self.builder.start_audit(location, self.period, self.user)
+        self.assertEqual(audit.submission_status, 'InProgress')
+        self.assertIsNotNone(audit.documents)
+        self.assertIsNotNone(audit.condition)
+        self.assertEqual(audit.checks.expected_outside, 28)
+        check = audit.equipment_checks.get()
+        self.assertEqual(check.equipment, self.standard)
+        self.assertEqual(check.quantity_expected, 3)
+
+    def test_start_audit_query_count_independent_of_catalogue(self):
+        location = create_location()
+        self.builder.get_equipment_template(location)
+        with self.assertNumQueries(8):
+            self.builder.start_audit(location, self.period, self.user)
+        for i in range(20):
+            create_equipment(category=self.category, item_name=f'Extra {i}')
+        self.builder.get_equipment_template(location)
+        with self.assertNumQueries(8):
+            audit = self.builder.start_audit(location, self.period, self.user)
+        self.assertEqual(audit.equipment_checks.count(), 21)
+
+
+class EquipmentChecklistServiceTest(TestCase):
+    """Tests for EquipmentChecklistService."""
+
+    def setUp(self):
+        self.service = EquipmentChecklistService()
+        self.audit = create_audit()
+        cat = create_equipment_category()
+        self.plain = create_audit_equipment(
+            self.audit, equipment=create_equipment(category=cat, item_name='Plain'),
+        )
+        self.expiring = create_audit_equipment(
+            self.audit,
+            equipment=create_equipment(
+                category=cat, item_name='Drug', requires_expiry_check=True,
+            ),
+        )
+
+    def _payload(self, **overrides):
+        data = {}
+        for check in (self.plain, self.expiring):
+            prefix = f'equip_{check.pk}'
+            data[f'{prefix}_present'] = 'on'
+            data[f'{prefix}_qty'] = '1'
+            data[f'{prefix}_notes'] = ''
+        data[f'equip_{self.expiring.pk}_expiry'] = 'on'
+        data.update(overrides)
+        return data
+
+    def test_unchanged_rows_are_skipped(self):
+        with self.assertNumQueries(1):
+            updated = self.service.save_checklist(self.audit, self._payload())
+        self.assertEqual(updated, 0)
+
+    def test_only_changed_rows_are_updated(self):
+        data = self._payload(**{f'equip_{self.plain.pk}_qty': '0'})
+        updated = self.service.save_checklist(self.audit, data)
+        self.assertEqual(updated, 1)
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.quantity_found, 0)
+
+    def test_invalid_quantity_writes_nothing(self):
+        data = self._payload(**{
+            f'equip_{self.plain.pk}_qty': '0',
+            f'equip_{self.expiring.pk}_qty': 'abc',
+        })
+        with self.assertRaises(ChecklistValidationError) as ctx:
+            self.service.save_checklist(self.audit, data)
+        self.assertEqual(len(ctx.exception.errors), 1)
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.quantity_found, 1)
+
+    def test_expiry_kept_for_items_without_expiry_check(self):
+        data = self._payload()
+        del data[f'equip_{self.expiring.pk}_expiry']
+        self.service.save_checklist(self.audit, data)
+        self.plain.refresh_from_db()
+        self.expiring.refresh_from_db()
+        self.assertTrue(self.plain.expiry_ok)
+        self.assertFalse(self.expiring.expiry_ok)
+
+    def test_save_item_rechecks_row_written_since_it_was_read(self):
+        check = AuditEquipment.objects.select_related('equipment').get(pk=self.plain.pk)
+        # Written by a sync upload after the autosave read the row
+        AuditEquipment.objects.filter(pk=check.pk).update(quantity_found=5)
+        data = {key: value for key, value in self._payload().items() if str(check.pk) in key}
+        self.assertTrue(self.service.save_item(check, data))
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.quantity_found, 1)
+
+
+class AuditSyncServiceTest(TestCase):
+    """Tests for AuditSyncService."""
+
+    def setUp(self):
+        self.service = AuditSyncService()
+        self.audit = create_audit()
+        self.documents = create_audit_documents(self.audit, check_record_status='Missing')
+        self.condition = create_audit_condition(self.audit)
+        self.checks = create_audit_checks(self.audit)
+        cat = create_equipment_category()
+        self.plain = create_audit_equipment(
+            self.audit, equipment=create_equipment(category=cat, item_name='Plain'),
+        )
+        self.critical = create_audit_equipment(
+            self.audit,
+            equipment=create_equipment(category=cat, item_name='Defib pads', critical_item=True),
+        )
+
+    def _row(self, snapshot, check):
+        return next(row for row in snapshot['equipment'] if row['id'] == check.pk)
+
+    def test_snapshot_has_sections_rows_and_versions(self):
+        snapshot = self.service.snapshot(self.audit)
+        self.assertEqual(snapshot['submission_status'], 'InProgress')
+        self.assertEqual(snapshot['documents']['check_record_status'], 'Missing')
+        self.assertEqual(snapshot['documents']['version'], self.service.version(self.documents))
+        self.assertEqual(len(snapshot['equipment']), 2)
+        row = self._row(snapshot, self.critical)
+        self.assertTrue(row['critical'])
+        self.assertEqual(row['version'], self.service.version(self.critical))
+
+    def test_snapshot_creates_missing_sections(self):
+        audit = create_audit(location=self.audit.location)
+        snapshot = self.service.snapshot(audit)
+        self.assertEqual(snapshot['condition']['issue_type'], 'None')
+        self.assertTrue(AuditCondition.objects.filter(audit=audit).exists())
+
+    def test_apply_writes_only_changed_rows(self):
+        snapshot = self.service.snapshot(self.audit)
+        result, updated, submission = self.service.apply(self.audit, {
+            'documents': {
+                'version': snapshot['documents']['version'],
+                'check_record_status': 'Current',
+            },
+            'condition': {'version': snapshot['condition']['version'], 'is_clean': True},
+            'equipment': [{
+                'id': str(self.plain.pk),
+                'version': self._row(snapshot, self.plain)['version'],
+                'quantity_found': 3,
+                'item_notes': 'Restocked',
+            }],
+        })
+
+        self.assertEqual(updated, {'documents': 1, 'condition': 0, 'checks': 0, 'equipment': 1})
+        self.assertIsNone(submission)
+        self.documents.refresh_from_db()
+        self.plain.refresh_from_db()
+        self.assertEqual(self.documents.check_record_status, 'Current')
+        # Fields left out of the upload keep their stored values
+        self.assertTrue(self.documents.bls_poster_present)
+        self.assertTrue(self.plain.is_present)
+        self.assertEqual(self.plain.quantity_found, 3)
+        self.assertEqual(self._row(result, self.plain)['version'], self.service.version(self.plain))
+
+    def test_equipment_rows_are_written_in_constant_queries(self):
+        def sync(quantity):
+            rows = [
+                {'id': str(check.pk), 'quantity_found': quantity}
+                for check in self.audit.equipment_checks.all()
+            ]
+            with CaptureQueriesContext(connection) as ctx:
+                self.service.apply(self.audit, {'equipment': rows})
+            return len(ctx.captured_queries)
+
+        before = sync(2)
+        for i in range(10):
+            create_audit_equipment(self.audit, equipment=create_equipment(item_name=f'Item {i}'))
+        self.assertEqual(sync(4), before)
+
+    def test_invalid_values_write_nothing(self):
+        with self.assertRaises(SyncValidationError) as ctx:
+            self.service.apply(self.audit, {
+                'documents': {'check_record_status': 'Lost'},
+                'equipment': [
+                    {'id': str(self.plain.pk), 'quantity_found': 5},
+                    {'id': str(self.critical.pk), 'quantity_found': -1},
+                    {'id': str(self.critical.pk), 'is_present': 'yes'},
+                    {'id': 'not-a-row'},
+                ],
+            })
+        self.assertEqual(set(ctx.exception.errors), {
+            'documents.check_record_status', 'equipment[1].quantity_found',
+            'equipment[2]', 'equipment[3]',
+        })
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.quantity_found, 1)
+
+    def test_unknown_fields_and_sections_are_rejected(self):
+        with self.assertRaises(SyncValidationError) as ctx:
+            self.service.apply(self.audit, {'photos': []})
+        self.assertIn('photos', ctx.exception.errors)
+        with self.assertRaises(SyncValidationError) as ctx:
+            self.service.apply(self.audit, {
+                'checks': {'inside_count': 3},
+                'equipment': [{'id': str(self.plain.pk), 'quantity_expected': 9}],
+            })
+        self.assertEqual(set(ctx.exception.errors), {
+            'checks.inside_count', 'equipment[0].quantity_expected',
+        })
+
+    def test_stale_version_conflicts_and_writes_nothing(self):
+        snapshot = self.service.snapshot(self.audit)
+        # Row autosaved from another device after the snapshot was taken
+        self.plain.item_notes = 'Checked on tablet'
+        self.plain.save()
+
+        with self.assertRaises(SyncConflictError) as ctx:
+            self.service.apply(self.audit, {
+                'documents': {
+                    'version': snapshot['documents']['version'],
+                    'check_record_status': 'Current',
+                },
+                'equipment': [{
+                    'id': str(self.plain.pk),
+                    'version': self._row(snapshot, self.plain)['version'],
+                    'quantity_found': 0,
+                }],
+            })
+        [conflict] = ctx.exception.conflicts
+        self.assertEqual(conflict['id'], self.plain.pk)
+        self.assertEqual(conflict['current']['item_notes'], 'Checked on tablet')
+        self.documents.refresh_from_db()
+        self.assertEqual(self.documents.check_record_status, 'Missing')
+
+    def test_rows_without_version_overwrite(self):
+        self.plain.item_notes = 'Checked on tablet'
+        self.plain.save()
+        self.service.apply(self.audit, {
+            'equipment': [{'id': str(self.plain.pk), 'item_notes': 'Offline note'}],
+        })
+        self.plain.refresh_from_db()
+        self.assertEqual(self.plain.item_notes, 'Offline note')
+
+    def test_submit_scores_audit_and_raises_critical_issues(self):
+        result, _, submission = self.service.apply(self.audit, {
+            'equipment': [{'id': str(self.critical.pk), 'is_present': False}],
+            'submit': True,
+        })
+        overall, critical_issues = submission
+        self.audit.refresh_from_db()
+        self.assertEqual(self.audit.submission_status, 'Submitted')
+        self.assertEqual(self.audit.overall_compliance, overall)
+        self.assertEqual(result['submission_status'], 'Submitted')
+        self.assertEqual(len(critical_issues), 1)
+        self.assertEqual(critical_issues[0].equipment, self.critical.equipment)
+
+    def test_submitted_audit_conflicts(self):
+        self.audit.submission_status = 'Submitted'
+        self.audit.save()
+        with self.assertRaises(SyncConflictError) as ctx:
+            self.service.apply(self.audit, {'submit': True})
+        self.assertEqual(ctx.exception.conflicts[0]['section'], 'audit')
+
+
+class ComplianceRollupServiceTest(TestCase):
+    """Tests for ComplianceRollupService."""
+
+    def setUp(self):
+        self.service = ComplianceRollupService()
+        self.service_line = create_service_line()
+        self.location = create_location(service_line=self.service_line)
+        self.period = create_audit_period()
+
+    def _submitted(self, completed_at, compliance, location=None):
+        return create_audit(
+            location=location or self.location,
+            period=self.period,
+            submission_status='Submitted',
+            completed_at=completed_at,
+            overall_compliance=compliance,
+        )
+
+    @staticmethod
+    def _local(year, month, day, hour=12):
+        return timezone.make_aware(datetime(year, month, day, hour))
+
+    def test_record_audit_creates_then_increments(self):
+        self.service.record_audit(self._submitted(self._local(2026, 3, 2), Decimal('80.00')))
+        self.service.record_audit(self._submitted(self._local(2026, 3, 20), Decimal('90.00')))
+
+        row = ComplianceRollup.objects.get()
+        self.assertEqual(row.month, date(2026, 3, 1))
+        self.assertEqual(row.service_line, self.service_line)
+        self.assertEqual(row.audit_count, 2)
+        self.assertEqual(row.scored_count, 2)
+        self.assertEqual(row.avg_compliance, Decimal('85'))
+
+    def test_month_uses_local_time(self):
+        # 1 April 00:30 in Brisbane is still 31 March in UTC
+        audit = self._submitted(self._local(2026, 4, 1, hour=0), Decimal('70.00'))
+        self.service.record_audit(audit)
+        self.assertEqual(ComplianceRollup.objects.get().month, date(2026, 4, 1))
+
+    def test_unscored_audit_counted_but_not_averaged(self):
+        self.service.record_audit(self._submitted(self._local(2026, 3, 2), None))
+        self.service.record_audit(self._submitted(self._local(2026, 3, 3), Decimal('60.00')))
+        row = ComplianceRollup.objects.get()
+        self.assertEqual(row.audit_count, 2)
+        self.assertEqual(row.avg_compliance, Decimal('60'))
+
+    def test_deleted_audit_removed_from_rollup(self):
+        kept = self._submitted(self._local(2026, 3, 2), Decimal('80.00'))
+        deleted = self._submitted(self._local(2026, 3, 20), Decimal('90.00'))
+        self.service.record_audit(kept)
+        self.service.record_audit(deleted)
+
+        deleted.delete()
+        row = ComplianceRollup.objects.get()
+        self.assertEqual((row.audit_count, row.scored_count), (1, 1))
+        self.assertEqual(row.avg_compliance, Decimal('80'))
+
+        kept.delete()
+        self.assertFalse(ComplianceRollup.objects.exists())
+
+    def test_deleted_in_progress_audit_leaves_rollup(self):
+        self.service.record_audit(self._submitted(self._local(2026, 3, 2), Decimal('80.00')))
+        create_audit(location=self.location, period=self.period).delete()
+        self.assertEqual(ComplianceRollup.objects.get().audit_count, 1)
+
+    def test_location_moved_to_other_service_line(self):
+        self.service.record_audit(self._submitted(self._local(2026, 3, 2), Decimal('80.00')))
+        other = create_service_line(name='Surgery', abbreviation='SU')
+        self.location.service_line = other
+        self.location.save()
+
+        self.assertEqual(ComplianceRollup.objects.get().service_line, other)
+        stats = {line.pk: line.audit_count for line in self.service.service_line_stats()}
+        self.assertEqual(stats, {self.service_line.pk: 0, other.pk: 1})
+
+    def test_rebuild_matches_incremental(self):
+        other = create_location(
+            service_line=self.service_line, department_name='ICU',
+        )
+        audits = [
+            self._submitted(self._local(2026, 1, 5), Decimal('50.00')),
+            self._submitted(self._local(2026, 1, 25), Decimal('100.00')),
+            self._submitted(self._local(2026, 2, 5), Decimal('75.00'), location=other),
+        ]
+        create_audit(location=self.location, period=self.period)  # in progress
+        for audit in audits:
+            self.service.record_audit(audit)
+        incremental = set(ComplianceRollup.objects.values_list(
+            'month', 'location_id', 'audit_count', 'scored_count', 'compliance_total',
+        ))
+
+        self.assertEqual(self.service.rebuild(), 2)
+        rebuilt = set(ComplianceRollup.objects.values_list(
+            'month', 'location_id', 'audit_count', 'scored_count', 'compliance_total',
+        ))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_monthly_series_and_totals(self):
+        self._submitted(self._local(2025, 1, 5), Decimal('10.00'))
+        self._submitted(self._local(2026, 1, 5), Decimal('50.00'))
+        self._submitted(self._local(2026, 2, 5), Decimal('70.00'))
+        self._submitted(self._local(2026, 2, 6), Decimal('90.00'))
+        self.service.rebuild()
+
+        series = self.service.monthly_series(date(2026, 1, 1))
+        self.assertEqual(
+            [(row['month'], row['audit_count'], row['avg_compliance']) for row in series],
+            [(date(2026, 1, 1), 1, Decimal('50')), (date(2026, 2, 1), 2, Decimal('80'))],
+        )
+        self.assertEqual(self.service.totals(), (4, Decimal('55')))
+
+    def test_service_line_stats(self):
+        self._submitted(self._local(2026, 1, 5), Decimal('40.00'))
+        self._submitted(self._local(2026, 2, 5), Decimal('60.00'))
+        create_location(service_line=self.service_line, department_name='ICU')
+        self.service.rebuild()
+
+        with self.assertNumQueries(2):
+            stats = self.service.service_line_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].location_count, 2)
+        self.assertEqual(stats[0].audit_count, 2)
+        self.assertEqual(stats[0].avg_compliance, Decimal('50'))
+
+
+class DashboardStatsServiceTest(TestCase):
+    """Tests for DashboardStatsService."""
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.service = DashboardStatsService()
+        create_audit(
+            submission_status='Submitted',
+            completed_at=timezone.now(),
+            overall_compliance=Decimal('90.00'),
+        )
+
+    def test_second_call_served_from_cache(self):
+        self.service.get_stats()
+        with self.assertNumQueries(0):
+            stats = self.service.get_stats()
+        self.assertEqual(stats['total_locations'], 1)
+        self.assertEqual(len(stats['recent_audits']), 1)
+
+    def test_recent_audits_include_service_line(self):
+        stats = self.service.build_stats()
+        with self.assertNumQueries(0):
+            service_line = stats['recent_audits'][0].location.service_line
+        self.assertIsNotNone(service_line.abbreviation)
+
+    def test_invalidate_rebuilds(self):
+        self.service.get_stats()
+        create_location(department_name='ICU')
+        DashboardStatsService.invalidate()
+        self.assertEqual(self.service.get_stats()['total_locations'], 2)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_not_cached_without_shared_cache(self):
+        self.service.get_stats()
+        # Added from another worker: its invalidation never reaches this one
+        create_location(department_name='ICU')
+        self.assertEqual(self.service.get_stats()['total_locations'], 2)
+
+
+class ExportServiceTest(TestCase):
+    """Tests for ExportService."""
+
+    def setUp(self):
+        self.service = ExportService(chunk_size=1)
+        self.location = create_location(
+            operating_hours='24_7', has_paediatric_box=True,
+        )
+
+    def test_audit_rows(self):
+        create_audit(
+            location=self.location,
+            submission_status='Submitted',
+            completed_at=timezone.make_aware(datetime(2026, 3, 2, 12)),
+            overall_compliance=Decimal('87.50'),
+            document_score=Decimal('0'),
+        )
+        create_audit(location=self.location)  # in progress, not exported
+        with self.assertNumQueries(1):
+            rows = list(self.service.iter_rows('audits'))
+        self.assertEqual(rows[0], ExportService.HEADERS['audits'])
+        self.assertEqual(rows[1], [
+            'Emergency Dept', 'EM', '2026-03-02', 'Test Auditor',
+            87.5, '', '', '', '', 'Submitted',
+        ])
+        self.assertEqual(len(rows), 2)
+
+    def test_location_rows_use_display_values(self):
+        row = list(self.service.iter_rows('locations'))[1]
+        self.assertEqual(row[5], self.location.get_operating_hours_display())
+        self.assertEqual(row[6], 'Yes')
+        self.assertEqual(row[7], self.location.get_defibrillator_type_display())
+        self.assertEqual(row[8:10], ['Never', 'N/A'])
+
+    def test_csv_lines(self):
+        create_issue(location=self.location, title='Flat, battery')
+        lines = list(self.service.iter_csv('issues'))
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Flat, battery"', lines[1])
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            list(self.service.iter_rows('users'))
+
+    def test_column_widths(self):
+        widths = ExportService.column_widths([
+            ['Name', 'Score', 'Notes'],
+            ['A', 0, 'x' * 80],
+        ])
+        self.assertEqual(widths, [6, 7, 50])
+
+    def test_xlsx_widths_sampled_from_leading_rows(self):
+        from io import BytesIO
+
+        from openpyxl import load_workbook
+
+        self.service.XLSX_WIDTH_SAMPLE_ROWS = 1
+        create_location(department_name='Z' * 30)
+        buffer = BytesIO()
+        self.service.write_xlsx('locations', buffer)
+        ws = load_workbook(BytesIO(buffer.getvalue())).active
+        self.assertEqual(ws.max_row, 3)
+        self.assertEqual(
+            ws.column_dimensions['A'].width, len('Emergency Dept') + 2,
+        )
+
+
+class ExportJobServiceTest(TestCase):
+    """Tests for ExportJobService."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.service = ExportJobService()
+        self.user = create_user()
+
+    def test_identical_requests_share_a_job(self):
+        job, created = self.service.request_export('issues', 'csv', self.user)
+        again, created_again = self.service.request_export('issues', 'csv', self.user)
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(job.pk, again.pk)
+        _, other_format = self.service.request_export('issues', 'xlsx', self.user)
+        self.assertTrue(other_format)
+
+    def test_recent_artifact_reused_old_one_rebuilt(self):
+        job, _ = self.service.request_export('issues', 'csv')
+        ExportJob.objects.filter(pk=job.pk).update(
+            status='Completed', completed_at=timezone.now(),
+        )
+        self.assertEqual(self.service.request_export('issues', 'csv')[0].pk, job.pk)
+
+        ExportJob.objects.filter(pk=job.pk).update(
+            completed_at=timezone.now() - timedelta(hours=1),
+        )
+        rebuilt, created = self.service.request_export('issues', 'csv')
+        self.assertTrue(created)
+        self.assertNotEqual(rebuilt.pk, job.pk)
+
+    def test_invalid_request(self):
+        with self.assertRaises(ValueError):
+            self.service.request_export('users', 'csv')
+        with self.assertRaises(ValueError):
+            self.service.request_export('issues', 'pdf')
+
+    def test_claim_and_run_csv_job(self):
+        create_issue(title='Missing pads')
+        create_issue(title='Flat battery')
+        job, _ = self.service.request_export('issues', 'csv', self.user)
+
+        claimed = self.service.claim_next()
+        self.assertEqual(claimed.pk, job.pk)
+        self.assertEqual(claimed.status, 'Running')
+        self.assertIsNone(self.service.claim_next())
+
+        job = self.service.run_job(claimed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Completed')
+        self.assertEqual((job.total_rows, job.rows_written), (2, 2))
+        self.assertEqual(job.progress, 100)
+        with job.file.open('rb') as f:
+            lines = f.read().decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'Issue #')
+        self.assertEqual(len(lines), 3)
+
+    def test_run_xlsx_job(self):
+        job, _ = self.service.request_export('locations', 'xlsx')
+        job = self.service.run_job(self.service.claim_next())
+        self.assertEqual(job.status, 'Completed')
+        self.assertTrue(job.file.name.endswith('.xlsx'))
+
+    def test_failed_job_records_error(self):
+        job = ExportJob.objects.create(
+            export_type='users', export_format='csv', params_hash='x',
+            status='Running',
+        )
+        job = self.service.run_job(job)
+        self.assertEqual(job.status, 'Failed')
+        self.assertIn('users', job.error)
+
+    def test_requeue_stale(self):
+        job = ExportJob.objects.create(
+            export_type='issues', export_format='csv', params_hash='x',
+            status='Running', started_at=timezone.now() - timedelta(hours=2),
+        )
+        self.assertEqual(self.service.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Pending')
+
+    def test_purge_expired_deletes_files(self):
+        job, _ = self.service.request_export('issues', 'csv')
+        job = self.service.run_job(self.service.claim_next())
+        storage, name = job.file.storage, job.file.name
+        ExportJob.objects.filter(pk=job.pk).update(
+            created_at=timezone.now() - timedelta(days=2),
+        )
+        self.assertEqual(self.service.purge_expired(), 1)
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(ExportJob.objects.exists())
+
+
 class IssueWorkflowTest(TestCase):
     """Tests for IssueWorkflow service."""
 
@@ -166,3 +947,514 @@ class IssueWorkflowTest(TestCase):
         self.workflow.set_target_resolution_date(issue)
         issue.refresh_from_db()
         self.assertIsNotNone(issue.target_resolution_date)
+
+
+class SlaSweepTest(TestCase):
+    """Tests for the set-based SLA sweep in IssueWorkflow."""
+
+    def setUp(self):
+        self.workflow = IssueWorkflow()
+        self.location = create_location()
+
+    def _aged_issue(self, hours, **kwargs):
+        issue = create_issue(location=self.location, **kwargs)
+        Issue.objects.filter(pk=issue.pk).update(
+            reported_date=timezone.now() - timedelta(hours=hours),
+        )
+        issue.refresh_from_db()
+        return issue
+
+    def test_breach_query_matches_per_issue_check(self):
+        issues = [
+            self._aged_issue(25, severity='Critical'),
+            self._aged_issue(23, severity='Critical'),
+            self._aged_issue(73, severity='High'),
+            self._aged_issue(100, severity='Medium'),
+            self._aged_issue(241, severity='Low'),
+            self._aged_issue(500, severity='Low', status='Closed'),
+        ]
+        breached = set(self.workflow.get_breached_issues().values_list('pk', flat=True))
+        expected = {i.pk for i in issues if self.workflow.is_sla_breached(i)}
+        self.assertEqual(breached, expected)
+        self.assertEqual(len(breached), 3)
+
+    def test_escalate_breached(self):
+        escalate = [self._aged_issue(48, severity='Critical') for _ in range(3)]
+        waiting = self._aged_issue(48, severity='Critical', status='PendingVerification')
+        maxed = self._aged_issue(48, severity='Critical', escalation_level=5)
+        fresh = self._aged_issue(1, severity='Critical')
+
+        with self.assertNumQueries(6):
+            escalated_ids, not_escalated = self.workflow.escalate_breached()
+
+        self.assertEqual(set(escalated_ids), {i.pk for i in escalate})
+        self.assertEqual(not_escalated, 2)
+        for issue in escalate:
+            issue.refresh_from_db()
+            self.assertEqual(issue.status, 'Escalated')
+            self.assertEqual(issue.escalation_level, 1)
+            comment = issue.comments.get()
+            self.assertEqual(comment.comment_by, 'System')
+            self.assertIn("from 'Open' to 'Escalated'", comment.comment_text)
+        for issue in (waiting, maxed, fresh):
+            issue.refresh_from_db()
+            self.assertNotEqual(issue.status, 'Escalated')
+            self.assertFalse(issue.comments.exists())
+
+    def test_second_sweep_escalates_nothing(self):
+        self._aged_issue(48, severity='Critical')
+        self.workflow.escalate_breached()
+        escalated_ids, not_escalated = self.workflow.escalate_breached()
+        self.assertEqual((escalated_ids, not_escalated), ([], 1))
+
+
+class EmailQueueTest(TestCase):
+    """Tests for the outbound email queue."""
+
+    def setUp(self):
+        cache.clear()
+        self.sent = []
+        self.outcomes = []
+
+    def _transport(self, to, subject, body, importance):
+        self.sent.append((to, subject, importance))
+        outcome = self.outcomes.pop(0) if self.outcomes else True
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW=0)
+    def test_notifications_are_queued_not_sent(self):
+        location = create_location()
+        issue = create_issue(location=location, severity='Critical')
+        create_user(username='educator', groups=['MERT Educator'])
+
+        NotificationService().notify_critical_issue(issue)
+
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.to, 'educator@test.com')
+        self.assertEqual(email.importance, 'High')
+        self.assertEqual(email.status, 'Queued')
+        self.assertIn(issue.title, email.subject)
+
+    def test_no_recipients_is_not_queued(self):
+        queued = NotificationService()._send_email(to=' ; ', subject='x', body='y')
+        self.assertFalse(queued)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_process_batch_delivers_due_emails(self):
+        queue = EmailQueue(transport=self._transport)
+        queue.enqueue('a@test.com', 'First', '<p>1</p>')
+        later = queue.enqueue('b@test.com', 'Later', '<p>2</p>')
+        OutboundEmail.objects.filter(pk=later.pk).update(
+            next_attempt_at=timezone.now() + timedelta(hours=1),
+        )
+
+        self.assertEqual(queue.process_batch(), (1, 0))
+
+        self.assertEqual(self.sent, [('a@test.com', 'First', 'Normal')])
+        email = OutboundEmail.objects.get(subject='First')
+        self.assertEqual(email.status, 'Sent')
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+        self.assertEqual(OutboundEmail.objects.get(pk=later.pk).status, 'Queued')
+
+    def test_failure_is_retried_with_backoff(self):
+        queue = EmailQueue(transport=self._transport)
+        email = queue.enqueue('a@test.com', 'Retry me', '<p>x</p>')
+        self.outcomes = [ConnectionError('endpoint down')]
+
+        before = timezone.now()
+        self.assertEqual(queue.process_batch(), (0, 1))
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'Queued')
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('endpoint down', email.last_error)
+        self.assertGreaterEqual(
+            email.next_attempt_at, before + timedelta(seconds=queue.BACKOFF_BASE),
+        )
+        # Not due yet, so a second pass sends nothing
+        self.assertEqual(queue.process_batch(), (0, 0))
+
+    def test_backoff_is_exponential_and_capped(self):
+        queue = EmailQueue()
+        self.assertEqual(queue.backoff(1), timedelta(seconds=60))
+        self.assertEqual(queue.backoff(3), timedelta(seconds=240))
+        self.assertEqual(queue.backoff(50), timedelta(seconds=queue.BACKOFF_MAX))
+
+    @override_settings(EMAIL_QUEUE_MAX_ATTEMPTS=2)
+    def test_dead_letters_after_max_attempts(self):
+        queue = EmailQueue(transport=self._transport)
+        email = queue.enqueue('a@test.com', 'Doomed', '<p>x</p>')
+        self.outcomes = [False, False]
+
+        queue.process_batch()
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        queue.process_batch()
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'Dead')
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(len(self.sent), 2)
+
+    def test_claimed_emails_are_not_claimed_twice(self):
+        queue = EmailQueue(transport=self._transport)
+        queue.enqueue('a@test.com', 'Once', '<p>x</p>')
+        self.assertEqual(len(queue.claim_batch()), 1)
+        self.assertEqual(queue.claim_batch(), [])
+
+    def test_requeue_stale_and_purge_sent(self):
+        queue = EmailQueue(transport=self._transport)
+        stale = queue.enqueue('a@test.com', 'Stale', '<p>x</p>')
+        queue.claim_batch()
+        OutboundEmail.objects.filter(pk=stale.pk).update(
+            claimed_at=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(queue.requeue_stale(), 1)
+        self.assertEqual(OutboundEmail.objects.get(pk=stale.pk).status, 'Queued')
+
+        queue.process_batch()
+        OutboundEmail.objects.filter(pk=stale.pk).update(
+            sent_at=timezone.now() - timedelta(days=40),
+        )
+        self.assertEqual(queue.purge_sent(30), 1)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+
+@override_settings(NOTIFICATION_DIGEST_WINDOW=300)
+class NotificationDigestTest(TestCase):
+    """Tests for digest batching of SLA and critical-issue notifications."""
+
+    def setUp(self):
+        cache.clear()
+        self.location = create_location()
+        create_user(username='educator', groups=['MERT Educator'])
+        self.service = NotificationService()
+
+    def _issues(self, count, **kwargs):
+        return list(
+            Issue.objects.filter(pk__in=[
+                create_issue(location=self.location, **kwargs).pk
+                for _ in range(count)
+            ]).select_related('location__service_line')
+        )
+
+    def test_sla_warnings_are_digested_per_recipient(self):
+        issues = self._issues(3, severity='High')
+
+        self.service.notify_sla_warnings(issues)
+
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertEqual(PendingNotification.objects.count(), 6)
+
+        # Nothing is due until the window has passed
+        self.assertEqual(self.service.flush_digests(), 0)
+        later = timezone.now() + timedelta(seconds=301)
+        self.assertEqual(self.service.flush_digests(now=later), 2)
+
+        emails = OutboundEmail.objects.order_by('to')
+        self.assertEqual([e.to for e in emails], ['educator@test.com', 'em@test.com'])
+        for email in emails:
+            self.assertIn('3 issues need attention', email.subject)
+            for issue in issues:
+                self.assertIn(issue.issue_number, email.body)
+            self.assertEqual(
+                set(email.covered_notifications.values_list('issue_id', flat=True)),
+                {issue.pk for issue in issues},
+            )
+        self.assertFalse(
+            PendingNotification.objects.filter(digested_at__isnull=True).exists()
+        )
+        self.assertEqual(self.service.flush_digests(now=later), 0)
+
+    def test_critical_issue_sent_immediately_by_default(self):
+        critical, = self._issues(1, severity='Critical')
+        self.service.notify_critical_issue(critical)
+
+        self.assertFalse(PendingNotification.objects.exists())
+        email = OutboundEmail.objects.get(to='educator@test.com')
+        self.assertIn('CRITICAL Issue', email.subject)
+        self.assertEqual(email.importance, 'High')
+
+    @override_settings(NOTIFICATION_DIGEST_CRITICAL=True)
+    def test_digest_combines_kinds_and_single_notice_keeps_format(self):
+        critical, = self._issues(1, severity='Critical')
+        sla, = self._issues(1, severity='High')
+        self.service.notify_critical_issue(critical)
+        self.service.notify_sla_warning(sla)
+
+        later = timezone.now() + timedelta(seconds=301)
+        self.service.flush_digests(now=later)
+
+        educator = OutboundEmail.objects.get(to='educator@test.com')
+        self.assertIn('Issue Digest', educator.subject)
+        self.assertIn('1 Critical Issue, 1 SLA Warning', educator.body)
+        contact = OutboundEmail.objects.get(to='em@test.com')
+        self.assertIn('SLA WARNING', contact.subject)
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW=0)
+    def test_zero_window_sends_each_notice(self):
+        issues = self._issues(2, severity='High')
+        self.service.notify_sla_warnings(issues)
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+        self.assertFalse(PendingNotification.objects.exists())
+
+
+class RecipientDirectoryTest(TestCase):
+    """Tests for cached notification recipient lookups."""
+
+    def setUp(self):
+        use_shared_cache(self)
+        self.directory = RecipientDirectory()
+        self.educator = create_user(username='educator', groups=['MERT Educator'])
+
+    def test_group_emails_are_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.directory.group_emails('MERT Educator'), ['educator@test.com'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.directory.group_emails('MERT Educator'), ['educator@test.com'])
+
+    def test_membership_change_invalidates(self):
+        from django.contrib.auth.models import Group
+
+        self.directory.group_emails('MERT Educator')
+        other = create_user(username='other')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.groups.add(Group.objects.get(name='MERT Educator'))
+        self.assertCountEqual(
+            self.directory.group_emails('MERT Educator'),
+            ['educator@test.com', 'other@test.com'],
+        )
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_not_cached_without_shared_cache(self):
+        self.directory.group_emails('MERT Educator')
+        # Removed from another worker: its invalidation never reaches this one
+        self.educator.groups.through.objects.filter(user=self.educator).delete()
+        self.assertEqual(self.directory.group_emails('MERT Educator'), [])
+
+    def test_user_emails_resolved_in_one_query(self):
+        create_user(username='noemail', email='')
+        with self.assertNumQueries(1):
+            emails = self.directory.user_emails(['educator', 'noemail', 'ghost'])
+        self.assertEqual(emails, {'educator': 'educator@test.com', 'noemail': ''})
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.directory.user_email('ghost'))
+            self.assertEqual(self.directory.user_email('educator'), 'educator@test.com')
+
+    def test_login_does_not_invalidate(self):
+        from django.contrib.auth.models import update_last_login
+
+        self.directory.group_emails('MERT Educator')
+        with self.captureOnCommitCallbacks(execute=True):
+            update_last_login(None, self.educator)
+        with self.assertNumQueries(0):
+            self.directory.group_emails('MERT Educator')
+
+    @override_settings(NOTIFICATION_DIGEST_WINDOW=0)
+    def test_issue_assignment_uses_directory(self):
+        issue = create_issue(assigned_to='educator')
+        NotificationService().notify_issue_assigned(issue)
+        NotificationService().notify_issue_assigned(issue)
+        self.assertEqual(
+            list(OutboundEmail.objects.values_list('to', flat=True)),
+            ['educator@test.com', 'educator@test.com'],
+        )
+
+
+class EmailQueueConcurrencyTest(TestCase):
+    """Tests for concurrent delivery of a claimed batch."""
+
+    def setUp(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.gate = threading.Barrier(3, timeout=5)
+
+    def _slow_transport(self, to, subject, body, importance):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        with contextlib.suppress(threading.BrokenBarrierError):
+            self.gate.wait()
+        with self.lock:
+            self.active -= 1
+        return subject != 'Fails'
+
+    @override_settings(EMAIL_QUEUE_CONCURRENCY=3)
+    def test_batch_is_sent_concurrently_with_per_message_outcomes(self):
+        queue = EmailQueue(transport=self._slow_transport)
+        for subject in ('One', 'Fails', 'Three', 'Four', 'Five', 'Six'):
+            queue.enqueue('a@test.com', subject, '<p>x</p>')
+
+        outcomes = queue.deliver_many(queue.claim_batch())
+
+        self.assertEqual(self.peak, 3)
+        self.assertEqual(len(outcomes), 6)
+        results = {email.subject: sent for email, sent in outcomes}
+        self.assertFalse(results.pop('Fails'))
+        self.assertTrue(all(results.values()))
+        self.assertEqual(OutboundEmail.objects.filter(status='Sent').count(), 5)
+        failed = OutboundEmail.objects.get(subject='Fails')
+        self.assertEqual((failed.status, failed.attempts), ('Queued', 1))
+
+
+class _StubFlowHandler(BaseHTTPRequestHandler):
+    """Power Automate stand-in that records which connection each POST used."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers['Content-Length'])
+        server.payloads.append(json.loads(self.rfile.read(length)))
+        server.client_ports.append(self.client_address[1])
+        status = server.statuses.pop(0) if server.statuses else 202
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PowerAutomateEmailServiceTest(TestCase):
+    """Tests for the pooled Power Automate HTTP client."""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubFlowHandler)
+        self.server.payloads = []
+        self.server.client_ports = []
+        self.server.statuses = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        PowerAutomateEmailService.close_session()
+        self.addCleanup(PowerAutomateEmailService.close_session)
+
+        host, port = self.server.server_address
+        settings_override = override_settings(
+            EMAIL_API_ENDPOINT=f'http://{host}:{port}/flow',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_connections_are_reused(self):
+        for number in range(3):
+            service = PowerAutomateEmailService()
+            self.assertTrue(service.send(
+                to='a@test.com', subject=f'Email {number}', body='<p>x</p>',
+            ))
+
+        self.assertEqual(len(self.server.payloads), 3)
+        self.assertEqual(len(set(self.server.client_ports)), 1)
+
+    def test_unavailable_endpoint_is_retried(self):
+        self.server.statuses = [503]
+        sent = PowerAutomateEmailService().send(
+            to='a@test.com', subject='Retried', body='<p>x</p>', importance='High',
+        )
+        self.assertTrue(sent)
+        self.assertEqual(len(self.server.payloads), 2)
+        self.assertEqual(self.server.payloads[-1]['importance'], 'High')
+
+    def test_gateway_error_is_not_reposted(self):
+        self.server.statuses = [502]
+        sent = PowerAutomateEmailService().send(
+            to='a@test.com', subject='Maybe sent', body='<p>x</p>',
+        )
+        self.assertFalse(sent)
+        self.assertEqual(len(self.server.payloads), 1)
+
+    @override_settings(EMAIL_API_RETRIES=0)
+    def test_error_response_returns_false(self):
+        self.server.statuses = [500]
+        sent = PowerAutomateEmailService().send(
+            to='a@test.com', subject='Rejected', body='<p>x</p>',
+        )
+        self.assertFalse(sent)
+
+
+class SearchServiceTest(TestCase):
+    """Tests for the full-text search index."""
+
+    def setUp(self):
+        self.service = SearchService()
+        self.service_line = create_service_line(name='Intensive Care', abbreviation='ICU')
+        self.location = create_location(
+            service_line=self.service_line, department_name='Cardiac Ward',
+            building='Block 12',
+        )
+        self.other = create_location(
+            service_line=self.service_line, department_name='Maternity',
+        )
+        self.equipment = create_equipment(
+            item_name='LIFEPAK 1000 defibrillator', short_name='AED',
+            s4hana_code='S4-88123',
+        )
+
+    def _ids(self, query, **kwargs):
+        return [result['id'] for result in self.service.search(query, **kwargs)]
+
+    def test_saved_objects_are_searchable(self):
+        self.assertEqual(self._ids('cardiac'), [self.location.pk])
+        self.assertEqual(self._ids('defib lifep'), [self.equipment.pk])
+        self.assertEqual(self._ids('S4-88123'), [self.equipment.pk])
+        self.assertCountEqual(self._ids('icu', kinds=['location']), [self.location.pk, self.other.pk])
+
+    def test_title_matches_rank_above_body_matches(self):
+        in_body = create_issue(
+            location=self.location, title='Broken wheel',
+            description='Found near the defibrillator cupboard',
+        )
+        in_title = create_issue(
+            location=self.location, title='Defibrillator pads expired',
+            description='Replace pads',
+        )
+        self.assertEqual(self._ids('defibrillator', kinds=['issue']), [in_title.pk, in_body.pk])
+
+    def test_edits_comments_and_deletes_update_the_index(self):
+        issue = create_issue(location=self.location, title='Suction unit fault')
+        IssueComment.objects.create(issue=issue, comment_text='Biomedical notified', comment_by='x')
+        IssueComment.objects.create(
+            issue=issue, comment_text='Confidential escalation', comment_by='x', is_internal=True,
+        )
+        self.assertEqual(self._ids('biomedical'), [issue.pk])
+        self.assertEqual(self._ids('confidential'), [])
+
+        issue.title = 'Oxygen regulator fault'
+        issue.save()
+        self.assertEqual(self._ids('oxygen'), [issue.pk])
+        self.assertEqual(self._ids('suction'), [])
+
+        self.service_line.name = 'Critical Care'
+        self.service_line.save()
+        self.assertIn(self.location.pk, self._ids('critical care'))
+
+        issue.delete()
+        self.assertEqual(self._ids('oxygen'), [])
+
+    def test_unindexed_field_saves_skip_reindex(self):
+        issue = create_issue(location=self.location, title='Pads missing')
+        issue.status = 'Assigned'
+        with self.assertNumQueries(1):
+            issue.save(update_fields=['status'])
+
+    def test_query_without_terms_matches_nothing(self):
+        self.assertEqual(self.service.search('  --  '), [])
+        qs = Location.objects.all()
+        self.assertIs(self.service.filter(qs, 'location', ''), qs)
+
+    def test_rebuild_recreates_documents(self):
+        create_issue(location=self.location, title='Pads missing')
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self._ids('cardiac'), [])
+
+        self.assertEqual(self.service.rebuild(), 4)
+        self.assertEqual(self._ids('cardiac'), [self.location.pk])
+        self.assertEqual(len(self._ids('pads')), 1)
@@ -1,10 +1,28 @@
 """Tests for audit app views."""
-from django.test import TestCase, Client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
+from audit.models import Audit, ComplianceRollup, ExportJob, ViewMetric
+from audit.services.export_jobs import ExportJobService
+from audit.services.issue_workflow import IssueWorkflow
+from audit.services.request_metrics import RequestMetrics
 from .factories import (
-    create_audit, create_audit_period, create_issue, create_location,
-    create_service_line, create_user, setup_all_roles,
+    create_audit, create_audit_checks, create_audit_condition,
+    create_audit_documents, create_audit_equipment, create_audit_period,
+    create_equipment, create_equipment_category, create_issue, create_location, create_service_line,
+    create_user, setup_all_roles, use_shared_cache,
 )
 
 
@@ -36,6 +54,7 @@ class DashboardViewTest(TestCase):
     """Tests for DashboardView."""
 
     def setUp(self):
+        cache.clear()
         setup_all_roles()
         self.user = create_user(groups=['Viewer'])
         self.client = Client()
@@ -52,6 +71,28 @@ class DashboardViewTest(TestCase):
         self.assertIn('total_audits', response.context)
         self.assertIn('open_issues', response.context)
 
+    def test_dashboard_served_from_cache(self):
+        use_shared_cache(self)
+        self.client.get(reverse('audit:dashboard'))
+        create_issue()  # no commit in TestCase, so no invalidation
+        response = self.client.get(reverse('audit:dashboard'))
+        self.assertEqual(response.context['open_issues'], 0)
+
+    def test_issue_change_invalidates_cache(self):
+        self.client.get(reverse('audit:dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            create_issue()
+        response = self.client.get(reverse('audit:dashboard'))
+        self.assertEqual(response.context['open_issues'], 1)
+
+    def test_wizard_save_keeps_cache(self):
+        audit = create_audit()
+        self.client.get(reverse('audit:dashboard'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            audit.notes = 'Still in progress'
+            audit.save()
+        self.assertEqual(callbacks, [])
+
 
 class TrolleyListViewTest(TestCase):
     """Tests for TrolleyListView."""
@@ -76,11 +117,543 @@ class TrolleyListViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
 
     def test_trolley_list_search(self):
+        create_location(service_line=self.service_line, department_name='Maternity')
         response = self.client.get(
             reverse('audit:trolley_list'),
-            {'q': 'Emergency'},
+            {'q': 'Emergency Dept'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['trolleys']), [self.location])
+
+
+class SearchApiViewTest(TestCase):
+    """Tests for SearchApiView and search on the issue list."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        self.user = create_user(groups=['Viewer'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.location = create_location(department_name='Cardiac Ward')
+        self.issue = create_issue(location=self.location, title='Cardiac monitor cable frayed')
+        create_issue(location=self.location, title='Suction tubing missing')
+
+    def test_ranked_results_with_links(self):
+        response = self.client.get(reverse('audit:api_search'), {'q': 'cardiac'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual({r['kind'] for r in results}, {'location', 'issue'})
+        urls = {r['url'] for r in results}
+        self.assertIn(reverse('audit:issue_detail', args=[self.issue.pk]), urls)
+        self.assertIn(reverse('audit:trolley_detail', args=[self.location.pk]), urls)
+
+    def test_kind_filter_and_validation(self):
+        response = self.client.get(reverse('audit:api_search'), {'q': 'cardiac', 'kind': 'issue'})
+        self.assertEqual([r['id'] for r in response.json()['results']], [str(self.issue.pk)])
+
+        response = self.client.get(reverse('audit:api_search'), {'q': 'cardiac', 'kind': 'audit'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_issue_list_search(self):
+        response = self.client.get(reverse('audit:issue_list'), {'q': 'cardiac cable'})
+        self.assertEqual(list(response.context['issues']), [self.issue])
+
+
+class KeysetPaginationTest(TestCase):
+    """Tests for cursor pagination on the list views."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        self.user = create_user(groups=['Viewer'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.location = create_location()
+        period = create_audit_period()
+        for _ in range(60):
+            create_audit(location=self.location, period=period)
+        # Identical sort keys across a page boundary need the id tiebreaker
+        Audit.objects.update(started_at=timezone.now())
+
+    def _walk(self, params=None):
+        url = reverse('audit:audit_list')
+        seen, pages = [], []
+        cursor = None
+        while True:
+            response = self.client.get(url, {**(params or {}), **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            pages.append(page)
+            seen.extend(audit.pk for audit in page)
+            if not page.has_next():
+                return seen, pages
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_once(self):
+        seen, pages = self._walk()
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(len(seen), 60)
+        self.assertEqual(len(set(seen)), 60)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_earlier_page(self):
+        _, pages = self._walk()
+        response = self.client.get(
+            reverse('audit:audit_list'), {'cursor': pages[1].previous_cursor},
+        )
+        page = response.context['page_obj']
+        self.assertEqual([a.pk for a in page], [a.pk for a in pages[0]])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_deep_page_skips_offset_and_count(self):
+        _, pages = self._walk()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('audit:audit_list'), {'cursor': pages[1].next_cursor})
+        sql = ' '.join(q['sql'] for q in queries).upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('SELECT COUNT(*) AS "__COUNT" FROM "AUDIT_AUDIT"', sql)
+
+    def test_links_keep_filters(self):
+        response = self.client.get(reverse('audit:audit_list'), {'status': 'InProgress'})
+        self.assertContains(response, 'status=InProgress&amp;cursor=')
+        self.assertContains(response, '60 audits')
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('audit:audit_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_issue_and_trolley_lists_paginate(self):
+        for n in range(30):
+            create_issue(location=self.location, title=f'Issue {n}')
+        response = self.client.get(reverse('audit:issue_list'))
+        self.assertTrue(response.context['page_obj'].has_next())
+        response = self.client.get(
+            reverse('audit:issue_list'), {'cursor': response.context['page_obj'].next_cursor},
+        )
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+        response = self.client.get(reverse('audit:trolley_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['is_paginated'])
+
+
+class AuditStartViewTest(TestCase):
+    """Tests for AuditStartView."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        self.user = create_user(groups=['Auditor'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.period = create_audit_period()
+        self.location = create_location()
+        self.equipment = create_equipment()
+
+    def test_start_creates_audit_with_sections(self):
+        response = self.client.post(
+            reverse('audit:audit_start', args=[self.location.pk]),
+        )
+        audit = Audit.objects.get(location=self.location)
+        self.assertRedirects(
+            response, reverse('audit:audit_documents', args=[audit.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(audit.auditor_user, self.user)
+        self.assertEqual(audit.equipment_checks.count(), 1)
+        self.assertIsNotNone(audit.checks)
+
+    def test_start_resumes_existing_audit(self):
+        existing = create_audit(location=self.location, period=self.period, user=self.user)
+        response = self.client.post(
+            reverse('audit:audit_start', args=[self.location.pk]),
+        )
+        self.assertRedirects(
+            response, reverse('audit:audit_documents', args=[existing.pk]),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(Audit.objects.filter(location=self.location).count(), 1)
+
+
+class AuditEquipmentViewTest(TestCase):
+    """Tests for AuditEquipmentView."""
+
+    def setUp(self):
+        setup_all_roles()
+        self.user = create_user(groups=['Auditor'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.audit = create_audit(user=self.user)
+        self.check = create_audit_equipment(self.audit, quantity_found=0)
+        self.url = reverse('audit:audit_equipment', args=[self.audit.pk])
+
+    def test_post_saves_and_continues(self):
+        prefix = f'equip_{self.check.pk}'
+        response = self.client.post(self.url, {
+            f'{prefix}_present': 'on',
+            f'{prefix}_qty': '2',
+            f'{prefix}_notes': 'Restocked',
+        })
+        self.assertRedirects(
+            response, reverse('audit:audit_condition', args=[self.audit.pk]),
+            fetch_redirect_response=False,
+        )
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.quantity_found, 2)
+        self.assertEqual(self.check.item_notes, 'Restocked')
+
+    def test_post_invalid_quantity_redirects_back(self):
+        response = self.client.post(self.url, {
+            f'equip_{self.check.pk}_qty': 'lots',
+        })
+        self.assertRedirects(response, self.url, fetch_redirect_response=False)
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.quantity_found, 0)
+
+
+class AuditEquipmentItemViewTest(TestCase):
+    """Tests for the HTMX per-row autosave of the equipment checklist."""
+
+    def setUp(self):
+        setup_all_roles()
+        self.user = create_user(groups=['Auditor'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.audit = create_audit(user=self.user)
+        category = create_equipment_category()
+        self.check = create_audit_equipment(
+            self.audit, equipment=create_equipment(category=category),
+            is_present=False, quantity_found=0,
+        )
+        self.other = create_audit_equipment(
+            self.audit, equipment=create_equipment(category=category, item_name='Bag valve mask'),
+            is_present=False, quantity_found=0,
+        )
+        self.url = reverse('audit:audit_equipment_item', args=[self.audit.pk, self.check.pk])
+
+    def post(self, data, **extra):
+        return self.client.post(self.url, data, HTTP_HX_REQUEST='true', **extra)
+
+    def test_saves_only_the_posted_row(self):
+        prefix = f'equip_{self.check.pk}'
+        response = self.post({f'{prefix}_present': 'on', f'{prefix}_qty': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f'id="equip-row-{self.check.pk}"')
+        self.assertContains(response, 'id="equipment-progress"')
+        self.assertContains(response, 'hx-swap-oob="true"')
+        self.assertContains(response, '1 of 2 items pass')
+        self.check.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertTrue(self.check.is_present)
+        self.assertEqual(self.check.quantity_found, 1)
+        self.assertFalse(self.other.is_present)
+
+    def test_invalid_quantity_renders_error_without_saving(self):
+        response = self.post({f'equip_{self.check.pk}_qty': 'lots'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'table-danger')
+        self.assertNotContains(response, 'equipment-progress')
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.quantity_found, 0)
+
+    def test_query_count_does_not_grow_with_checklist(self):
+        prefix = f'equip_{self.check.pk}'
+        self.post({f'{prefix}_qty': '1'})
+        with CaptureQueriesContext(connection) as ctx:
+            self.post({f'{prefix}_qty': '2'})
+        for i in range(10):
+            create_audit_equipment(
+                self.audit, equipment=create_equipment(item_name=f'Item {i}'),
+            )
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.post({f'{prefix}_qty': '3'})
+
+    def test_check_from_another_audit_is_404(self):
+        other_audit = create_audit(user=self.user, location=self.audit.location)
+        url = reverse('audit:audit_equipment_item', args=[other_audit.pk, self.check.pk])
+        response = self.client.post(url, HTTP_HX_REQUEST='true')
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_auditor_is_forbidden(self):
+        create_user(username='other', groups=['Auditor'])
+        self.client.login(username='other', password='testpass123')
+        response = self.post({f'equip_{self.check.pk}_qty': '5'})
+        self.assertEqual(response.status_code, 403)
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.quantity_found, 0)
+
+    def test_submitted_audit_redirects_whole_page(self):
+        self.audit.submission_status = 'Submitted'
+        self.audit.save()
+        response = self.post({f'equip_{self.check.pk}_qty': '5'})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            response['HX-Redirect'], reverse('audit:audit_detail', args=[self.audit.pk]),
+        )
+
+    def test_page_renders_rows_and_progress(self):
+        response = self.client.get(reverse('audit:audit_equipment', args=[self.audit.pk]))
+        self.assertContains(response, f'id="equip-row-{self.check.pk}"')
+        self.assertContains(response, self.url)
+        self.assertContains(response, '0 of 2 items pass')
+
+
+class AuditSyncApiViewTest(TestCase):
+    """Tests for the offline sync API."""
+
+    def setUp(self):
+        setup_all_roles()
+        self.user = create_user(groups=['Auditor'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.audit = create_audit(user=self.user)
+        create_audit_documents(self.audit)
+        create_audit_condition(self.audit)
+        create_audit_checks(self.audit)
+        self.check = create_audit_equipment(self.audit, quantity_found=0)
+        self.url = reverse('audit:api_audit_sync', args=[self.audit.pk])
+
+    def post(self, payload):
+        return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def test_get_returns_snapshot(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        audit = response.json()['audit']
+        self.assertEqual(audit['id'], str(self.audit.pk))
+        self.assertEqual(audit['equipment'][0]['id'], str(self.check.pk))
+        self.assertIn('version', audit['checks'])
+        self.assertTrue(response.json()['csrf_token'])
+
+    def test_upload_with_token_from_snapshot_passes_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='testuser', password='testpass123')
+        token = client.get(self.url).json()['csrf_token']
+        payload = json.dumps({'checks': {'inside_check_count': 3}})
+
+        response = client.post(self.url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        response = client.post(
+            self.url, payload, content_type='application/json', HTTP_X_CSRFTOKEN=token,
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_anonymous_gets_json_401(self):
+        self.client.logout()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Authentication required.')
+
+    def test_user_without_role_gets_json_403(self):
+        create_user(username='norole')
+        self.client.login(username='norole', password='testpass123')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('error', response.json())
+
+    def test_unknown_audit_gets_json_404(self):
+        url = reverse('audit:api_audit_sync', kwargs={'pk': uuid.uuid4()})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['error'], 'Audit not found.')
+
+    def test_post_applies_upload_and_returns_new_versions(self):
+        row = self.client.get(self.url).json()['audit']['equipment'][0]
+        response = self.post({
+            'equipment': [{'id': row['id'], 'version': row['version'], 'quantity_found': 1}],
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['updated']['equipment'], 1)
+        self.assertNotEqual(data['audit']['equipment'][0]['version'], row['version'])
+        self.check.refresh_from_db()
+        self.assertEqual(self.check.quantity_found, 1)
+
+    def test_post_submit_completes_audit(self):
+        response = self.post({'checks': {'inside_check_count': 3}, 'submit': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['audit']['submission_status'], 'Submitted')
+        self.audit.refresh_from_db()
+        self.assertEqual(self.audit.submission_status, 'Submitted')
+        self.assertIsNotNone(self.audit.overall_compliance)
+
+        # A retried upload reports the audit as already submitted
+        response = self.post({'submit': True})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()['conflicts'][0]['current']['submission_status'], 'Submitted',
+        )
+
+    def test_invalid_upload_returns_errors(self):
+        response = self.client.post(self.url, 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.post({'equipment': [{'id': str(self.check.pk), 'quantity_found': 'lots'}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('equipment[0].quantity_found', response.json()['errors'])
+
+    def test_stale_version_returns_conflict(self):
+        row = self.client.get(self.url).json()['audit']['equipment'][0]
+        self.check.item_notes = 'Changed elsewhere'
+        self.check.save()
+        response = self.post({
+            'equipment': [{'id': row['id'], 'version': row['version'], 'quantity_found': 1}],
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()['conflicts'][0]['current']['item_notes'], 'Changed elsewhere',
+        )
+
+    def test_other_auditor_is_forbidden(self):
+        create_user(username='other', groups=['Auditor'])
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.post({'submit': True}).status_code, 403)
+
+
+class ComplianceRollupViewTest(TestCase):
+    """Submitting audits feeds the rollup that the report views read."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        self.user = create_user(groups=['Auditor'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.audit = create_audit(user=self.user)
+        create_audit_documents(self.audit)
+        create_audit_condition(self.audit)
+        create_audit_checks(self.audit)
+        create_audit_equipment(self.audit, is_present=True, quantity_found=1)
+
+    def test_submit_records_rollup_and_feeds_reports(self):
+        self.client.post(reverse('audit:audit_submit', args=[self.audit.pk]))
+        self.audit.refresh_from_db()
+
+        row = ComplianceRollup.objects.get()
+        self.assertEqual(row.location, self.audit.location)
+        self.assertEqual(row.audit_count, 1)
+        self.assertEqual(row.compliance_total, self.audit.overall_compliance)
+
+        volume = self.client.get(reverse('audit:api_audit_volume')).json()
+        self.assertEqual(volume['datasets'][0]['data'], [1])
+        trend = self.client.get(reverse('audit:api_compliance_trend')).json()
+        self.assertEqual(
+            trend['datasets'][0]['data'], [float(self.audit.overall_compliance)],
+        )
+
+        response = self.client.get(reverse('audit:dashboard'))
+        self.assertEqual(response.context['total_audits'], 1)
+        stats = response.context['service_line_stats']
+        self.assertEqual(stats[0].audit_count, 1)
+
+
+class ExportViewTest(TestCase):
+    """Tests for ExportView."""
+
+    def setUp(self):
+        setup_all_roles()
+        self.user = create_user(groups=['Service Line Manager'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.location = create_location()
+
+    def test_csv_is_streamed(self):
+        create_issue(location=self.location, title='Missing pads')
+        response = self.client.get(
+            reverse('audit:export'), {'type': 'issues', 'format': 'csv'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[0], 'Issue #')
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Missing pads', lines[1])
+
+    def test_xlsx_is_streamed_from_file(self):
+        from io import BytesIO
+
+        from openpyxl import load_workbook
+
+        create_issue(location=self.location, title='Missing pads')
+        response = self.client.get(
+            reverse('audit:export'), {'type': 'issues', 'format': 'xlsx'},
         )
         self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        ws = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(ws.title, 'Issues')
+        self.assertEqual(ws['A1'].value, 'Issue #')
+        self.assertTrue(ws['A1'].font.b)
+        self.assertEqual(ws['E2'].value, 'Missing pads')
+
+    def test_invalid_type_rejected(self):
+        response = self.client.get(reverse('audit:export'), {'type': 'users'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportJobViewTest(TestCase):
+    """Tests for the background export views."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        setup_all_roles()
+        self.user = create_user(groups=['Service Line Manager'])
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+    def _request(self, export_type='issues', export_format='csv'):
+        return self.client.post(
+            reverse('audit:export_job_create'),
+            {'type': export_type, 'format': export_format},
+        )
+
+    def test_reports_page_offers_exports(self):
+        response = self.client.get(reverse('audit:reports'))
+        self.assertContains(response, reverse('audit:export_job_create'))
+
+    def test_request_polls_then_downloads(self):
+        create_issue(title='Missing pads')
+        response = self._request()
+        job = ExportJob.objects.get()
+        detail_url = reverse('audit:export_job_detail', args=[job.pk])
+        self.assertRedirects(response, detail_url)
+        self.assertEqual(job.requested_by, self.user)
+
+        status_url = reverse('audit:export_job_status', args=[job.pk])
+        self.assertContains(self.client.get(detail_url), status_url)
+        download_url = reverse('audit:export_job_download', args=[job.pk])
+        self.assertEqual(self.client.get(download_url).status_code, 404)
+
+        ExportJobService().run_job(ExportJobService().claim_next())
+        status = self.client.get(status_url)
+        self.assertContains(status, download_url)
+        self.assertNotContains(status, 'hx-trigger')
+
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Missing pads', b''.join(response.streaming_content))
+
+    def test_duplicate_request_reuses_job(self):
+        self._request()
+        self._request()
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_invalid_request_rejected(self):
+        self.assertEqual(self._request(export_format='pdf').status_code, 400)
+
+    def test_viewer_cannot_request_export(self):
+        create_user(username='viewer', groups=['Viewer'])
+        self.client.login(username='viewer', password='testpass123')
+        self.assertEqual(self._request().status_code, 403)
 
 
 class RoleAccessTest(TestCase):
@@ -112,3 +685,192 @@ class RoleAccessTest(TestCase):
         self.client.login(username='educator', password='testpass123')
         response = self.client.get(reverse('audit:random_selection'))
         self.assertEqual(response.status_code, 200)
+
+
+
+class RoleResolutionTest(TestCase):
+    """Test that role lookups are shared and cached across requests."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        self.user = create_user(username='manager', groups=['Service Line Manager'])
+        self.client.login(username='manager', password='testpass123')
+
+    def test_roles_cached_between_requests(self):
+        use_shared_cache(self)
+
+        url = reverse('audit:issue_list')
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            response = self.client.get(url)
+
+        self.assertTrue(response.context['is_manager'])
+        group_queries = [q for q in first.captured_queries if 'auth_user_groups' in q['sql']]
+        self.assertEqual(len(group_queries), 1)
+        self.assertFalse(
+            [q for q in second.captured_queries if 'auth_user_groups' in q['sql']]
+        )
+
+    def test_roles_not_cached_between_requests_without_shared_cache(self):
+        url = reverse('audit:issue_list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        # Revoked by another worker: no signal reaches this process's cache
+        self.user.groups.through.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_membership_change_takes_effect(self):
+        from django.contrib.auth.models import Group
+
+        url = reverse('audit:random_selection')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.user.groups.add(Group.objects.get(name='MERT Educator'))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+
+class RequestMetricsTest(TestCase):
+    """Test the request metrics middleware and report endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        setup_all_roles()
+        RequestMetrics().reset()
+        create_user(username='admin', groups=['System Admin'])
+        self.client.login(username='admin', password='testpass123')
+
+    def test_requests_are_recorded_per_view(self):
+        create_issue()
+        self.client.get(reverse('audit:issue_list'))
+        self.client.get(reverse('audit:issue_list'))
+        RequestMetrics().flush()
+
+        metric = ViewMetric.objects.get(url_name='audit:issue_list')
+        self.assertEqual(metric.requests, 2)
+        self.assertGreater(metric.query_count, 0)
+        self.assertGreaterEqual(metric.max_queries, metric.query_count / 2)
+        self.assertGreater(metric.template_time_ms, 0)
+        self.assertGreater(metric.response_bytes, 0)
+
+    def test_streamed_response_recorded_when_sent(self):
+        create_issue()
+        response = self.client.get(reverse('audit:export'), {'type': 'issues', 'format': 'csv'})
+        RequestMetrics().flush()
+        self.assertFalse(ViewMetric.objects.filter(url_name='audit:export').exists())
+
+        body = b''.join(response.streaming_content)
+        RequestMetrics().flush()
+        metric = ViewMetric.objects.get(url_name='audit:export')
+        self.assertEqual(metric.requests, 1)
+        self.assertEqual(metric.response_bytes, len(body))
+        self.assertGreater(metric.query_count, 0)
+
+    def test_flush_adds_to_existing_totals(self):
+        metrics = RequestMetrics()
+        metrics.record('audit:dashboard', 5, 1.0, 2.0, 10.0, 100)
+        metrics.flush()
+        metrics.record('audit:dashboard', 9, 1.0, 2.0, 30.0, 300)
+        metrics.flush()
+
+        metric = ViewMetric.objects.get(url_name='audit:dashboard')
+        self.assertEqual((metric.requests, metric.query_count, metric.max_queries), (2, 14, 9))
+        self.assertEqual(metric.max_time_ms, 30.0)
+        self.assertEqual(metric.avg_queries, 7)
+
+    def test_report_endpoint(self):
+        metrics = RequestMetrics()
+        metrics.record('audit:few', 2, 1.0, 0, 5.0, 10)
+        metrics.record('audit:many', 40, 8.0, 0, 50.0, 10)
+
+        response = self.client.get(reverse('audit:api_view_metrics'), {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        views = [row['view'] for row in response.json()['views']]
+        self.assertEqual(views[0], 'audit:many')
+        self.assertEqual(len(views), 2)
+
+        response = self.client.get(reverse('audit:api_view_metrics'), {'sort': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_report_endpoint_requires_admin(self):
+        create_user(username='viewer', groups=['Viewer'])
+        self.client.login(username='viewer', password='testpass123')
+        response = self.client.get(reverse('audit:api_view_metrics'))
+        self.assertEqual(response.status_code, 403)
+
+
+class MetricsViewTest(TestCase):
+    """Test the Prometheus metrics endpoint and counters."""
+
+    def setUp(self):
+        setup_all_roles()
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_token_required(self):
+        url = reverse('audit:metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong')
+        self.assertEqual(response.status_code, 403)
+
+        create_issue(severity='High')
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('redi_open_issues{status="Open"} 1.0', body)
+        self.assertIn('redi_sla_breached_issues 0.0', body)
+        self.assertIn('redi_outbound_emails{status="Queued"}', body)
+
+    def test_admin_can_view_and_latency_is_recorded(self):
+        from prometheus_client import REGISTRY
+
+        create_user(username='admin', groups=['System Admin'])
+        self.client.login(username='admin', password='testpass123')
+        self.client.get(reverse('audit:dashboard'))
+
+        response = self.client.get(reverse('audit:metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(REGISTRY.get_sample_value(
+            'redi_request_duration_seconds_count',
+            {'view': 'audit:dashboard', 'method': 'GET'},
+        ), 1)
+
+    def test_issue_counters(self):
+        from prometheus_client import REGISTRY
+
+        def sample(name, labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        created = sample('redi_issues_created_total', {'severity': 'Critical'})
+        assigned = sample('redi_issue_transitions_total', {'to_status': 'Assigned'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            issue = create_issue(severity='Critical')
+        IssueWorkflow().assign(issue, 'someone')
+
+        self.assertEqual(sample('redi_issues_created_total', {'severity': 'Critical'}), created + 1)
+        self.assertEqual(
+            sample('redi_issue_transitions_total', {'to_status': 'Assigned'}), assigned + 1,
+        )
+
+    def test_samples_from_every_service_directory_are_summed(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        script = (
+            'import sys\n'
+            'from prometheus_client import Counter\n'
+            "Counter('redi_issue_transitions', '', ['to_status'])"
+            ".labels('Escalated').inc(int(sys.argv[1]))\n"
+        )
+        for service, count in (('cron', 3), ('web', 2)):
+            directory = os.path.join(root, service)
+            os.mkdir(directory)
+            subprocess.run(
+                [sys.executable, '-c', script, str(count)], check=True,
+                env={**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directory},
+            )
+
+        create_user(username='admin', groups=['System Admin'])
+        self.client.login(username='admin', password='testpass123')
+        with override_settings(METRICS_MULTIPROC_ROOT=root):
+            body = self.client.get(reverse('audit:metrics')).content.decode()
+        self.assertIn('redi_issue_transitions_total{to_status="Escalated"} 5.0', body)
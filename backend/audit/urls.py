@@ -23,10 +23,15 @@ urlpatterns = [
     path('audits/<uuid:pk>/', views.AuditDetailView.as_view(), name='audit_detail'),
     path('audits/<uuid:pk>/documents/', views.AuditDocumentsView.as_view(), name='audit_documents'),
     path('audits/<uuid:pk>/equipment/', views.AuditEquipmentView.as_view(), name='audit_equipment'),
+    path(
+        'audits/<uuid:pk>/equipment/<uuid:check_id>/',
+        views.AuditEquipmentItemView.as_view(), name='audit_equipment_item',
+    ),
     path('audits/<uuid:pk>/condition/', views.AuditConditionView.as_view(), name='audit_condition'),
     path('audits/<uuid:pk>/checks/', views.AuditChecksView.as_view(), name='audit_checks'),
     path('audits/<uuid:pk>/review/', views.AuditReviewView.as_view(), name='audit_review'),
     path('audits/<uuid:pk>/submit/', views.AuditSubmitView.as_view(), name='audit_submit'),
+    path('api/audits/<uuid:pk>/sync/', views.AuditSyncApiView.as_view(), name='api_audit_sync'),
 
     # Issue management
     path('issues/', views.IssueListView.as_view(), name='issue_list'),
@@ -46,9 +51,20 @@ urlpatterns = [
     path('reports/', views.ReportsView.as_view(), name='reports'),
     path('reports/compliance/', views.ComplianceReportView.as_view(), name='compliance_report'),
     path('reports/export/', views.ExportView.as_view(), name='export'),
+    path('reports/exports/', views.ExportJobCreateView.as_view(), name='export_job_create'),
+    path('reports/exports/<uuid:pk>/', views.ExportJobDetailView.as_view(), name='export_job_detail'),
+    path('reports/exports/<uuid:pk>/status/', views.ExportJobStatusView.as_view(), name='export_job_status'),
+    path('reports/exports/<uuid:pk>/download/', views.ExportJobDownloadView.as_view(), name='export_job_download'),
 
     # Report API endpoints (JSON for Chart.js)
     path('reports/api/compliance-trend/', views.ComplianceTrendApiView.as_view(), name='api_compliance_trend'),
     path('reports/api/issues-by-severity/', views.IssuesBySeverityApiView.as_view(), name='api_issues_severity'),
     path('reports/api/audit-volume/', views.AuditVolumeApiView.as_view(), name='api_audit_volume'),
+
+    # Full-text search API
+    path('api/search/', views.SearchApiView.as_view(), name='api_search'),
+
+    # Instrumentation (System Admin only)
+    path('reports/api/view-metrics/', views.ViewMetricsApiView.as_view(), name='api_view_metrics'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
 ]
@@ -5,48 +5,70 @@ Implements all views for the audit workflow:
 - Dashboard with summary statistics
 - Trolley/location management (list, detail, edit)
 - Multi-step audit wizard (documents, equipment, condition, checks, review, submit)
+  and its JSON sync API for offline clients
 - Issue lifecycle (list, create, detail, transitions, comments)
 - Random audit selection (view, generate)
-- Reports and CSV export
+- Reports, CSV/Excel export and background export jobs
 """
 
+import json
 import logging
-from datetime import date, timedelta
-
-import csv
+import tempfile
+from datetime import date
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import transaction
-from django.db.models import Avg, Count, Q
-from django.db.models.functions import TruncMonth
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
+from django.db.models import Count, Q
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseBadRequest, HttpResponseForbidden, JsonResponse,
+    StreamingHttpResponse,
+)
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.views import View
 from django.views.generic import (
     CreateView, DetailView, ListView, TemplateView, UpdateView,
 )
 
+from . import metrics
 from .forms import (
     AuditChecksForm, AuditConditionForm, AuditDocumentsForm,
     CorrectiveActionForm, IssueAssignForm, IssueCommentForm,
     IssueCreateForm, IssueEditForm, IssueResolveForm, LocationEditForm,
 )
 from .mixins import (
-    AuditorRequiredMixin, EducatorRequiredMixin, ManagerRequiredMixin,
-    ViewerRequiredMixin,
+    AdminRequiredMixin, AuditorRequiredMixin, EducatorRequiredMixin,
+    ManagerRequiredMixin, ViewerRequiredMixin, get_user_roles,
 )
 from .models import (
     Audit, AuditChecks, AuditCondition, AuditDocuments, AuditEquipment,
-    AuditPeriod, CorrectiveAction, Equipment, Issue, Location,
-    LocationEquipment, RandomAuditSelection, RandomAuditSelectionItem,
-    ServiceLine,
+    AuditPeriod, CorrectiveAction, ExportJob, Issue, Location, RandomAuditSelection,
+    RandomAuditSelectionItem, ScoringProfile, ServiceLine,
+)
+from .pagination import KeysetPaginationMixin
+from .services.audit_builder import AuditBuilder
+from .services.audit_submission import AuditSubmissionService
+from .services.audit_sync import (
+    AuditSyncService, SyncConflictError, SyncValidationError,
 )
 from .services.compliance import ComplianceScorer
+from .services.dashboard import DashboardStatsService
+from .services.equipment_checklist import (
+    ChecklistValidationError, EquipmentChecklistService,
+)
+from .services.export_jobs import ExportJobService
+from .services.exports import ExportService
 from .services.issue_workflow import InvalidTransitionError, IssueWorkflow
 from .services.notifications import NotificationService
 from .services.random_selection import RandomAuditSelector
+from .services.request_metrics import RequestMetrics
+from .services.rollup import ComplianceRollupService
+from .services.search import SearchService
 
 logger = logging.getLogger(__name__)
 
@@ -80,6 +102,11 @@ class AuditOwnershipMixin:
                 request,
                 'This audit has already been submitted and cannot be modified.',
             )
+            if request.headers.get('HX-Request'):
+                # Navigate the whole page rather than swapping it into a fragment
+                response = HttpResponse(status=204)
+                response['HX-Redirect'] = reverse('audit:audit_detail', args=[audit.pk])
+                return response
             return redirect('audit:audit_detail', pk=audit.pk)
 
         return super().dispatch(request, *args, **kwargs)
@@ -96,55 +123,8 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['total_locations'] = Location.objects.filter(status='Active').count()
-        ctx['total_audits'] = Audit.objects.filter(
-            submission_status='Submitted',
-        ).count()
-        ctx['open_issues'] = Issue.objects.exclude(
-            status__in=['Closed', 'Resolved'],
-        ).count()
-        ctx['avg_compliance'] = Audit.objects.filter(
-            submission_status='Submitted',
-            overall_compliance__isnull=False,
-        ).aggregate(avg=Avg('overall_compliance'))['avg']
-
-        # Recent audits
-        ctx['recent_audits'] = (
-            Audit.objects.filter(submission_status='Submitted')
-            .select_related('location', 'period')
-            .order_by('-completed_at')[:10]
-        )
-
-        # Recent issues
-        ctx['recent_issues'] = (
-            Issue.objects.select_related('location', 'equipment')
-            .order_by('-reported_date')[:10]
-        )
-
-        # Active random selection
-        selector = RandomAuditSelector()
-        ctx['active_selection'] = selector.get_active_selection()
-
-        # Compliance by service line
-        ctx['service_line_stats'] = (
-            ServiceLine.objects.filter(is_active=True)
-            .annotate(
-                location_count=Count(
-                    'locations',
-                    filter=Q(locations__status='Active'),
-                ),
-                audit_count=Count(
-                    'locations__audits',
-                    filter=Q(locations__audits__submission_status='Submitted'),
-                ),
-                avg_compliance=Avg(
-                    'locations__audits__overall_compliance',
-                    filter=Q(locations__audits__submission_status='Submitted'),
-                ),
-            )
-            .order_by('name')
-        )
-
+        # Served from cache; invalidated by signals (see audit/signals.py)
+        ctx.update(DashboardStatsService().get_stats())
         return ctx
 
 
@@ -152,13 +132,14 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 # Trolley / Location views
 # ---------------------------------------------------------------------------
 
-class TrolleyListView(ViewerRequiredMixin, ListView):
+class TrolleyListView(ViewerRequiredMixin, KeysetPaginationMixin, ListView):
     """Paginated, filterable list of trolley locations."""
 
     model = Location
     template_name = 'audit/trolley_list.html'
     context_object_name = 'trolleys'
     paginate_by = 25
+    keyset_ordering = ('department_name', 'id')
 
     def get_queryset(self):
         qs = Location.objects.select_related('service_line').order_by(
@@ -177,13 +158,7 @@ class TrolleyListView(ViewerRequiredMixin, ListView):
         if building:
             qs = qs.filter(building=building)
 
-        search = self.request.GET.get('q')
-        if search:
-            qs = qs.filter(
-                Q(department_name__icontains=search)
-                | Q(display_name__icontains=search)
-                | Q(building__icontains=search)
-            )
+        qs = SearchService().filter(qs, 'location', self.request.GET.get('q'))
 
         return qs
 
@@ -244,13 +219,14 @@ class TrolleyEditView(EducatorRequiredMixin, UpdateView):
 # Audit views
 # ---------------------------------------------------------------------------
 
-class AuditListView(ViewerRequiredMixin, ListView):
+class AuditListView(ViewerRequiredMixin, KeysetPaginationMixin, ListView):
     """Paginated, filterable list of audits."""
 
     model = Audit
     template_name = 'audit/audit_list.html'
     context_object_name = 'audits'
     paginate_by = 25
+    keyset_ordering = ('-started_at', '-id')
 
     def get_queryset(self):
         qs = Audit.objects.select_related(
@@ -265,14 +241,20 @@ class AuditListView(ViewerRequiredMixin, ListView):
         if service_line:
             qs = qs.filter(location__service_line_id=service_line)
 
+        scoring_version = self.request.GET.get('scoring_version')
+        if scoring_version and scoring_version.isdigit():
+            qs = qs.filter(scoring_profile__version=int(scoring_version))
+
         return qs
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
         ctx['service_lines'] = ServiceLine.objects.filter(is_active=True)
+        ctx['scoring_profiles'] = ScoringProfile.objects.all()
         ctx['current_filters'] = {
             'status': self.request.GET.get('status', ''),
             'service_line': self.request.GET.get('service_line', ''),
+            'scoring_version': self.request.GET.get('scoring_version', ''),
         }
         return ctx
 
@@ -307,66 +289,11 @@ class AuditStartView(AuditorRequiredMixin, View):
         if selection_item_id:
             audit_type = 'Random'
 
-        audit = Audit.objects.create(
-            location=location,
-            period=period,
-            audit_type=audit_type,
-            auditor_name=(
-                request.user.get_full_name() or request.user.username
-            ),
-            auditor_user=request.user,
-            submission_status='InProgress',
-        )
-
-        # Create related section records
-        AuditDocuments.objects.create(audit=audit)
-        AuditCondition.objects.create(audit=audit)
-        AuditChecks.objects.create(
-            audit=audit,
-            expected_outside=(
-                period.expected_outside_checks_24_7
-                if location.operating_hours == '24_7'
-                else 0
-            ),
-            expected_inside=period.expected_inside_checks,
+        builder = AuditBuilder()
+        audit = builder.start_audit(
+            location, period, request.user, audit_type=audit_type,
         )
-
-        # Create equipment check records filtered to this location
-        equipment_list = Equipment.objects.filter(is_active=True)
-
-        # Prefetch all equipment overrides for this location to avoid N+1 queries
-        overrides = {
-            le.equipment_id: le
-            for le in LocationEquipment.objects.filter(location=location)
-        }
-
-        for equip in equipment_list:
-            # Skip items not matching defibrillator type
-            if (
-                equip.required_for_defib_type != 'N/A'
-                and equip.required_for_defib_type != location.defibrillator_type
-            ):
-                continue
-            # Skip paediatric items when location has no paediatric box
-            if equip.is_paediatric_item and not location.has_paediatric_box:
-                continue
-            # Skip altered airway items when location has no altered airway kit
-            if equip.is_altered_airway_item and not location.has_altered_airway:
-                continue
-
-            # Check for custom quantity override using prefetched dict
-            override = overrides.get(equip.pk)
-            expected_qty = (
-                override.custom_quantity
-                if override and override.custom_quantity
-                else equip.standard_quantity
-            )
-
-            AuditEquipment.objects.create(
-                audit=audit,
-                equipment=equip,
-                quantity_expected=expected_qty,
-            )
+        metrics.AUDITS_STARTED.inc()
 
         messages.success(
             request, f'Audit started for {location.display_name}.',
@@ -383,7 +310,7 @@ class AuditDetailView(ViewerRequiredMixin, DetailView):
 
     def get_queryset(self):
         return Audit.objects.select_related(
-            'location', 'location__service_line', 'period',
+            'location', 'location__service_line', 'period', 'scoring_profile',
         )
 
     def get_context_data(self, **kwargs):
@@ -410,7 +337,7 @@ class AuditDetailView(ViewerRequiredMixin, DetailView):
 
         # Check if user is educator for follow-up audit button
         ctx['is_educator'] = (
-            self.request.user.groups.filter(name__in=['MERT Educator', 'System Admin']).exists()
+            bool(get_user_roles(self.request.user) & {'MERT Educator', 'System Admin'})
             or self.request.user.is_superuser
         )
 
@@ -466,29 +393,19 @@ class AuditEquipmentView(AuditOwnershipMixin, AuditorRequiredMixin, View):
 
         return render(request, self.template_name, {
             'audit': audit, 'categories': categories,
+            'progress': EquipmentChecklistService().progress(audit),
         })
 
     def post(self, request, pk):
         audit = get_object_or_404(Audit, pk=pk)
-        equipment_checks = audit.equipment_checks.all()
 
+        checklist = EquipmentChecklistService()
         try:
-            with transaction.atomic():
-                for check in equipment_checks:
-                    prefix = f'equip_{check.pk}'
-                    check.is_present = request.POST.get(f'{prefix}_present') == 'on'
-                    qty_value = request.POST.get(f'{prefix}_qty', '0')
-                    try:
-                        check.quantity_found = int(qty_value)
-                    except ValueError:
-                        messages.error(
-                            request,
-                            f'Invalid quantity value for {check.equipment.item_name}',
-                        )
-                        return redirect('audit:audit_equipment', pk=audit.pk)
-                    check.expiry_ok = request.POST.get(f'{prefix}_expiry') == 'on'
-                    check.item_notes = request.POST.get(f'{prefix}_notes', '')
-                    check.save()
+            checklist.save_checklist(audit, request.POST)
+        except ChecklistValidationError as e:
+            for error in e.errors:
+                messages.error(request, error)
+            return redirect('audit:audit_equipment', pk=audit.pk)
         except Exception as e:
             messages.error(request, f'Error saving equipment checklist: {e}')
             return redirect('audit:audit_equipment', pk=audit.pk)
@@ -497,6 +414,40 @@ class AuditEquipmentView(AuditOwnershipMixin, AuditorRequiredMixin, View):
         return redirect('audit:audit_condition', pk=audit.pk)
 
 
+class AuditEquipmentItemView(AuditOwnershipMixin, AuditorRequiredMixin, View):
+    """
+    HTMX autosave of one equipment checklist row (POST only).
+
+    Returns the re-rendered row plus the running equipment score as an
+    out-of-band swap, so each edit costs one row update and one aggregate
+    query however long the checklist is.
+    """
+
+    template_name = 'audit/partials/equipment_row.html'
+
+    def post(self, request, pk, check_id):
+        audit = get_object_or_404(Audit, pk=pk)
+        check = get_object_or_404(
+            AuditEquipment.objects.select_related('equipment'), pk=check_id, audit=audit,
+        )
+
+        checklist = EquipmentChecklistService()
+        error = None
+        try:
+            checklist.save_item(check, request.POST)
+        except ChecklistValidationError as e:
+            error = e.errors[0]
+
+        html = render_to_string(self.template_name, {
+            'audit': audit, 'check': check, 'error': error,
+        }, request=request)
+        if error is None:
+            html += render_to_string('audit/partials/equipment_progress.html', {
+                'progress': checklist.progress(audit), 'oob': True,
+            }, request=request)
+        return HttpResponse(html)
+
+
 class AuditConditionView(AuditOwnershipMixin, AuditorRequiredMixin, View):
     """Step 3 of audit wizard: physical condition assessment."""
 
@@ -580,16 +531,15 @@ class AuditReviewView(AuditOwnershipMixin, AuditorRequiredMixin, DetailView):
         )
 
         # Calculate score previews
-        scorer = ComplianceScorer()
+        scorer = ComplianceScorer(engine='sql')
         try:
             ctx['doc_score'] = scorer.calculate_documentation_score(
                 audit.documents,
             )
         except Exception:
             ctx['doc_score'] = None
-        ctx['equip_score'] = scorer.calculate_equipment_score(
-            audit.equipment_checks.all(),
-        )
+        ctx['equip_score'] = scorer.score_equipment(audit)
+        ctx['scoring_profile'] = scorer.profile
         try:
             ctx['cond_score'] = scorer.calculate_condition_score(
                 audit.condition,
@@ -610,74 +560,12 @@ class AuditSubmitView(AuditOwnershipMixin, AuditorRequiredMixin, View):
     def post(self, request, pk):
         audit = get_object_or_404(Audit, pk=pk)
 
-        # Calculate compliance scores
-        scorer = ComplianceScorer()
-        overall = scorer.calculate_overall_score(audit)
-
-        # Wrap all database operations in a transaction
-        with transaction.atomic():
-            # Update audit status
-            audit.submission_status = 'Submitted'
-            audit.completed_at = timezone.now()
-            audit.save(update_fields=['submission_status', 'completed_at'])
-
-            # Update location's last audit info
-            location = audit.location
-            location.last_audit_date = audit.completed_at
-            location.last_audit_compliance = overall
-            location.save(update_fields=['last_audit_date', 'last_audit_compliance'])
-
-            # Mark any related random selection item as completed
-            from .models import RandomAuditSelectionItem
-            RandomAuditSelectionItem.objects.filter(
-                location=location,
-                audit_status='Pending',
-                selection__is_active=True,
-            ).update(
-                audit_status='Completed',
-                audit=audit,
-            )
-
-            # Auto-create issues for critical equipment failures
-            critical_issues = []
-            for check in audit.equipment_checks.select_related('equipment'):
-                if check.equipment.critical_item and not check.is_present:
-                    issue = Issue.objects.create(
-                        location=location,
-                        audit=audit,
-                        issue_category='Equipment',
-                        severity='Critical',
-                        title=f'Missing critical item: {check.equipment.item_name}',
-                        description=(
-                            f'Critical equipment item '
-                            f'"{check.equipment.item_name}" was not found '
-                            f'during audit.'
-                        ),
-                        equipment=check.equipment,
-                        reported_by=audit.auditor_name,
-                    )
-                    critical_issues.append(issue)
-
-            # Low compliance triggers follow-up
-            if overall < 80:
-                audit.requires_follow_up = True
-                audit.follow_up_due_date = date.today() + timedelta(days=14)
-                audit.save(
-                    update_fields=['requires_follow_up', 'follow_up_due_date'],
-                )
+        submission = AuditSubmissionService()
+        overall, critical_issues = submission.submit(audit)
+        metrics.AUDITS_SUBMITTED.inc()
 
         # Send notifications (never crash on email failure)
-        try:
-            notifications = NotificationService()
-            notifications.notify_audit_completed(audit)
-            for issue in critical_issues:
-                notifications.notify_critical_issue(issue)
-        except Exception:
-            logger.warning(
-                'Failed to send notifications for audit %s',
-                audit.pk,
-                exc_info=True,
-            )
+        submission.notify(audit, critical_issues)
 
         messages.success(
             request,
@@ -686,17 +574,78 @@ class AuditSubmitView(AuditOwnershipMixin, AuditorRequiredMixin, View):
         return redirect('audit:audit_detail', pk=audit.pk)
 
 
+class AuditSyncApiView(AuditorRequiredMixin, View):
+    """
+    JSON API for offline clients: download an audit, upload it in one go.
+
+    GET returns the snapshot an offline client works from, plus the CSRF
+    token (the cookie is HttpOnly) that the client must send back in the
+    X-CSRFToken header when it uploads. POST applies a complete or partial
+    upload (see services/audit_sync.py) and, if it asks to, submits the
+    audit. Errors come back as JSON: 401 when the session has expired, 403
+    without permission, 404 for an unknown audit, 400 with field errors and
+    409 with the current values of conflicting records.
+    """
+
+    def handle_no_permission(self):
+        # JSON rather than a redirect to the HTML login page
+        if not self.request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required.'}, status=401)
+        return JsonResponse({'error': 'You do not have permission to sync audits.'}, status=403)
+
+    def dispatch(self, request, *args, **kwargs):
+        # Ownership only; AuditOwnershipMixin redirects, which suits pages
+        # but not a JSON client
+        if request.user.is_authenticated:
+            try:
+                self.audit = Audit.objects.get(pk=kwargs['pk'])
+            except Audit.DoesNotExist:
+                return JsonResponse({'error': 'Audit not found.'}, status=404)
+            if self.audit.auditor_user != request.user and not request.user.is_superuser:
+                return JsonResponse(
+                    {'error': 'You do not have permission to edit this audit.'}, status=403,
+                )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, pk):
+        return JsonResponse({
+            'audit': AuditSyncService().snapshot(self.audit),
+            'csrf_token': get_token(request),
+        })
+
+    def post(self, request, pk):
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'errors': {'': ['Invalid JSON.']}}, status=400)
+
+        try:
+            snapshot, updated, submission = AuditSyncService().apply(self.audit, payload)
+        except SyncValidationError as e:
+            return JsonResponse({'errors': e.errors}, status=400)
+        except SyncConflictError as e:
+            return JsonResponse({'conflicts': e.conflicts}, status=409)
+
+        if submission is not None:
+            _, critical_issues = submission
+            metrics.AUDITS_SUBMITTED.inc()
+            self.audit.refresh_from_db()
+            AuditSubmissionService().notify(self.audit, critical_issues)
+        return JsonResponse({'audit': snapshot, 'updated': updated})
+
+
 # ---------------------------------------------------------------------------
 # Issue views
 # ---------------------------------------------------------------------------
 
-class IssueListView(ViewerRequiredMixin, ListView):
+class IssueListView(ViewerRequiredMixin, KeysetPaginationMixin, ListView):
     """Paginated, filterable list of issues with status counts."""
 
     model = Issue
     template_name = 'audit/issue_list.html'
     context_object_name = 'issues'
     paginate_by = 25
+    keyset_ordering = ('-reported_date', '-id')
 
     def get_queryset(self):
         qs = Issue.objects.select_related(
@@ -715,6 +664,8 @@ class IssueListView(ViewerRequiredMixin, ListView):
         if service_line:
             qs = qs.filter(location__service_line_id=service_line)
 
+        qs = SearchService().filter(qs, 'issue', self.request.GET.get('q'))
+
         return qs
 
     def get_context_data(self, **kwargs):
@@ -724,6 +675,7 @@ class IssueListView(ViewerRequiredMixin, ListView):
             'status': self.request.GET.get('status', ''),
             'severity': self.request.GET.get('severity', ''),
             'service_line': self.request.GET.get('service_line', ''),
+            'q': self.request.GET.get('q', ''),
         }
         # Issue counts by status - use single aggregate query to avoid N+1
         status_counts = Issue.objects.aggregate(
@@ -971,15 +923,13 @@ class ReportsView(ViewerRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx['total_audits'] = Audit.objects.filter(
-            submission_status='Submitted',
-        ).count()
+        ctx['total_audits'], ctx['avg_compliance'] = (
+            ComplianceRollupService().totals()
+        )
         ctx['total_issues'] = Issue.objects.count()
-        ctx['avg_compliance'] = Audit.objects.filter(
-            submission_status='Submitted',
-            overall_compliance__isnull=False,
-        ).aggregate(avg=Avg('overall_compliance'))['avg']
         ctx['service_lines'] = ServiceLine.objects.filter(is_active=True)
+        ctx['export_types'] = ExportJob.EXPORT_TYPE_CHOICES
+        ctx['export_formats'] = ExportJob.FORMAT_CHOICES
         return ctx
 
 
@@ -992,26 +942,7 @@ class ComplianceReportView(ViewerRequiredMixin, TemplateView):
         ctx = super().get_context_data(**kwargs)
 
         ctx['service_line_compliance'] = (
-            ServiceLine.objects.filter(is_active=True)
-            .annotate(
-                avg_compliance=Avg(
-                    'locations__audits__overall_compliance',
-                    filter=Q(
-                        locations__audits__submission_status='Submitted',
-                    ),
-                ),
-                audit_count=Count(
-                    'locations__audits',
-                    filter=Q(
-                        locations__audits__submission_status='Submitted',
-                    ),
-                ),
-                location_count=Count(
-                    'locations',
-                    filter=Q(locations__status='Active'),
-                ),
-            )
-            .order_by('name')
+            ComplianceRollupService().service_line_stats()
         )
 
         ctx['recent_audits'] = (
@@ -1027,17 +958,8 @@ class ComplianceTrendApiView(ViewerRequiredMixin, View):
     """JSON API: monthly average compliance over the last 12 months."""
 
     def get(self, request):
-        twelve_months_ago = timezone.now() - timedelta(days=365)
-        data = (
-            Audit.objects.filter(
-                submission_status='Submitted',
-                completed_at__gte=twelve_months_ago,
-            )
-            .annotate(month=TruncMonth('completed_at'))
-            .values('month')
-            .annotate(avg_compliance=Avg('overall_compliance'))
-            .order_by('month')
-        )
+        rollup = ComplianceRollupService()
+        data = rollup.monthly_series(rollup.trailing_year_start())
 
         labels = []
         values = []
@@ -1093,23 +1015,14 @@ class AuditVolumeApiView(ViewerRequiredMixin, View):
     """JSON API: audits per month over the last 12 months."""
 
     def get(self, request):
-        twelve_months_ago = timezone.now() - timedelta(days=365)
-        data = (
-            Audit.objects.filter(
-                submission_status='Submitted',
-                completed_at__gte=twelve_months_ago,
-            )
-            .annotate(month=TruncMonth('completed_at'))
-            .values('month')
-            .annotate(count=Count('id'))
-            .order_by('month')
-        )
+        rollup = ComplianceRollupService()
+        data = rollup.monthly_series(rollup.trailing_year_start())
 
         labels = []
         values = []
         for entry in data:
             labels.append(entry['month'].strftime('%b %Y'))
-            values.append(entry['count'])
+            values.append(entry['audit_count'])
 
         return JsonResponse({
             'labels': labels,
@@ -1120,10 +1033,90 @@ class AuditVolumeApiView(ViewerRequiredMixin, View):
         })
 
 
+class SearchApiView(ViewerRequiredMixin, View):
+    """JSON API: ranked full-text search over trolleys, issues and equipment."""
+
+    DEFAULT_LIMIT = 20
+    MAX_LIMIT = 100
+    URL_NAMES = {
+        'location': 'audit:trolley_detail',
+        'issue': 'audit:issue_detail',
+    }
+
+    def get(self, request):
+        query = request.GET.get('q', '')
+        kinds = request.GET.getlist('kind') or None
+        if kinds and not set(kinds) <= set(SearchService.KINDS):
+            return HttpResponseBadRequest(
+                f'Invalid kind. Choose from: {", ".join(SearchService.KINDS)}'
+            )
+        try:
+            limit = min(max(int(request.GET.get('limit', self.DEFAULT_LIMIT)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid limit.')
+
+        results = SearchService().search(query, kinds=kinds, limit=limit)
+        for result in results:
+            url_name = self.URL_NAMES.get(result['kind'])
+            result['url'] = reverse(url_name, args=[result['id']]) if url_name else None
+        return JsonResponse({'query': query, 'results': results})
+
+
+class ViewMetricsApiView(AdminRequiredMixin, View):
+    """JSON API: per-view query counts and latency from RequestMetricsMiddleware."""
+
+    DEFAULT_LIMIT = 20
+
+    def get(self, request):
+        metrics = RequestMetrics()
+        sort = request.GET.get('sort', 'queries')
+        try:
+            limit = max(int(request.GET.get('limit', self.DEFAULT_LIMIT)), 1)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid limit.')
+
+        metrics.flush()
+        try:
+            views = metrics.report(sort=sort, limit=limit)
+        except ValueError:
+            return HttpResponseBadRequest(
+                f'Invalid sort. Choose from: {", ".join(RequestMetrics.SORT_KEYS)}'
+            )
+        return JsonResponse({
+            'generated_at': timezone.now().isoformat(),
+            'sort': sort,
+            'views': views,
+        })
+
+
+class MetricsView(View):
+    """
+    Prometheus text exposition of application metrics.
+
+    Scrapers authenticate with "Authorization: Bearer <METRICS_TOKEN>";
+    logged-in System Admins can also view it.
+    """
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        allowed = (
+            (token and constant_time_compare(supplied, token))
+            or request.user.is_superuser
+            or 'System Admin' in get_user_roles(request.user)
+        )
+        if not allowed:
+            return HttpResponseForbidden('Metrics token required.')
+
+        body, content_type = metrics.render_metrics()
+        return HttpResponse(body, content_type=content_type)
+
+
 class ExportView(ManagerRequiredMixin, View):
     """Export audit data as CSV or Excel. Supports audits, issues, and locations."""
 
-    ALLOWED_EXPORT_TYPES = {'audits', 'issues', 'locations'}
+    ALLOWED_EXPORT_TYPES = set(ExportService.EXPORT_TYPES)
+    XLSX_SPOOL_MAX_SIZE = 8 * 1024 * 1024  # bytes held in memory before spilling to disk
 
     def get(self, request):
         export_type = request.GET.get('type', 'audits')
@@ -1140,152 +1133,76 @@ class ExportView(ManagerRequiredMixin, View):
         return self._export_csv(export_type)
 
     def _export_csv(self, export_type):
-        """Export data as CSV."""
-        response = HttpResponse(content_type='text/csv')
+        """Stream the export as CSV, one row at a time."""
+        response = StreamingHttpResponse(
+            ExportService().iter_csv(export_type),
+            content_type='text/csv',
+        )
         response['Content-Disposition'] = (
             f'attachment; filename="redi_{export_type}_{date.today()}.csv"'
         )
-        writer = csv.writer(response)
-
-        if export_type == 'audits':
-            self._write_audit_rows(writer)
-        elif export_type == 'issues':
-            self._write_issue_rows(writer)
-        elif export_type == 'locations':
-            self._write_location_rows(writer)
-
         return response
 
     def _export_xlsx(self, export_type):
-        """Export data as Excel."""
+        """Export data as Excel, spooled to a temporary file and streamed."""
+        # Not a with block: FileResponse streams the file and closes it when done
+        buffer = tempfile.SpooledTemporaryFile(max_size=self.XLSX_SPOOL_MAX_SIZE)  # noqa: SIM115
         try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill
+            ExportService().write_xlsx(export_type, buffer)
         except ImportError:
+            buffer.close()
             return HttpResponseBadRequest('Excel export requires openpyxl.')
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = export_type.capitalize()
-
-        # Header styling
-        header_font = Font(bold=True, color='FFFFFF')
-        header_fill = PatternFill(start_color='1B3A5F', end_color='1B3A5F', fill_type='solid')
-
-        class XlsxWriter:
-            """Adapter to write rows to openpyxl worksheet."""
-            def __init__(self, worksheet):
-                self.ws = worksheet
-                self.row_num = 0
-
-            def writerow(self, row):
-                self.row_num += 1
-                for col_num, value in enumerate(row, 1):
-                    cell = self.ws.cell(row=self.row_num, column=col_num, value=value)
-                    if self.row_num == 1:
-                        cell.font = header_font
-                        cell.fill = header_fill
-
-        writer = XlsxWriter(ws)
-
-        if export_type == 'audits':
-            self._write_audit_rows(writer)
-        elif export_type == 'issues':
-            self._write_issue_rows(writer)
-        elif export_type == 'locations':
-            self._write_location_rows(writer)
-
-        # Auto-fit column widths
-        for col in ws.columns:
-            max_length = 0
-            for cell in col:
-                if cell.value:
-                    max_length = max(max_length, len(str(cell.value)))
-            ws.column_dimensions[col[0].column_letter].width = min(max_length + 2, 50)
-
-        from io import BytesIO
-        buffer = BytesIO()
-        wb.save(buffer)
         buffer.seek(0)
 
-        response = HttpResponse(
-            buffer.getvalue(),
+        return FileResponse(
+            buffer,
+            as_attachment=True,
+            filename=f'redi_{export_type}_{date.today()}.xlsx',
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
         )
-        response['Content-Disposition'] = (
-            f'attachment; filename="redi_{export_type}_{date.today()}.xlsx"'
-        )
-        return response
 
-    def _write_audit_rows(self, writer):
-        writer.writerow([
-            'Location', 'Service Line', 'Audit Date', 'Auditor',
-            'Overall %', 'Documentation %', 'Equipment %',
-            'Condition %', 'Checks %', 'Status',
-        ])
-        audits = (
-            Audit.objects.filter(submission_status='Submitted')
-            .select_related('location', 'location__service_line')
-        )
-        for audit in audits:
-            writer.writerow([
-                audit.location.display_name,
-                audit.location.service_line.abbreviation,
-                (
-                    audit.completed_at.strftime('%Y-%m-%d')
-                    if audit.completed_at else ''
-                ),
-                audit.auditor_name,
-                float(audit.overall_compliance) if audit.overall_compliance else '',
-                float(audit.document_score) if audit.document_score else '',
-                float(audit.equipment_score) if audit.equipment_score else '',
-                float(audit.condition_score) if audit.condition_score else '',
-                float(audit.check_score) if audit.check_score else '',
-                audit.submission_status,
-            ])
-
-    def _write_issue_rows(self, writer):
-        writer.writerow([
-            'Issue #', 'Location', 'Category', 'Severity',
-            'Title', 'Status', 'Reported Date', 'Assigned To',
-            'Escalation Level',
-        ])
-        for issue in Issue.objects.select_related('location'):
-            writer.writerow([
-                issue.issue_number,
-                issue.location.display_name,
-                issue.issue_category,
-                issue.severity,
-                issue.title,
-                issue.status,
-                (
-                    issue.reported_date.strftime('%Y-%m-%d')
-                    if issue.reported_date else ''
-                ),
-                issue.assigned_to,
-                issue.escalation_level,
-            ])
-
-    def _write_location_rows(self, writer):
-        writer.writerow([
-            'Department', 'Display Name', 'Service Line', 'Building',
-            'Level', 'Operating Hours', 'Has Paed Box', 'Defib Type',
-            'Last Audit', 'Last Compliance %', 'Status',
-        ])
-        for loc in Location.objects.select_related('service_line'):
-            writer.writerow([
-                loc.department_name,
-                loc.display_name,
-                loc.service_line.abbreviation,
-                loc.building,
-                loc.level,
-                loc.get_operating_hours_display(),
-                'Yes' if loc.has_paediatric_box else 'No',
-                loc.get_defibrillator_type_display(),
-                (
-                    loc.last_audit_date.strftime('%Y-%m-%d')
-                    if loc.last_audit_date else 'Never'
-                ),
-                float(loc.last_audit_compliance) if loc.last_audit_compliance else 'N/A',
-                loc.status,
-            ])
+
+class ExportJobCreateView(ManagerRequiredMixin, View):
+    """Queue a background export, reusing an identical recent one (POST only)."""
+
+    def post(self, request):
+        try:
+            job, created = ExportJobService().request_export(
+                request.POST.get('type', 'audits'),
+                request.POST.get('format', 'csv'),
+                user=request.user,
+            )
+        except ValueError as e:
+            return HttpResponseBadRequest(str(e))
+
+        if not created:
+            messages.info(request, 'An identical export was requested recently and will be reused.')
+        return redirect('audit:export_job_detail', pk=job.pk)
+
+
+class ExportJobDetailView(ManagerRequiredMixin, DetailView):
+    """Progress page for a background export; polls until the file is ready."""
+
+    model = ExportJob
+    template_name = 'audit/export_job.html'
+    context_object_name = 'job'
+
+
+class ExportJobStatusView(ManagerRequiredMixin, DetailView):
+    """HTMX fragment with the current status of a background export."""
+
+    model = ExportJob
+    template_name = 'audit/partials/export_job_status.html'
+    context_object_name = 'job'
+
+
+class ExportJobDownloadView(ManagerRequiredMixin, View):
+    """Download the file built by a completed export job."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, status='Completed')
+        try:
+            artifact = job.file.open('rb')
+        except (FileNotFoundError, ValueError) as e:
+            raise Http404('Export file is no longer available.') from e
+        return FileResponse(artifact, as_attachment=True, filename=job.filename)
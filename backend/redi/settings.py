@@ -48,8 +48,22 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'audit.middleware.RequestMetricsMiddleware',
 ]
 
+# Per-view query count and latency metrics (see audit/middleware.py), summed
+# in memory and written to the database every FLUSH_INTERVAL seconds
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+REQUEST_METRICS_FLUSH_INTERVAL = int(os.environ.get('REQUEST_METRICS_FLUSH_INTERVAL', '30'))
+
+# Bearer token for Prometheus scrapes of /metrics/ (see audit/metrics.py).
+# Multi-process collection is enabled by the PROMETHEUS_MULTIPROC_DIR
+# environment variable, read directly by prometheus_client.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Directory holding one PROMETHEUS_MULTIPROC_DIR per service (web, mailer,
+# cron, exports); /metrics/ aggregates all of them when set
+METRICS_MULTIPROC_ROOT = os.environ.get('METRICS_MULTIPROC_ROOT', '')
+
 ROOT_URLCONF = 'redi.urls'
 
 TEMPLATES = [
@@ -83,6 +97,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/5.1/topics/cache/
+# Local memory by default (per process). Set REDIS_URL to share the cache
+# between worker processes; this needs the redis package installed.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'redi',
+        }
+    }
+
+# Seconds the dashboard statistics block is served from cache; only used
+# with a shared cache (REDIS_URL), see audit/services/dashboard.py
+DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_CACHE_TIMEOUT', '300'))
+# Seconds a user's role (group) names are cached between requests; only
+# used with a shared cache (REDIS_URL), see audit/mixins.py
+ROLE_CACHE_TIMEOUT = int(os.environ.get('ROLE_CACHE_TIMEOUT', '300'))
+
+
 # Password validation
 # https://docs.djangoproject.com/5.1/ref/settings/#auth-password-validators
 
@@ -127,17 +169,32 @@ STATICFILES_DIRS = [
 import sys
 if 'test' in sys.argv:
     STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
         'staticfiles': {
             'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
         },
     }
 else:
     STORAGES = {
+        'default': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        },
         'staticfiles': {
             'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
         },
     }
 
+# Uploaded and generated files (export artifacts). Not served publicly;
+# downloads go through permission-checked views.
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# Background exports (see audit/services/export_jobs.py)
+EXPORT_ARTIFACT_REUSE = int(os.environ.get('EXPORT_ARTIFACT_REUSE', '600'))
+EXPORT_ARTIFACT_TTL = int(os.environ.get('EXPORT_ARTIFACT_TTL', '86400'))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/5.1/ref/settings/#default-auto-field
@@ -162,10 +219,35 @@ CSRF_COOKIE_SECURE = not DEBUG
 
 # Email configuration - Power Automate API
 EMAIL_API_ENDPOINT = os.environ.get('EMAIL_API_ENDPOINT', '')
+# Read timeout; the connect timeout is separate so an unreachable endpoint
+# fails fast
 EMAIL_API_TIMEOUT = int(os.environ.get('EMAIL_API_TIMEOUT', '30'))
+EMAIL_API_CONNECT_TIMEOUT = int(os.environ.get('EMAIL_API_CONNECT_TIMEOUT', '5'))
+# Pooled keep-alive connections kept per process, and adapter-level retries
+# for connection failures and 429/502/503/504 responses
+EMAIL_API_POOL_SIZE = int(os.environ.get('EMAIL_API_POOL_SIZE', '4'))
+EMAIL_API_RETRIES = int(os.environ.get('EMAIL_API_RETRIES', '2'))
 DEFAULT_FROM_EMAIL = 'redi-noreply@health.qld.gov.au'
 EMAIL_SUBJECT_PREFIX = '[REdI] '
 
+# Outbound email queue (see audit/services/email_queue.py). Notifications
+# are delivered by the send_queued_email worker; failed sends are retried
+# with exponential backoff and dead-lettered after EMAIL_QUEUE_MAX_ATTEMPTS.
+EMAIL_QUEUE_MAX_ATTEMPTS = int(os.environ.get('EMAIL_QUEUE_MAX_ATTEMPTS', '6'))
+EMAIL_QUEUE_RETENTION_DAYS = int(os.environ.get('EMAIL_QUEUE_RETENTION_DAYS', '30'))
+# Emails of a claimed batch sent in parallel; keep within EMAIL_API_POOL_SIZE
+# so every sender has a pooled connection
+EMAIL_QUEUE_CONCURRENCY = int(os.environ.get('EMAIL_QUEUE_CONCURRENCY', '4'))
+# SLA warnings are rolled into one digest email per recipient, sent once the
+# oldest pending notice is this many seconds old. 0 sends every notice as its
+# own email.
+NOTIFICATION_DIGEST_WINDOW = int(os.environ.get('NOTIFICATION_DIGEST_WINDOW', '300'))
+# Also digest critical-issue alerts (by default they are sent immediately)
+NOTIFICATION_DIGEST_CRITICAL = os.environ.get('NOTIFICATION_DIGEST_CRITICAL', 'False').lower() in ('true', '1', 'yes')
+# Seconds role-group and username email lookups are cached for notifications;
+# only used with a shared cache (REDIS_URL), see audit/services/recipients.py
+RECIPIENT_CACHE_TIMEOUT = int(os.environ.get('RECIPIENT_CACHE_TIMEOUT', '600'))
+
 # Email backend configuration
 # Use console backend in development, SMTP or Power Automate in production
 if DEBUG:
@@ -45,8 +45,11 @@ else
   echo "Database already contains data. Skipping seed."
 fi
 
+echo "Building search index if needed..."
+python manage.py rebuild_search_index --if-empty
+
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
 echo "Starting Gunicorn..."
-exec "$@"
+exec /app/reset-metrics.sh "$@"
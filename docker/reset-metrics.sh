@@ -0,0 +1,15 @@
+#!/bin/sh
+# Start a service with an empty Prometheus multiprocess directory.
+#
+# Each service writes its samples to its own PROMETHEUS_MULTIPROC_DIR on the
+# shared metrics volume, so restarting one service never deletes files that
+# another service's running processes still write to.
+set -e
+
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  echo "Resetting Prometheus metrics directory $PROMETHEUS_MULTIPROC_DIR..."
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+  rm -f "$PROMETHEUS_MULTIPROC_DIR"/*.db
+fi
+
+exec "$@"